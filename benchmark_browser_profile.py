@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark script comparing browser profiles on a local stand-in portal page.
+Measures page-ready time (login form usable) and the resident memory of
+chromedriver + Chrome for the 'legacy' and 'portal-fast' profiles.
+
+Usage: python3 benchmark_browser_profile.py [runs]
+"""
+
+import sys
+import time
+import threading
+import statistics
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import psutil
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from driver_cache import start_chrome
+from browser_profile import build_chrome_options, apply_profile, LEGACY, PORTAL_FAST
+
+# Heavy assets are served slowly, like a portal on a congested gateway
+ASSET_DELAY = 0.5
+
+PORTAL_PAGE = b"""<!DOCTYPE html>
+<html><head><title>Captive Portal</title>
+<link rel="stylesheet" href="/style.css">
+<style>@font-face { font-family: Portal; src: url(/font.woff2); } body { font-family: Portal; }</style>
+</head><body>
+<img src="/banner.png" width="800" height="200">
+<form action="/login.xml" method="post">
+  <input type="text" name="username" id="username">
+  <input type="password" name="password" id="password">
+  <button type="submit">Login</button>
+</form>
+<img src="/logo.jpg"><video src="/intro.mp4" autoplay muted></video>
+<script src="/slow.js"></script>
+</body></html>"""
+
+
+class PortalHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/':
+            body, content_type = PORTAL_PAGE, 'text/html'
+        else:
+            time.sleep(ASSET_DELAY)
+            body, content_type = b'\0' * 200000, 'application/octet-stream'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def browser_rss_mb(driver):
+    """Resident memory of chromedriver and every Chrome process under it"""
+    root = psutil.Process(driver.service.process.pid)
+    total = 0
+    for process in [root] + root.children(recursive=True):
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            pass
+    return total / (1024 * 1024)
+
+
+def measure(profile, url):
+    """(seconds until the login form is usable, browser RSS in MB) for one cold browser"""
+    driver = start_chrome(build_chrome_options(profile, headless=True))
+    try:
+        apply_profile(driver, profile)
+        started = time.perf_counter()
+        driver.get(url)
+        WebDriverWait(driver, 30).until(EC.element_to_be_clickable((By.NAME, "password")))
+        ready = time.perf_counter() - started
+        return ready, browser_rss_mb(driver)
+    finally:
+        driver.quit()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PortalHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    print("=== Browser Profile Benchmark ===")
+    print(f"Stand-in portal: {url} ({runs} runs per profile)\n")
+
+    results = {}
+    for profile in (LEGACY, PORTAL_FAST):
+        samples = [measure(profile, url) for _ in range(runs)]
+        results[profile] = samples
+        ready = [s[0] for s in samples]
+        rss = [s[1] for s in samples]
+        print(f"{profile:12} page ready: median {statistics.median(ready) * 1000:7.0f} ms, "
+              f"max {max(ready) * 1000:7.0f} ms | RSS: median {statistics.median(rss):6.0f} MB")
+
+    legacy_ready = statistics.median(s[0] for s in results[LEGACY])
+    fast_ready = statistics.median(s[0] for s in results[PORTAL_FAST])
+    legacy_rss = statistics.median(s[1] for s in results[LEGACY])
+    fast_rss = statistics.median(s[1] for s in results[PORTAL_FAST])
+    print(f"\nportal-fast vs legacy: {legacy_ready / fast_ready:.1f}x faster page ready, "
+          f"{legacy_rss - fast_rss:.0f} MB less memory")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Browser Profile - Chrome options for the browser login engines
+'portal-fast' loads only what a login form needs: headless, eager page
+load, no images/fonts/media, no extensions, a small viewport and no
+background networking. 'legacy' reproduces the options the engines
+used before, for comparison (see benchmark_browser_profile.py)
+"""
+
+import logging
+from config import BROWSER_CONFIG
+
+PORTAL_FAST = 'portal-fast'
+LEGACY = 'legacy'
+
+# Arguments every profile needs for a captive portal (self-signed certificates, sandboxes)
+BASE_ARGUMENTS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--ignore-certificate-errors',
+    '--ignore-ssl-errors',
+    '--disable-web-security',
+    '--allow-running-insecure-content'
+]
+
+PORTAL_FAST_ARGUMENTS = [
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-features=Translate,OptimizationHints,MediaRouter',
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--mute-audio',
+    '--disable-gpu',
+    '--blink-settings=imagesEnabled=false'
+]
+
+# Requests the portal page never needs; blocked over CDP once the browser is up
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp3', '*.mp4', '*.webm', '*.ogg', '*.wav'
+]
+
+BLOCKED_CONTENT_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.media_stream': 2,
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.geolocation': 2
+}
+
+
+def build_chrome_options(profile=None, headless=None, window_size=None):
+    """Chrome Options for a profile; headless=False keeps a visible window (pyautogui fallbacks)"""
+    from selenium.webdriver.chrome.options import Options
+    profile = profile or BROWSER_CONFIG['profile']
+    options = Options()
+    for argument in BASE_ARGUMENTS:
+        options.add_argument(argument)
+
+    if profile == PORTAL_FAST:
+        if headless is None or headless:
+            options.add_argument('--headless=new')
+        for argument in PORTAL_FAST_ARGUMENTS:
+            options.add_argument(argument)
+        options.add_experimental_option('prefs', BLOCKED_CONTENT_PREFS)
+        # Return once the DOM is parsed; the form is there before stylesheets and scripts finish
+        options.page_load_strategy = BROWSER_CONFIG['page_load_strategy']
+        window_size = window_size or BROWSER_CONFIG['window_size']
+    elif headless if headless is not None else BROWSER_CONFIG['headless']:
+        options.add_argument('--headless')
+
+    if window_size:
+        options.add_argument(f"--window-size={window_size[0]},{window_size[1]}")
+    if BROWSER_CONFIG['record_login']:
+        # CDP network events, read back by login_recorder to capture the login request
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+def apply_profile(driver, profile=None):
+    """Post-launch settings that can't be expressed as options (CDP URL blocking)"""
+    profile = profile or BROWSER_CONFIG['profile']
+    if profile != PORTAL_FAST:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        logging.warning(f"Could not block page resources: {e}")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Browser Waits - Condition-driven waits for the browser login flows
+Instead of fixed sleeps, poll (every few tens of milliseconds, up to a
+deadline) for the thing we are actually waiting on: the login form, a URL
+change, the portal's status message, network idle, or being online
+"""
+
+import time
+import threading
+import logging
+from config import BROWSER_CONFIG
+from sophos_portal import classify_message, LOGIN_SUCCESS, UNKNOWN
+
+URL_CHANGED = 'url_changed'
+STATUS_SUCCESS = 'status_success'
+STATUS_FAILURE = 'status_failure'
+ONLINE = 'online'
+NETWORK_IDLE = 'network_idle'
+
+SUCCESS_OUTCOMES = (URL_CHANGED, STATUS_SUCCESS, ONLINE)
+
+# readyState plus the number of resources fetched so far, in one round trip
+PAGE_STATE_SCRIPT = """
+return [document.readyState, performance.getEntriesByType('resource').length,
+        document.body ? document.body.innerText.slice(0, 2000) : ''];
+"""
+
+FORM_READY_SCRIPT = """
+return !!document.querySelector('input[type=password]') && document.readyState !== 'loading';
+"""
+
+
+def wait_until(condition, timeout, poll=None):
+    """Call condition() until it returns something truthy or the deadline passes; None on timeout"""
+    poll = poll or BROWSER_CONFIG['poll_interval']
+    deadline = time.monotonic() + timeout
+    while True:
+        result = condition()
+        if result:
+            return result
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(poll)
+
+
+def wait_for_form(driver, timeout=10):
+    """Wait until the page has a password box (the login form is usable)"""
+    def condition():
+        try:
+            return driver.execute_script(FORM_READY_SCRIPT)
+        except Exception:
+            # Mid-navigation the page can't answer; try again next poll
+            return None
+
+    return bool(wait_until(condition, timeout))
+
+
+def page_reacted(driver, start_url, baseline_text, timeout=0.5):
+    """Whether the page navigated or changed its text since start_url/baseline_text (polled briefly)"""
+    def condition():
+        try:
+            return driver.current_url != start_url or page_text(driver) != baseline_text
+        except Exception:
+            # Mid-navigation the page can't answer, which means it reacted
+            return True
+
+    return bool(wait_until(condition, timeout))
+
+
+def page_text(driver):
+    """Visible text of the page, for before/after comparisons"""
+    try:
+        return driver.execute_script(PAGE_STATE_SCRIPT)[2]
+    except Exception:
+        return ''
+
+
+class _OracleWatch:
+    """Runs connectivity checks on a side thread so polling never blocks on the network"""
+
+    def __init__(self, oracle):
+        self.oracle = oracle
+        self.online = False
+        self.thread = None
+
+    def poke(self):
+        if self.oracle is None or (self.thread and self.thread.is_alive()):
+            return
+        self.thread = threading.Thread(target=self._check, daemon=True)
+        self.thread.start()
+
+    def _check(self):
+        try:
+            self.oracle.invalidate()
+            self.online = self.oracle.is_online()
+        except Exception as e:
+            logging.warning(f"Connectivity check during login wait failed: {e}")
+
+
+def wait_for_login_outcome(driver, start_url, baseline_text='', timeout=None, oracle=None,
+                           idle_window=0.5, oracle_interval=1.0):
+    """Wait for the portal to answer a submitted login; returns the first signal seen, or None
+
+    Signals: the URL moved away from start_url, the page text changed to a
+    recognisable success/failure message, the oracle reports online, or
+    (weakest) the page finished loading and fetched nothing new for idle_window.
+    """
+    timeout = timeout or BROWSER_CONFIG['outcome_timeout']
+    watch = _OracleWatch(oracle)
+    state = {'resources': None, 'quiet_since': None, 'last_oracle': 0.0}
+
+    def condition():
+        now = time.monotonic()
+        if watch.online:
+            return ONLINE
+        if oracle is not None and now - state['last_oracle'] >= oracle_interval:
+            state['last_oracle'] = now
+            watch.poke()
+
+        try:
+            if driver.current_url != start_url:
+                return URL_CHANGED
+            ready_state, resources, text = driver.execute_script(PAGE_STATE_SCRIPT)
+        except Exception:
+            # Mid-navigation the page can't answer; try again next poll
+            return None
+
+        if text != baseline_text:
+            outcome = classify_message('', text)
+            if outcome == LOGIN_SUCCESS:
+                return STATUS_SUCCESS
+            if outcome != UNKNOWN:
+                return STATUS_FAILURE
+
+        if ready_state == 'complete' and resources == state['resources']:
+            if state['quiet_since'] is None:
+                state['quiet_since'] = now
+            elif now - state['quiet_since'] >= idle_window and text != baseline_text:
+                return NETWORK_IDLE
+        else:
+            state['resources'] = resources
+            state['quiet_since'] = None
+        return None
+
+    started = time.monotonic()
+    outcome = wait_until(condition, timeout)
+    logging.info(f"Login wait: {outcome or 'timeout'} after {time.monotonic() - started:.2f}s")
+    return outcome
@@ -8,14 +8,15 @@ import time
 import subprocess
 import platform
 import logging
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_cache import start_chrome
+from browser_profile import build_chrome_options, apply_profile
+from form_fill_js import fill_login_form, describe_field
+from browser_waits import wait_for_form, wait_for_login_outcome, page_text, ONLINE, STATUS_FAILURE
+from connectivity_oracle import get_shared_oracle
 from config import WIFI_CONFIG, CREDENTIALS, NETWORK_CONFIG
+from linux_netprobe import get_linux_probe
+from strategy_store import StrategyStore
+from wifictl import defer_to_daemon
 
 # Set up logging
 logging.basicConfig(
@@ -30,33 +31,18 @@ logging.basicConfig(
 class BrowserWiFiAutomation:
     def __init__(self):
         self.driver = None
-        self.setup_driver()
+        self.strategy_store = StrategyStore()
+        self.oracle = get_shared_oracle()
     
     def setup_driver(self):
         """Set up Chrome WebDriver with appropriate options"""
-        chrome_options = Options()
-        
-        # Run in headless mode (no browser window)
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--ignore-ssl-errors')
-        chrome_options.add_argument('--disable-web-security')
-        chrome_options.add_argument('--allow-running-insecure-content')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
+        # Run in headless mode (no browser window), loading only what the form needs
+        chrome_options = build_chrome_options(headless=True)
         
         try:
-            # Try to use system ChromeDriver first
-            try:
-                self.driver = webdriver.Chrome(options=chrome_options)
-                logging.info("Using system ChromeDriver")
-            except:
-                # Fallback to webdriver-manager
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                logging.info("Using webdriver-manager ChromeDriver")
+            # Driver path comes from the on-disk cache: no version lookup on the captive network
+            self.driver = start_chrome(chrome_options)
+            apply_profile(self.driver)
             
             self.driver.set_page_load_timeout(30)
             logging.info("WebDriver setup successful")
@@ -64,6 +50,12 @@ class BrowserWiFiAutomation:
             logging.error(f"Failed to setup WebDriver: {e}")
             raise
     
+    def ensure_driver(self):
+        """Start Chrome on the first login attempt rather than at construction"""
+        if self.driver is None:
+            self.setup_driver()
+        return self.driver
+    
     def get_current_wifi_ssid(self):
         """Get the current WiFi SSID"""
         system = platform.system()
@@ -98,31 +90,73 @@ class BrowserWiFiAutomation:
                         return line.split(':')[1].strip()
             
             elif system == "Linux":
-                cmd = ["iwgetid", "-r"]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                return result.stdout.strip()
+                # Reads /proc and /sys; only shells out when the network changes
+                return get_linux_probe().get_ssid()
                 
         except Exception as e:
             logging.error(f"Error getting WiFi SSID: {e}")
         
         return None
     
+    def try_field_mapping(self, method, field_mapping):
+        """Fill and submit the form using one username/password field mapping"""
+        try:
+            print(f"🔄 Trying login method {method} with fields: {list(field_mapping.values())}")
+            
+            wait_for_form(self.driver)
+            start_url = self.driver.current_url
+            baseline_text = page_text(self.driver)
+            
+            # Find, fill and submit in one script call, this mapping's field names ranked first
+            report = fill_login_form(self.driver, CREDENTIALS['username'], CREDENTIALS['password'],
+                                     [field_mapping['username']], [field_mapping['password']])
+            logging.info(f"Form fill (method {method}): username {describe_field(report.username)}, "
+                         f"password {describe_field(report.password)}, submit {report.submit}")
+            
+            if not report.username:
+                print("❌ Could not find username field")
+                return False
+            print("✅ Username entered")
+            
+            if not report.password:
+                print("❌ Could not find password field")
+                return False
+            print("✅ Password entered")
+            
+            if not report.submit:
+                print("❌ Could not find submit button")
+                return False
+            print(f"✅ Form submitted ({report.submit['method']})")
+            
+            # Wait for the portal's answer instead of a fixed delay
+            outcome = wait_for_login_outcome(self.driver, start_url, baseline_text, oracle=self.oracle)
+            if outcome != ONLINE and outcome != STATUS_FAILURE:
+                # URL change, status text or idle page: confirm with one fresh check
+                self.oracle.invalidate()
+                outcome = ONLINE if self.oracle.is_online() else outcome
+            if outcome == ONLINE:
+                print(f"✅ Login successful with method {method}!")
+                return True
+            print(f"❌ Login failed with method {method}")
+            return False
+            
+        except Exception as e:
+            logging.error(f"Error with login method {method}: {e}")
+            print(f"❌ Error with login method {method}: {e}")
+            return False
+    
     def login_to_wifi(self):
         """Automate the WiFi login process using browser"""
         try:
             logging.info("Starting browser-based WiFi login")
             print("🔐 Starting browser-based WiFi login...")
             
-            # Navigate to the login page
-            self.driver.get(WIFI_CONFIG['login_url'])
-            logging.info(f"Navigated to login page: {WIFI_CONFIG['login_url']}")
-            
-            # Wait for page to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            # Selenium is imported only once the browser path is actually taken
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.webdriver.support import expected_conditions as EC
             
-            print("📄 Login page loaded successfully")
+            self.ensure_driver()
             
             # Try multiple field name combinations
             field_combinations = [
@@ -133,101 +167,25 @@ class BrowserWiFiAutomation:
                 {'username': 'roll', 'password': 'pwd'},
                 {'username': 'id', 'password': 'passwd'}
             ]
+            strategies = [(f"browser:fields:{m['username']}/{m['password']}", m) for m in field_combinations]
             
-            for i, field_mapping in enumerate(field_combinations):
-                try:
-                    print(f"🔄 Trying login method {i+1} with fields: {list(field_mapping.values())}")
-                    
-                    # Find and fill username field
-                    username_selectors = [
-                        (By.NAME, field_mapping['username']),
-                        (By.ID, field_mapping['username']),
-                        (By.CSS_SELECTOR, f"input[name*='{field_mapping['username']}']"),
-                        (By.XPATH, "//input[@type='text']")
-                    ]
-                    
-                    username_field = None
-                    for selector_type, selector in username_selectors:
-                        try:
-                            username_field = self.driver.find_element(selector_type, selector)
-                            break
-                        except:
-                            continue
-                    
-                    if username_field:
-                        username_field.clear()
-                        username_field.send_keys(CREDENTIALS['username'])
-                        print("✅ Username entered")
-                    else:
-                        print("❌ Could not find username field")
-                        continue
-                    
-                    # Find and fill password field
-                    password_selectors = [
-                        (By.NAME, field_mapping['password']),
-                        (By.ID, field_mapping['password']),
-                        (By.CSS_SELECTOR, f"input[name*='{field_mapping['password']}']"),
-                        (By.XPATH, "//input[@type='password']")
-                    ]
-                    
-                    password_field = None
-                    for selector_type, selector in password_selectors:
-                        try:
-                            password_field = self.driver.find_element(selector_type, selector)
-                            break
-                        except:
-                            continue
-                    
-                    if password_field:
-                        password_field.clear()
-                        password_field.send_keys(CREDENTIALS['password'])
-                        print("✅ Password entered")
-                    else:
-                        print("❌ Could not find password field")
-                        continue
-                    
-                    # Find and click submit button
-                    submit_selectors = [
-                        (By.CSS_SELECTOR, "input[type='submit']"),
-                        (By.CSS_SELECTOR, "button[type='submit']"),
-                        (By.XPATH, "//input[@type='submit'] | //button[@type='submit']"),
-                        (By.XPATH, "//button"),
-                        (By.CSS_SELECTOR, "button")
-                    ]
-                    
-                    submit_button = None
-                    for selector_type, selector in submit_selectors:
-                        try:
-                            submit_button = self.driver.find_element(selector_type, selector)
-                            break
-                        except:
-                            continue
-                    
-                    if submit_button:
-                        submit_button.click()
-                        print("✅ Submit button clicked")
-                    else:
-                        print("❌ Could not find submit button")
-                        continue
-                    
-                    # Wait a moment for the login to process
-                    time.sleep(3)
-                    
-                    # Check if login was successful by trying to access a test URL
-                    try:
-                        test_response = self.driver.get('http://www.google.com')
-                        if 'google' in self.driver.current_url.lower():
-                            print(f"✅ Login successful with method {i+1}!")
-                            return True
-                        else:
-                            print(f"❌ Login failed with method {i+1}")
-                    except:
-                        print(f"❌ Login failed with method {i+1}")
-                        
-                except Exception as e:
-                    logging.error(f"Error with login method {i+1}: {e}")
-                    print(f"❌ Error with login method {i+1}: {e}")
-                    continue
+            # Known-good strategy for this portal goes first
+            portal = WIFI_CONFIG['login_url']
+            for i, (strategy_id, field_mapping) in enumerate(self.strategy_store.order(portal, strategies)):
+                # Each attempt starts from a freshly loaded login page
+                self.driver.get(portal)
+                logging.info(f"Navigated to login page: {portal}")
+                WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
+                if i == 0:
+                    print("📄 Login page loaded successfully")
+                
+                started = time.time()
+                success = self.try_field_mapping(i + 1, field_mapping)
+                self.strategy_store.record(portal, strategy_id, success, time.time() - started)
+                if success:
+                    return True
             
             print("❌ All login methods failed")
             return False
@@ -282,10 +240,11 @@ class BrowserWiFiAutomation:
             logging.info("WebDriver closed")
 
 if __name__ == "__main__":
-    automation = BrowserWiFiAutomation()
-    try:
-        automation.run_automation()
-    except KeyboardInterrupt:
-        print("\n🛑 Automation stopped by user")
-    finally:
-        automation.cleanup() 
\ No newline at end of file
+    if not defer_to_daemon():
+        automation = BrowserWiFiAutomation()
+        try:
+            automation.run_automation()
+        except KeyboardInterrupt:
+            print("\n🛑 Automation stopped by user")
+        finally:
+            automation.cleanup() 
\ No newline at end of file
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Browser Worker - One long-lived headless Chrome that serves login jobs
+Run it once (python3 browser_worker.py) and clients send login jobs over a
+local socket instead of starting a new interpreter and browser per attempt.
+Chrome starts on the first job, is parked on about:blank between jobs, and
+is recycled after a number of jobs or when its memory grows too large
+"""
+
+import os
+import sys
+import time
+import secrets
+import logging
+import platform
+import subprocess
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from config import BROWSER_WORKER_CONFIG, CACHE_CONFIG
+
+
+def worker_address():
+    """Socket path (named pipe on Windows) the worker listens on"""
+    if platform.system() == "Windows":
+        return r'\\.\pipe\wifi_browser_worker'
+    return os.path.join(CACHE_CONFIG['cache_dir'], 'browser_worker.sock')
+
+
+def worker_authkey():
+    """Shared secret that keeps other local users from talking to the worker"""
+    path = os.path.join(CACHE_CONFIG['cache_dir'], 'browser_worker.key')
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        key = secrets.token_bytes(32)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(key)
+        return key
+
+
+class BrowserWorker:
+    def __init__(self, max_jobs=None, max_rss_mb=None):
+        self.max_jobs = max_jobs or BROWSER_WORKER_CONFIG['max_jobs']
+        self.max_rss_mb = max_rss_mb or BROWSER_WORKER_CONFIG['max_rss_mb']
+        self.automation = None
+        self.jobs_on_browser = 0
+
+        # Counters
+        self.jobs = 0
+        self.recycles = 0
+        self.browser_starts = 0
+        self.replays = 0
+
+    def ensure_browser(self):
+        """Start Chrome if it isn't running"""
+        if self.automation is None:
+            from one_time_wifi_login import OneTimeWiFiLogin
+            started = time.time()
+            self.automation = OneTimeWiFiLogin(headless=True)
+            self.automation.ensure_driver()
+            self.jobs_on_browser = 0
+            self.browser_starts += 1
+            logging.info(f"Browser worker started Chrome in {time.time() - started:.1f}s")
+        return self.automation
+
+    def browser_rss_mb(self):
+        """Resident memory of chromedriver plus every Chrome process under it"""
+        import psutil
+        try:
+            root = psutil.Process(self.automation.driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+        except (AttributeError, psutil.Error):
+            return 0
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+
+    def recycle(self, reason):
+        """Throw the browser away; the next job starts a fresh one"""
+        if self.automation is None:
+            return
+        logging.info(f"Recycling browser ({reason})")
+        try:
+            self.automation.cleanup()
+        except Exception as e:
+            logging.warning(f"Error closing browser: {e}")
+        self.automation = None
+        self.recycles += 1
+
+    def run_login(self):
+        """Fill and submit the portal form; keep the browser warm for the next job"""
+        from connectivity_oracle import get_shared_oracle
+        from login_recorder import replay_recorded_login
+        started = time.time()
+        self.jobs += 1
+        # A recorded login request needs no browser at all
+        if replay_recorded_login():
+            self.replays += 1
+            return {'submitted': True, 'online': True, 'elapsed': time.time() - started, 'replayed': True}
+        try:
+            automation = self.ensure_browser()
+            submitted = automation.fill_login_form()
+            self.jobs_on_browser += 1
+            # Park the tab so the portal page doesn't keep running scripts
+            automation.driver.get('about:blank')
+        except Exception as e:
+            logging.error(f"Browser job failed: {e}")
+            self.recycle(f"error: {e}")
+            return {'submitted': False, 'online': False, 'elapsed': time.time() - started, 'error': str(e)}
+
+        oracle = get_shared_oracle()
+        oracle.invalidate()
+        result = {'submitted': submitted, 'online': oracle.is_online(), 'elapsed': time.time() - started}
+
+        if self.jobs_on_browser >= self.max_jobs:
+            self.recycle(f"{self.jobs_on_browser} jobs")
+        else:
+            rss = self.browser_rss_mb()
+            if rss > self.max_rss_mb:
+                self.recycle(f"{rss:.0f} MB resident")
+        return result
+
+    def stats(self):
+        return {'jobs': self.jobs, 'recycles': self.recycles, 'browser_starts': self.browser_starts,
+                'replays': self.replays,
+                'jobs_on_browser': self.jobs_on_browser, 'browser_running': self.automation is not None}
+
+    def handle(self, request):
+        if not isinstance(request, dict):
+            return {'error': f"bad request: {request!r}"}
+        command = request.get('command')
+        if command == 'login':
+            return self.run_login()
+        if command == 'ping':
+            return {'ok': True}
+        if command == 'stats':
+            return self.stats()
+        return {'error': f"unknown command: {command}"}
+
+    def serve(self, warm=False):
+        """Accept jobs one at a time until a shutdown request (or Ctrl+C)"""
+        address = worker_address()
+        if platform.system() != "Windows":
+            os.makedirs(os.path.dirname(address), mode=0o700, exist_ok=True)
+            if os.path.exists(address):
+                os.unlink(address)
+        if warm:
+            self.ensure_browser()
+
+        print(f"🧭 Browser worker listening on {address}")
+        with Listener(address, authkey=worker_authkey()) as listener:
+            try:
+                while True:
+                    try:
+                        conn = listener.accept()
+                    except Exception as e:
+                        logging.warning(f"Rejected browser worker client: {e}")
+                        continue
+                    with conn:
+                        try:
+                            request = conn.recv()
+                            if isinstance(request, dict) and request.get('command') == 'shutdown':
+                                conn.send({'ok': True})
+                                break
+                            conn.send(self.handle(request))
+                        except (EOFError, OSError) as e:
+                            # The client hung up (e.g. gave up waiting); the next job still gets served
+                            logging.warning(f"Browser worker client went away: {e}")
+                        except Exception as e:
+                            logging.error(f"Browser worker request failed: {e}")
+            finally:
+                self.recycle("shutdown")
+
+
+def send_request(request, timeout=None):
+    """Send one request to a running worker; None if no worker is listening
+
+    Once the worker has the request, a missing answer is reported as a failed
+    result with 'timed_out' set, since the worker may still be acting on it.
+    """
+    timeout = timeout or BROWSER_WORKER_CONFIG['job_timeout']
+    try:
+        conn = Client(worker_address(), authkey=worker_authkey())
+    except (OSError, EOFError, AuthenticationError):
+        return None
+    with conn:
+        try:
+            conn.send(request)
+        except OSError:
+            return None
+        try:
+            if conn.poll(timeout):
+                return conn.recv()
+            error = f"no answer within {timeout}s"
+        except (OSError, EOFError) as e:
+            error = f"connection lost: {e}"
+    logging.warning(f"Browser worker gave no answer: {error}")
+    return {'submitted': False, 'online': False, 'error': error, 'timed_out': True}
+
+
+def start_worker():
+    """Launch a detached worker process and wait until it answers"""
+    script = os.path.abspath(__file__)
+    subprocess.Popen([sys.executable, script], cwd=os.path.dirname(script),
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.time() + BROWSER_WORKER_CONFIG['start_timeout']
+    while time.time() < deadline:
+        if (send_request({'command': 'ping'}, timeout=1) or {}).get('ok'):
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def request_login(timeout=None, autostart=True):
+    """Ask the worker to log in, starting it if needed; None only if no worker could be reached"""
+    result = send_request({'command': 'login'}, timeout)
+    if result is None and autostart and start_worker():
+        result = send_request({'command': 'login'}, timeout)
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('wifi_automation.log'),
+            logging.StreamHandler()
+        ]
+    )
+    if len(sys.argv) > 1 and sys.argv[1] in ('stop', 'stats'):
+        print(send_request({'command': 'shutdown' if sys.argv[1] == 'stop' else 'stats'}, timeout=10))
+    else:
+        try:
+            BrowserWorker().serve(warm='--warm' in sys.argv)
+        except KeyboardInterrupt:
+            print("\n🛑 Browser worker stopped")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Captive Portal Probe - Cheap connectivity check against generate_204 endpoints
+Classifies the network from the status code and Location header alone
+"""
+
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from config import NETWORK_CONFIG
+from http_client import get_shared_session
+
+ONLINE = 'online'
+PORTAL_REDIRECT = 'portal_redirect'    # 3xx to the login page
+PORTAL_INTERCEPT = 'portal_intercept'  # portal answered in place of the endpoint
+OFFLINE = 'offline'                    # no answer at all
+
+
+def needs_login(state):
+    """True when the probe saw a captive portal in the way"""
+    return state in (PORTAL_REDIRECT, PORTAL_INTERCEPT)
+
+
+class CaptivePortalProbe:
+    def __init__(self, session=None, url=None, expected_status=None, method=None, timeout=None):
+        self.session = session or get_shared_session()
+        self.url = url or NETWORK_CONFIG['probe_url']
+        self.expected_status = expected_status or NETWORK_CONFIG['probe_expected_status']
+        self.method = method or NETWORK_CONFIG['probe_method']
+        self.timeout = timeout or NETWORK_CONFIG['probe_timeout']
+        self.last_state = None
+        self.last_location = None
+
+    def classify(self, status_code, headers):
+        """Map a probe response to ONLINE / PORTAL_REDIRECT / PORTAL_INTERCEPT"""
+        if status_code == self.expected_status:
+            return ONLINE
+        if 300 <= status_code < 400:
+            self.last_location = headers.get('Location')
+            return PORTAL_REDIRECT
+        return PORTAL_INTERCEPT
+
+    def check(self):
+        """Probe the endpoint once without following redirects or reading the body"""
+        self.last_location = None
+        from requests import RequestException
+        try:
+            response = self.session.request(self.method, self.url, timeout=self.timeout,
+                                            allow_redirects=False, stream=True)
+        except RequestException as e:
+            logging.debug(f"Connectivity probe failed: {e}")
+            self.last_state = OFFLINE
+            return OFFLINE
+
+        try:
+            state = self.classify(response.status_code, response.headers)
+            if state == ONLINE or self.method == 'HEAD':
+                # No body to speak of: drain it so the connection returns to the pool
+                response.content
+        finally:
+            response.close()
+
+        if state != ONLINE:
+            logging.info(f"Connectivity probe: {state} (status {response.status_code}"
+                         f"{', location ' + self.last_location if self.last_location else ''})")
+        self.last_state = state
+        return state
+
+    def is_online(self):
+        """Convenience wrapper for the old check_internet_connectivity contract"""
+        return self.check() == ONLINE
+
+
+class MultiEndpointProbe:
+    def __init__(self, session=None, urls=None, policy=None, quorum=None, deadline=None):
+        """Probe several endpoints at once so one slow or blocked URL can't fake an outage
+
+        policy is 'first_success' (any endpoint online is enough) or 'quorum'
+        (at least `quorum` endpoints must agree we are online).
+        """
+        session = session or get_shared_session()
+        urls = urls or NETWORK_CONFIG['probe_urls']
+        self.policy = policy or NETWORK_CONFIG['probe_policy']
+        self.quorum = quorum or NETWORK_CONFIG['probe_quorum']
+        self.deadline = deadline or NETWORK_CONFIG['probe_deadline']
+        timeout = min(NETWORK_CONFIG['probe_timeout'], self.deadline)
+        self.probes = [CaptivePortalProbe(session, url, timeout=timeout) for url in urls]
+        self.executor = ThreadPoolExecutor(max_workers=len(self.probes), thread_name_prefix='probe')
+        self.lock = threading.Lock()
+        self.running = set()  # urls whose probe is still on a worker (possibly past an earlier deadline)
+        self.latency = {}  # url -> (seconds, state) of the last completed probe
+        self.last_state = None
+        self.last_location = None
+
+    def _timed_check(self, probe):
+        start = time.monotonic()
+        state = OFFLINE
+        try:
+            state = probe.check()
+            return probe, state
+        finally:
+            with self.lock:
+                self.running.discard(probe.url)
+                self.latency[probe.url] = (time.monotonic() - start, state)
+
+    def _submit(self):
+        """Start a probe per endpoint, except those still stuck from an earlier check
+
+        A hung endpoint keeps its worker past the deadline; probing it again would
+        queue behind it, so it sits out until it finishes and frees its worker.
+        """
+        futures = []
+        with self.lock:
+            for probe in self.probes:
+                if probe.url in self.running:
+                    continue
+                self.running.add(probe.url)
+                futures.append(self.executor.submit(self._timed_check, probe))
+        return futures
+
+    def required_successes(self):
+        """How many endpoints must report online"""
+        if self.policy == 'quorum':
+            return max(1, min(self.quorum, len(self.probes)))
+        return 1
+
+    def check(self):
+        """Probe all endpoints concurrently and stop as soon as the outcome is decided"""
+        needed = self.required_successes()
+        futures = self._submit()
+        online = 0
+        completed = []
+        try:
+            for future in as_completed(futures, timeout=self.deadline):
+                probe, state = future.result()
+                completed.append((probe, state))
+                if state == ONLINE:
+                    online += 1
+                    if online >= needed:
+                        self.last_state = ONLINE
+                        self.last_location = None
+                        return ONLINE
+                elif online + (len(futures) - len(completed)) < needed:
+                    break
+        except FutureTimeout:
+            logging.info(f"Connectivity probes hit the {self.deadline}s deadline")
+
+        # Not online: report the most informative failure we saw
+        state = OFFLINE
+        self.last_location = None
+        for probe, probe_state in completed:
+            if probe_state == PORTAL_REDIRECT:
+                state = PORTAL_REDIRECT
+                self.last_location = probe.last_location
+                break
+            if probe_state == PORTAL_INTERCEPT:
+                state = PORTAL_INTERCEPT
+        self.last_state = state
+        return state
+
+    def is_online(self):
+        """Convenience wrapper for the old check_internet_connectivity contract"""
+        return self.check() == ONLINE
+
+    def stats(self):
+        """Latency and result of the last probe per endpoint"""
+        with self.lock:
+            return {url: {'latency': seconds, 'state': state, 'running': url in self.running}
+                    for url, (seconds, state) in self.latency.items()}
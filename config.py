@@ -9,7 +9,8 @@ WIFI_CONFIG = {
     'login_url': 'https://172.16.16.16:8090/httpclient.html',
     'username_field': 'username',  # This might need to be adjusted based on actual form
     'password_field': 'password',  # This might need to be adjusted based on actual form
-    'submit_button': 'submit'      # This might need to be adjusted based on actual form
+    'submit_button': 'submit',     # This might need to be adjusted based on actual form
+    'portal_type': 'sophos'        # 'sophos' enables the native login.xml driver; '' to disable
 }
 
 # Credentials (load from environment variables for security)
@@ -22,11 +23,102 @@ CREDENTIALS = {
 BROWSER_CONFIG = {
     'headless': False,  # Set to True to run without opening browser window
     'timeout': 30,
-    'retry_attempts': 3
+    'retry_attempts': 3,
+    'profile': 'portal-fast',  # 'portal-fast' (headless, no images/fonts/media) or 'legacy'
+    'page_load_strategy': 'eager',  # 'eager' returns at DOMContentLoaded, 'none' immediately
+    'window_size': (800, 600),
+    'poll_interval': 0.05,  # seconds between checks while waiting on the page
+    'outcome_timeout': 10,  # max seconds to wait for the portal to answer a submitted login
+    'record_login': True  # record the browser's login request and replay it over HTTP next time
+}
+
+# On-disk caches (form schemas, login strategies, ...)
+CACHE_CONFIG = {
+    'cache_dir': os.path.expanduser(os.getenv('WIFI_CACHE_DIR', '~/.wifi_connector'))
+}
+
+# Long-lived headless browser for browser-based logins (browser_worker.py)
+BROWSER_WORKER_CONFIG = {
+    'max_jobs': 20,  # recycle Chrome after this many logins
+    'max_rss_mb': 600,  # ...or when chromedriver + Chrome use more memory than this
+    'job_timeout': 60,  # seconds a client waits for one login job
+    'start_timeout': 30  # seconds to wait for a freshly started worker to answer
+}
+
+# In-process login API used by the monitors (login_api.py)
+LOGIN_CONFIG = {
+    'browser_engine': 'form-filler',  # 'form-filler' (visible window, pyautogui fallback) or 'one-time'
+    'isolated': False  # run browser logins in the long-lived browser worker (browser_worker.py)
+}
+
+# Long-running daemon (wifi_daemon.py, controlled with wifictl.py)
+DAEMON_CONFIG = {
+    'browser_fallback': True,  # use the browser engine when no HTTP strategy gets us online
+    'request_timeout': 5  # seconds a control client gets to send its request
+}
+
+# Shared HTTP client
+HTTP_CONFIG = {
+    'timeout': 10,  # default per-request timeout (seconds)
+    'pool_connections': 10,  # number of per-host pools kept
+    'pool_maxsize': 4,  # keep-alive connections per host
+    'portal_pool_maxsize': 4,  # keep-alive connections to the login portal
+    'probe_pool_maxsize': 2,  # keep-alive connections per connectivity probe host
+    'retries': 2,  # connect retries for GET/HEAD (probes never retry)
+    'retry_backoff': 0.2
+}
+
+# Portal session keep-alive (Sophos portals only)
+HEARTBEAT_CONFIG = {
+    'enabled': True,
+    'interval': 90,  # seconds between keep-alive pings while logged in
+    'reauth_margin': 60,  # log in again this many seconds before the learned session lifetime ends
+    'initial_lifetime': 0,  # known session lifetime in seconds (0 = learn it from observed expiries)
+    'lifetime_alpha': 0.5,  # weight of each newly observed expiry in the lifetime estimate
+    'lifetime_probe_after': 0,  # every this many early re-logins, let one session outlive the estimate (0 = never)
+    'probe_interval': 5  # seconds between keep-alive pings once such a session is past the estimate
+}
+
+# Login retry backoff: (base, cap) seconds per failure kind, doubled after each failure in a row
+RETRY_CONFIG = {
+    'policies': {
+        'timeout': (5, 300),  # portal unreachable / too slow: back off
+        'still_captive': (1, 15),  # portal answered but we're still captive: retry fast
+        'rejected': (300, 3600),  # wrong password, login or data limit
+        'error': (5, 120)
+    },
+    'jitter': 0.5,  # each delay is drawn from [delay * (1 - jitter), delay]
+    'success_holdoff': 30  # seconds before another login after a reported success (unless the link changes)
 }
 
 # Network Detection
 NETWORK_CONFIG = {
     'target_ssid': os.getenv('TARGET_SSID', ''),  # Your hostel WiFi SSID
-    'check_interval': 5  # seconds between network checks
+    'check_interval': 5,  # seconds between network checks
+    'link_event_timeout': 60,  # max seconds to wait for a link event before re-checking (Linux netlink)
+    'probe_cache_ttl': 30,  # seconds an SSID/interface probe result is reused
+    'probe_hedge_delay': 0.1,  # seconds between starting successive (slower) SSID probe backends
+    'probe_url': 'http://connectivitycheck.gstatic.com/generate_204',  # captive-portal probe endpoint
+    'probe_expected_status': 204,  # status the endpoint returns when we are really online
+    'probe_method': 'HEAD',  # HEAD (or GET) - the body is never read
+    'probe_timeout': 5,
+    'probe_urls': [  # endpoints checked concurrently by the shared connectivity oracle
+        'http://connectivitycheck.gstatic.com/generate_204',
+        'http://clients3.google.com/generate_204',
+        'http://cp.cloudflare.com/generate_204'
+    ],
+    'probe_policy': 'first_success',  # 'first_success' or 'quorum'
+    'probe_quorum': 2,  # endpoints that must agree when probe_policy is 'quorum'
+    'probe_deadline': 3,  # seconds before a multi-endpoint check gives up
+    'use_tiered_check': True,  # try TCP connect / DNS stages before any HTTP probe
+    'anchor_hosts': [('1.1.1.1', 443), ('8.8.8.8', 443)],  # external TCP anchors (IP, port)
+    'dns_check_host': 'connectivitycheck.gstatic.com',  # must resolve to a public address
+    'tcp_timeout': 1,  # seconds for the TCP connect stages
+    'tls_timeout': 2,  # seconds for the anchor TLS handshake (portal network only)
+    'dns_timeout': 2,  # seconds for the DNS stage
+    'connectivity_cache_ttl': 5,  # seconds a shared connectivity answer is reused
+    'ssid_deadline': 15,  # seconds the monitor core waits for an SSID probe
+    'connectivity_deadline': 15,  # seconds the monitor core waits for a connectivity check
+    'login_deadline': 90,  # seconds the monitor core waits for one login attempt
+    'status_interval': 300  # seconds between monitor status/metrics log lines
 } 
\ No newline at end of file
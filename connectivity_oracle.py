@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Connectivity Oracle - One shared answer to "are we online?"
+Concurrent callers share a single in-flight probe (single-flight), the
+answer is cached briefly, and login POSTs / link changes invalidate it
+"""
+
+import time
+import threading
+import logging
+from config import NETWORK_CONFIG
+from captive_probe import MultiEndpointProbe, ONLINE, OFFLINE
+from reachability import TieredReachabilityChecker
+
+
+class ConnectivityOracle:
+    def __init__(self, probe=None, ttl=None):
+        if probe is None:
+            probe = TieredReachabilityChecker() if NETWORK_CONFIG['use_tiered_check'] else MultiEndpointProbe()
+        self.probe = probe
+        self.ttl = ttl if ttl is not None else NETWORK_CONFIG['connectivity_cache_ttl']
+        self.lock = threading.Lock()
+        self.state = None
+        self.expires_at = 0
+        self.inflight = None
+        self.generation = 0
+
+        # Counters
+        self.probes = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+
+    def get_state(self):
+        """Current connectivity state, probing only if no fresh answer exists"""
+        with self.lock:
+            if self.state is not None and time.monotonic() < self.expires_at:
+                self.cache_hits += 1
+                return self.state
+            if self.inflight is not None:
+                flight = self.inflight
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self.inflight = threading.Event()
+                flight.result = OFFLINE
+                generation = self.generation
+                self.probes += 1
+                leader = True
+
+        if not leader:
+            flight.wait()
+            return flight.result
+
+        try:
+            state = self.probe.check()
+        except Exception as e:
+            logging.error(f"Connectivity probe error: {e}")
+            state = OFFLINE
+
+        with self.lock:
+            # An invalidation while we were probing makes this answer stale
+            if generation == self.generation:
+                self.state = state
+                self.expires_at = time.monotonic() + self.ttl
+            if self.inflight is flight:
+                self.inflight = None
+        flight.result = state
+        flight.set()
+        return state
+
+    def is_online(self):
+        """True when the probe endpoint answered as expected"""
+        return self.get_state() == ONLINE
+
+    def invalidate(self):
+        """Forget the cached answer (after a login POST or link change)"""
+        with self.lock:
+            self.state = None
+            self.generation += 1
+            # Callers from now on must not join a probe that started before the change
+            self.inflight = None
+
+    def on_link_event(self, event):
+        """LinkWatcher listener"""
+        self.invalidate()
+
+    def stats(self):
+        """Probe/cache/coalescing counters (plus per-endpoint latency when available)"""
+        with self.lock:
+            stats = {'probes': self.probes, 'cache_hits': self.cache_hits,
+                     'coalesced': self.coalesced, 'state': self.state}
+        if hasattr(self.probe, 'stats'):
+            stats['endpoints'] = self.probe.stats()
+        return stats
+
+
+_shared_oracle = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_oracle():
+    """The process-wide oracle every login engine consults"""
+    global _shared_oracle
+    with _shared_lock:
+        if _shared_oracle is None:
+            _shared_oracle = ConnectivityOracle()
+        return _shared_oracle
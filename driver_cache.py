@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Driver Cache - Resolve ChromeDriver without touching the network
+The resolved driver path and Chrome version are remembered on disk and
+re-validated with a stat() of both binaries; drivers already downloaded by
+webdriver-manager or Selenium Manager are found locally. The network is
+only used on an explicit refresh (or on a first run with nothing local)
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import shutil
+import platform
+import subprocess
+import threading
+import logging
+from config import CACHE_CONFIG
+from state_file import write_json
+
+VERSION_PATTERN = re.compile(r'(\d+)\.(\d+)\.(\d+)\.(\d+)')
+
+CHROME_CANDIDATES = {
+    'Darwin': ['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+               '/Applications/Chromium.app/Contents/MacOS/Chromium'],
+    'Windows': [os.path.expandvars(r'%ProgramFiles%\Google\Chrome\Application\chrome.exe'),
+                os.path.expandvars(r'%ProgramFiles(x86)%\Google\Chrome\Application\chrome.exe'),
+                os.path.expandvars(r'%LocalAppData%\Google\Chrome\Application\chrome.exe')],
+    'Linux': ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser']
+}
+
+# Where webdriver-manager and Selenium Manager leave the drivers they download
+DRIVER_GLOBS = [
+    '~/.wdm/drivers/chromedriver/**/chromedriver',
+    '~/.wdm/drivers/chromedriver/**/chromedriver.exe',
+    '~/.cache/selenium/chromedriver/**/chromedriver',
+    '~/.cache/selenium/chromedriver/**/chromedriver.exe'
+]
+
+
+def _version(binary):
+    """Version tuple reported by `binary --version`, or None"""
+    try:
+        result = subprocess.run([binary, '--version'], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = VERSION_PATTERN.search(result.stdout)
+    return tuple(int(part) for part in match.groups()) if match else None
+
+
+def _stat_key(path):
+    """(size, mtime) of a file, or None when it's gone"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def find_chrome():
+    """Path of the installed Chrome/Chromium binary, or None"""
+    for candidate in CHROME_CANDIDATES.get(platform.system(), []):
+        path = candidate if os.path.isabs(candidate) else shutil.which(candidate)
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+def local_drivers():
+    """ChromeDriver binaries already on this machine (PATH first)"""
+    drivers = []
+    on_path = shutil.which('chromedriver')
+    if on_path:
+        drivers.append(on_path)
+    for pattern in DRIVER_GLOBS:
+        drivers.extend(sorted(glob.glob(os.path.expanduser(pattern), recursive=True), reverse=True))
+    return [d for d in dict.fromkeys(drivers) if os.access(d, os.X_OK)]
+
+
+class DriverCache:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_CONFIG['cache_dir'], 'driver.json')
+        self.lock = threading.Lock()
+        self.entry = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self):
+        try:
+            write_json(self.path, self.entry)
+        except OSError as e:
+            logging.warning(f"Could not save driver cache: {e}")
+
+    def valid(self):
+        """True when the cached driver and Chrome are the same files we resolved last time"""
+        entry = self.entry
+        if not entry:
+            return False
+        if _stat_key(entry['driver_path']) != entry['driver_stat']:
+            return False
+        # A Chrome update changes the binary; the driver may no longer match it
+        if entry.get('chrome_path') and _stat_key(entry['chrome_path']) != entry['chrome_stat']:
+            return False
+        return True
+
+    def _pick_local(self, chrome_version):
+        """Best local driver: same major version as Chrome, else the first that runs"""
+        fallback = None
+        for driver in local_drivers():
+            version = _version(driver)
+            if version is None:
+                continue
+            if chrome_version and version[0] == chrome_version[0]:
+                return driver, version
+            fallback = fallback or (driver, version)
+        # Without a known Chrome version any working driver will do
+        return fallback if not chrome_version else None
+
+    def _download(self):
+        from webdriver_manager.chrome import ChromeDriverManager
+        logging.info("Resolving ChromeDriver online (webdriver-manager)")
+        driver = ChromeDriverManager().install()
+        return driver, _version(driver)
+
+    def resolve(self, refresh=False, rescan=False):
+        """Path to a usable chromedriver; only goes online when refresh is True or nothing is local
+
+        rescan ignores the cached entry but still picks from the local drivers.
+        """
+        with self.lock:
+            if not (refresh or rescan) and self.valid():
+                return self.entry['driver_path']
+
+            chrome = find_chrome()
+            chrome_version = _version(chrome) if chrome else None
+            found = None if refresh else self._pick_local(chrome_version)
+            if found is None:
+                found = self._download()
+            driver, driver_version = found
+
+            self.entry = {
+                'driver_path': driver,
+                'driver_stat': _stat_key(driver),
+                'driver_version': '.'.join(map(str, driver_version)) if driver_version else None,
+                'chrome_path': chrome,
+                'chrome_stat': _stat_key(chrome) if chrome else None,
+                'chrome_version': '.'.join(map(str, chrome_version)) if chrome_version else None
+            }
+            self._save()
+            logging.info(f"ChromeDriver {self.entry['driver_version']} at {driver} "
+                         f"(Chrome {self.entry['chrome_version']})")
+            return driver
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_driver_cache():
+    """The process-wide driver cache"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = DriverCache()
+        return _shared_cache
+
+
+def start_chrome(options):
+    """Start Chrome with the cached driver; re-pick a local driver once if that one won't start
+
+    Chrome can fail to start for reasons that have nothing to do with the driver
+    (profile, crash, no display), so this never downloads while a local driver
+    exists; `python3 driver_cache.py --refresh` does that explicitly.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    cache = get_driver_cache()
+    driver = cache.resolve()
+    try:
+        return webdriver.Chrome(service=Service(driver), options=options)
+    except Exception as e:
+        rescanned = cache.resolve(rescan=True)
+        if rescanned == driver:
+            raise
+        logging.warning(f"Cached ChromeDriver failed to start ({e}), retrying with {rescanned}")
+        return webdriver.Chrome(service=Service(rescanned), options=options)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    cache = get_driver_cache()
+    cache.resolve(refresh='--refresh' in sys.argv)
+    print(json.dumps(cache.entry, indent=2))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Form Fill JS - Find, fill and submit the portal login form in one round trip
+A single injected script ranks candidate username/password/submit elements,
+fills the credentials (firing input/change events for script-driven pages),
+submits, and returns a report of what it matched
+"""
+
+from collections import namedtuple
+from config import WIFI_CONFIG
+
+FillReport = namedtuple('FillReport', ['ok', 'username', 'password', 'submit', 'form_action'])
+
+FILL_SCRIPT = r"""
+const [username, password, userNames, passNames, doSubmit] = arguments;
+const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const key = el => ((el.name || '') + ' ' + (el.id || '')).toLowerCase();
+const describe = (el, rank) => el && {name: el.name || null, id: el.id || null, tag: el.tagName.toLowerCase(),
+                                      type: el.type || null, rank: rank};
+const inputs = Array.from(document.querySelectorAll('input')).filter(el => !el.disabled && el.type !== 'hidden');
+
+function rankPick(candidates, ranks) {
+  for (let i = 0; i < ranks.length; i++) {
+    const el = candidates.find(ranks[i]);
+    if (el) return [el, i];
+  }
+  return [null, -1];
+}
+
+// Password: a preferred name/id, then any visible password box, then any password box
+const [pass, passRank] = rankPick(inputs, [
+  el => passNames.some(n => el.name === n || el.id === n),
+  el => el.type === 'password' && visible(el),
+  el => el.type === 'password'
+]);
+
+// Username: a preferred name/id, a hinted name, the text box just before the password, any text box
+const textTypes = ['text', 'email', 'tel', ''];
+const texts = inputs.filter(el => textTypes.includes((el.getAttribute('type') || '').toLowerCase()));
+const beforePass = pass ? texts.filter(el => el.compareDocumentPosition(pass) & Node.DOCUMENT_POSITION_FOLLOWING) : texts;
+const [user, userRank] = rankPick(texts, [
+  el => userNames.some(n => el.name === n || el.id === n),
+  el => visible(el) && /user|login|roll|email|name|\bid\b/.test(key(el)),
+  el => visible(el) && el === beforePass[beforePass.length - 1],
+  el => visible(el)
+]);
+
+function fill(el, value) {
+  // Use the native setter so framework-bound inputs notice the change
+  const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+  el.focus();
+  setter.call(el, value);
+  el.dispatchEvent(new Event('input', {bubbles: true}));
+  el.dispatchEvent(new Event('change', {bubbles: true}));
+}
+
+const report = {username: describe(user, userRank), password: describe(pass, passRank), submit: null,
+                form_action: null};
+if (!user || !pass) return report;
+fill(user, username);
+fill(pass, password);
+
+const form = pass.form || user.form;
+report.form_action = form ? form.action : null;
+if (!doSubmit) return report;
+
+// Submit: a submit control in the form, any button in it, a login-looking button anywhere
+const scope = form ? Array.from(form.querySelectorAll('button, input[type=submit], input[type=button], input[type=image]')) : [];
+const anywhere = Array.from(document.querySelectorAll('button, input[type=submit], input[type=button], a'));
+const label = el => (el.innerText || el.value || el.title || '').toLowerCase();
+const [button, buttonRank] = rankPick([...scope, ...anywhere].filter(visible), [
+  el => scope.includes(el) && (el.type === 'submit' || el.type === 'image'),
+  el => scope.includes(el),
+  el => /log ?in|sign ?in|submit|connect/.test(label(el))
+]);
+if (button) {
+  button.click();
+  report.submit = {method: 'click', rank: buttonRank, text: label(button).trim().slice(0, 40)};
+} else if (form) {
+  form.requestSubmit ? form.requestSubmit() : form.submit();
+  report.submit = {method: 'form_submit', rank: -1, text: null};
+} else {
+  for (const type of ['keydown', 'keypress', 'keyup']) {
+    pass.dispatchEvent(new KeyboardEvent(type, {key: 'Enter', code: 'Enter', keyCode: 13, which: 13, bubbles: true}));
+  }
+  report.submit = {method: 'enter_key', rank: -1, text: null};
+}
+return report;
+"""
+
+
+def default_field_names():
+    """Preferred (username, password) field names, configured ones first"""
+    usernames = [WIFI_CONFIG['username_field'], 'username', 'user', 'login', 'roll', 'id']
+    passwords = [WIFI_CONFIG['password_field'], 'password', 'pass', 'pwd', 'passwd']
+    return list(dict.fromkeys(usernames)), list(dict.fromkeys(passwords))
+
+
+def fill_login_form(driver, username, password, username_names=None, password_names=None, submit=True):
+    """Fill (and submit) the login form with one execute_script call; returns a FillReport"""
+    default_users, default_passwords = default_field_names()
+    raw = driver.execute_script(FILL_SCRIPT, username, password,
+                                username_names or default_users, password_names or default_passwords,
+                                submit) or {}
+    ok = bool(raw.get('username') and raw.get('password') and (raw.get('submit') or not submit))
+    return FillReport(ok, raw.get('username'), raw.get('password'), raw.get('submit'), raw.get('form_action'))
+
+
+def describe_field(field):
+    """Short human description of a matched element for log lines"""
+    if not field:
+        return 'none'
+    return f"{field['tag']} name={field['name']} id={field['id']} (rank {field['rank']})"
+
+
+def press_enter(driver, field):
+    """Send a WebDriver Enter to a matched field (a real key event, works headless); False if it isn't found"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    for by, value in ((By.NAME, field.get('name')), (By.ID, field.get('id'))):
+        if not value:
+            continue
+        try:
+            driver.find_element(by, value).send_keys(Keys.ENTER)
+            return True
+        except Exception:
+            continue
+    return False
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Heartbeat - Keep the portal session alive while we are logged in
+Sends the portal's keep-alive ping on a fixed cadence, learns how long a
+session really lasts from the expiries it sees, and logs in again just
+before that point so the connection never drops
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from config import WIFI_CONFIG, CACHE_CONFIG, CREDENTIALS, HEARTBEAT_CONFIG
+from state_file import write_json
+
+LINK_LOSS_EVENTS = ('link_down', 'link_removed', 'addr_removed')
+
+
+class SessionHeartbeat:
+    def __init__(self, client, reauth, username=None, interval=None, margin=None, path=None):
+        self.client = client
+        self.reauth = reauth
+        self.username = username or CREDENTIALS['username']
+        self.interval = interval or HEARTBEAT_CONFIG['interval']
+        self.margin = margin if margin is not None else HEARTBEAT_CONFIG['reauth_margin']
+        self.alpha = HEARTBEAT_CONFIG['lifetime_alpha']
+        self.probe_after = HEARTBEAT_CONFIG['lifetime_probe_after']
+        self.probe_interval = HEARTBEAT_CONFIG['probe_interval']
+        self.path = path or os.path.join(CACHE_CONFIG['cache_dir'], 'heartbeat.json')
+
+        self.lock = threading.Lock()
+
+        # Session bookkeeping: when we logged in and when the portal last acked
+        self.login_time = None
+        self.last_ack = None
+        self.lifetime = self._load() or HEARTBEAT_CONFIG['initial_lifetime'] or None
+        # Early re-logins never see an expiry, so the estimate could only shrink;
+        # every probe_after of them, one session is kept alive past it instead
+        self.early_refreshes = 0
+        self.probing = False
+
+        self.acks = 0
+        self.expiries = 0
+        self.reauths = 0
+        self.errors = 0
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f).get(self.client.base_url)
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _save(self):
+        try:
+            try:
+                with open(self.path) as f:
+                    lifetimes = json.load(f)
+            except (OSError, ValueError):
+                lifetimes = {}
+            lifetimes[self.client.base_url] = self.lifetime
+            write_json(self.path, lifetimes)
+        except OSError as e:
+            logging.warning(f"Could not save session lifetime: {e}")
+
+    def mark_login(self):
+        """Record a successful login; the monitor core schedules the beats"""
+        with self.lock:
+            self.login_time = self.last_ack = time.time()
+            self.probing = False
+
+    def on_logout(self):
+        """Forget the session (link lost, logged out, ...)"""
+        with self.lock:
+            self.login_time = None
+            self.probing = False
+
+    def on_link_event(self, event):
+        """LinkWatcher listener: losing the link ends the portal session"""
+        if event.kind in LINK_LOSS_EVENTS:
+            self.on_logout()
+
+    @property
+    def authenticated(self):
+        with self.lock:
+            return self.login_time is not None
+
+    def _refresh_age(self):
+        # Never refresh more often than every half lifetime, whatever the margin
+        return max(self.lifetime - self.margin, self.lifetime / 2)
+
+    def next_delay(self, now=None):
+        """Seconds until the next keep-alive or proactive re-login"""
+        now = now or time.time()
+        with self.lock:
+            if self.login_time is None:
+                return None
+            delay = self.interval
+            if self.lifetime and self.probing:
+                # Past the estimate the portal may end the session any moment; ping often to catch it
+                estimate_at = self.login_time + self.lifetime
+                delay = min(delay, self.probe_interval) if now >= estimate_at else min(delay, estimate_at - now)
+            elif self.lifetime:
+                refresh_at = self.login_time + self._refresh_age()
+                delay = min(delay, max(0.0, refresh_at - now))
+            return delay
+
+    def _learn(self, observed):
+        """Fold an observed session lifetime into the estimate"""
+        if observed <= 0:
+            return
+        if self.lifetime is None:
+            self.lifetime = observed
+        else:
+            self.lifetime += self.alpha * (observed - self.lifetime)
+        logging.info(f"Portal session lifetime estimate: {self.lifetime:.0f}s")
+        self._save()
+
+    def beat(self):
+        """One heartbeat: refresh if the session is about to expire, otherwise ping"""
+        now = time.time()
+        with self.lock:
+            if self.login_time is None:
+                return
+            age = now - self.login_time
+            due = self.lifetime is not None and not self.probing and age >= self._refresh_age()
+        if due:
+            logging.info(f"Portal session is {age:.0f}s old, logging in again before it expires")
+            self._reauthenticate()
+            self._maybe_probe()
+            return
+
+        try:
+            alive = self.client.keepalive(self.username)
+        except Exception as e:
+            # Network trouble isn't an expiry; try again next beat
+            self.errors += 1
+            logging.warning(f"Portal keep-alive failed: {e}")
+            return
+
+        with self.lock:
+            if self.login_time is None:
+                return
+            if alive:
+                self.acks += 1
+                self.last_ack = now
+                if self.probing and age > self.lifetime:
+                    # Still alive past the estimate, so sessions last at least this long
+                    self.lifetime = age
+                    self._save()
+                return
+            # The session ended somewhere after the last ack; that's the lower bound we learn
+            self.expiries += 1
+            self.early_refreshes = 0
+            self.probing = False
+            self._learn(self.last_ack - self.login_time)
+        logging.warning("Portal session expired, logging in again")
+        self._reauthenticate()
+
+    def _maybe_probe(self):
+        """Count an early re-login; after probe_after in a row, let the next session run to its expiry"""
+        with self.lock:
+            if self.login_time is None:
+                return
+            self.early_refreshes += 1
+            if self.probe_after and self.early_refreshes >= self.probe_after:
+                self.early_refreshes = 0
+                self.probing = True
+                logging.info(f"Keeping this portal session alive past the {self.lifetime:.0f}s estimate "
+                             "to check whether sessions last longer")
+
+    def _reauthenticate(self):
+        try:
+            success = self.reauth()
+        except Exception as e:
+            logging.error(f"Heartbeat re-login failed: {e}")
+            success = False
+        with self.lock:
+            if success:
+                self.reauths += 1
+                self.login_time = self.last_ack = time.time()
+            else:
+                # Leave it to the monitor's next login to restart the heartbeat
+                self.login_time = None
+
+    def stats(self):
+        """Keep-alive counters and the learned session lifetime"""
+        with self.lock:
+            return {'acks': self.acks, 'expiries': self.expiries, 'reauths': self.reauths,
+                    'errors': self.errors, 'lifetime': self.lifetime, 'probing': self.probing}
+
+
+def portal_heartbeat(client, reauth, link_watcher):
+    """A SessionHeartbeat listening to link_watcher, or None when the portal or config has none"""
+    if WIFI_CONFIG['portal_type'] != 'sophos' or not HEARTBEAT_CONFIG['enabled']:
+        return None
+    heartbeat = SessionHeartbeat(client, reauth)
+    link_watcher.add_listener(heartbeat.on_link_event)
+    return heartbeat
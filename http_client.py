@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+HTTP Client - One shared, tuned requests session for every engine
+Pooled keep-alive connections, per-host pool sizes and retry policies,
+and a default timeout so no request can hang forever
+"""
+
+import threading
+from urllib.parse import urlparse
+from config import WIFI_CONFIG, NETWORK_CONFIG, HTTP_CONFIG
+
+
+def _session_class():
+    """requests.Session with a default timeout (requests is imported on first use)"""
+    import requests
+
+    class PooledSession(requests.Session):
+        def __init__(self, default_timeout):
+            super().__init__()
+            self.default_timeout = default_timeout
+
+        def request(self, method, url, **kwargs):
+            """Apply the default timeout unless the caller set one"""
+            kwargs.setdefault('timeout', self.default_timeout)
+            return super().request(method, url, **kwargs)
+
+    return PooledSession
+
+
+def _base_url(url):
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}/"
+
+
+def _adapter(pool_maxsize, retries, verify=True):
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class PooledAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            """Skip certificate checks only where the adapter was mounted with verify=False"""
+            if not verify:
+                kwargs['verify'] = False
+            return super().send(request, **kwargs)
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,  # never replay a request the server may have acted on
+        status=0,
+        backoff_factor=HTTP_CONFIG['retry_backoff'],
+        allowed_methods=frozenset(['GET', 'HEAD'])
+    )
+    return PooledAdapter(pool_connections=HTTP_CONFIG['pool_connections'],
+                         pool_maxsize=pool_maxsize, max_retries=retry)
+
+
+def build_session():
+    """Create a configured session (most callers want get_shared_session)"""
+    import urllib3
+    session = _session_class()(HTTP_CONFIG['timeout'])
+    # Only the portal's own requests skip verification (see below); don't warn about those
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    session.headers['Connection'] = 'keep-alive'
+
+    default = _adapter(HTTP_CONFIG['pool_maxsize'], HTTP_CONFIG['retries'])
+    session.mount('http://', default)
+    session.mount('https://', default)
+
+    # Connectivity probes are deadline-driven: never retry them behind the caller's back
+    for url in NETWORK_CONFIG['probe_urls'] + [NETWORK_CONFIG['probe_url']]:
+        session.mount(_base_url(url), _adapter(HTTP_CONFIG['probe_pool_maxsize'], 0))
+
+    # The portal gets its own pool so probes can't starve login traffic. Captive portals use
+    # self-signed certificates, so TLS verification is off for the portal origin and nowhere else
+    session.mount(_base_url(WIFI_CONFIG['login_url']),
+                  _adapter(HTTP_CONFIG['portal_pool_maxsize'], HTTP_CONFIG['retries'], verify=False))
+    return session
+
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_session():
+    """The process-wide session, created on first use"""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = build_session()
+        return _shared_session
@@ -7,15 +7,22 @@ This script sets up the automation to run automatically when connecting to WiFi
 import os
 import sys
 import subprocess
+import getpass
 import platform
 from pathlib import Path
+from config import CACHE_CONFIG
+
+SYSTEMD_UNIT = "wifi-daemon.service"
+LINK_HOOK_UNIT = "wifi-link-hook.service"
+NM_DISPATCHER_SCRIPT = "90-wifi-connector"
+LINK_HOOK_SCRIPT = "wifi-link-hook.sh"
 
 def create_launch_agent():
-    """Create a macOS LaunchAgent to run the WiFi automation automatically"""
+    """Create a macOS LaunchAgent that keeps the WiFi daemon running"""
     
     # Get the current directory
     current_dir = os.getcwd()
-    script_path = os.path.join(current_dir, "one_time_wifi_login.py")
+    script_path = os.path.join(current_dir, "wifi_daemon.py")
     python_path = sys.executable
     
     # Create the LaunchAgent plist content
@@ -33,10 +40,7 @@ def create_launch_agent():
     <key>RunAtLoad</key>
     <true/>
     <key>KeepAlive</key>
-    <dict>
-        <key>NetworkState</key>
-        <true/>
-    </dict>
+    <true/>
     <key>StandardOutPath</key>
     <string>/tmp/wifi_automation.log</string>
     <key>StandardErrorPath</key>
@@ -92,61 +96,6 @@ fi
     print(f"✅ Created trigger script: {trigger_script_path}")
     return trigger_script_path
 
-def create_network_monitor():
-    """Create a network monitoring script that runs continuously"""
-    
-    current_dir = os.getcwd()
-    script_path = os.path.join(current_dir, "one_time_wifi_login.py")
-    python_path = sys.executable
-    
-    monitor_script_content = f"""#!/usr/bin/env python3
-import time
-import subprocess
-import os
-import sys
-
-def check_gvph_wifi():
-    try:
-        result = subprocess.run(["system_profiler", "SPAirPortDataType"], 
-                             capture_output=True, text=True, timeout=10)
-        return "GVPH:" in result.stdout
-    except:
-        return False
-
-def main():
-    print("🔍 WiFi Network Monitor Started")
-    print("📡 Monitoring for GVPH WiFi connection...")
-    
-    while True:
-        if check_gvph_wifi():
-            print("📶 GVPH WiFi detected! Starting automation...")
-            
-            # Run the automation
-            try:
-                subprocess.run(["{python_path}", "{script_path}"], 
-                             cwd="{current_dir}", 
-                             timeout=60)
-                print("✅ Automation completed")
-            except subprocess.TimeoutExpired:
-                print("⏰ Automation timed out")
-            except Exception as e:
-                print(f"❌ Automation error: {{e}}")
-        else:
-            print("📶 Not connected to GVPH WiFi")
-        
-        time.sleep(10)  # Check every 10 seconds
-
-if __name__ == "__main__":
-    main()
-"""
-    
-    monitor_script_path = os.path.join(current_dir, "wifi_monitor_service.py")
-    with open(monitor_script_path, 'w') as f:
-        f.write(monitor_script_content)
-    
-    print(f"✅ Created network monitor: {monitor_script_path}")
-    return monitor_script_path
-
 def install_launch_agent():
     """Install the LaunchAgent"""
     plist_path = create_launch_agent()
@@ -194,20 +143,147 @@ fi
     print(f"✅ Created startup script: {startup_script_path}")
     return startup_script_path
 
+def render_linux_service(target_dir, repo_dir=None, python_path=None, user=None, cache_dir=None):
+    """Write the systemd user units, NetworkManager dispatcher script and ip monitor hook into target_dir"""
+    repo_dir = repo_dir or os.path.dirname(os.path.abspath(__file__))
+    python_path = python_path or sys.executable
+    user = user or getpass.getuser()
+    cache_dir = cache_dir or CACHE_CONFIG['cache_dir']
+    wifictl = os.path.join(repo_dir, "wifictl.py")
+    os.makedirs(target_dir, exist_ok=True)
+    
+    daemon_unit = f"""[Unit]
+Description=WiFi captive portal auto-login daemon
+After=default.target
+
+[Service]
+Type=simple
+WorkingDirectory={repo_dir}
+Environment="WIFI_CACHE_DIR={cache_dir}"
+Environment=PYTHONUNBUFFERED=1
+ExecStart="{python_path}" "{os.path.join(repo_dir, "wifi_daemon.py")}"
+Restart=on-failure
+RestartSec=5
+
+[Install]
+WantedBy=default.target
+"""
+    
+    # NetworkManager runs dispatcher scripts as root with the interface and action as arguments;
+    # the poke runs as the daemon's user against the daemon's socket
+    dispatcher_script = f"""#!/bin/sh
+# WiFi Connector: tell the daemon a connection came up, so login starts right away
+# Install: sudo install -m 755 {NM_DISPATCHER_SCRIPT} /etc/NetworkManager/dispatcher.d/
+
+INTERFACE="$1"
+ACTION="$2"
+
+case "$ACTION" in
+    up|dhcp4-change|connectivity-change)
+        runuser -u {user} -- env WIFI_CACHE_DIR="{cache_dir}" \\
+            "{python_path}" "{wifictl}" link-up "$INTERFACE" >/dev/null 2>&1 || true
+        ;;
+esac
+exit 0
+"""
+    
+    # Without NetworkManager: follow new IPv4 addresses with `ip monitor`
+    link_hook_script = f"""#!/bin/sh
+# WiFi Connector: poke the daemon whenever an interface gets an IPv4 address
+
+ip -o -4 monitor address | while read -r line; do
+    case "$line" in
+        Deleted*) continue ;;
+    esac
+    INTERFACE=$(echo "$line" | awk '{{print $2}}')
+    WIFI_CACHE_DIR="{cache_dir}" "{python_path}" "{wifictl}" link-up "$INTERFACE" >/dev/null 2>&1
+done
+"""
+    
+    link_hook_unit = f"""[Unit]
+Description=WiFi Connector link hook (ip monitor)
+After={SYSTEMD_UNIT}
+
+[Service]
+Type=simple
+ExecStart="{os.path.join(target_dir, LINK_HOOK_SCRIPT)}"
+Restart=on-failure
+RestartSec=5
+
+[Install]
+WantedBy=default.target
+"""
+    
+    files = [
+        (SYSTEMD_UNIT, daemon_unit, 0o644),
+        (NM_DISPATCHER_SCRIPT, dispatcher_script, 0o755),
+        (LINK_HOOK_SCRIPT, link_hook_script, 0o755),
+        (LINK_HOOK_UNIT, link_hook_unit, 0o644)
+    ]
+    paths = []
+    for name, content, mode in files:
+        path = os.path.join(target_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        os.chmod(path, mode)
+        paths.append(path)
+    return paths
+
+def install_linux_service():
+    """Install the daemon as a systemd user service, woken by NetworkManager or ip monitor"""
+    unit_dir = os.path.expanduser("~/.config/systemd/user")
+    hook_dir = os.path.join(CACHE_CONFIG['cache_dir'], "hooks")
+    
+    # Units go where systemd looks; the hook scripts stay next to the daemon's other files
+    render_linux_service(hook_dir)
+    os.makedirs(unit_dir, exist_ok=True)
+    for unit in (SYSTEMD_UNIT, LINK_HOOK_UNIT):
+        os.replace(os.path.join(hook_dir, unit), os.path.join(unit_dir, unit))
+    print(f"✅ Created systemd user units in {unit_dir}")
+    
+    units = [SYSTEMD_UNIT]
+    if os.path.isdir("/etc/NetworkManager/dispatcher.d"):
+        print("📝 To start logins the moment NetworkManager brings a connection up, run:")
+        print(f"sudo install -m 755 {os.path.join(hook_dir, NM_DISPATCHER_SCRIPT)} /etc/NetworkManager/dispatcher.d/")
+    else:
+        # No NetworkManager: the ip monitor hook pokes the daemon instead
+        units.append(LINK_HOOK_UNIT)
+    
+    try:
+        subprocess.run(["systemctl", "--user", "daemon-reload"], check=True)
+        subprocess.run(["systemctl", "--user", "enable", "--now"] + units, check=True)
+        print(f"✅ Enabled {', '.join(units)}")
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"❌ Error enabling the systemd units: {e}")
+        print(f"You may need to run: systemctl --user enable --now {' '.join(units)}")
+
 def main():
     """Main installation function"""
     print("=== WiFi Automation Auto-Installation ===")
     print("This will set up automatic WiFi login when you connect to GVPH")
     print()
     
-    # Check if we're on macOS
+    # Only render the Linux files (for review or packaging): install_auto_service.py --render DIR
+    if len(sys.argv) == 3 and sys.argv[1] == "--render":
+        for path in render_linux_service(sys.argv[2]):
+            print(f"✅ Rendered {path}")
+        return
+    
+    if platform.system() == "Linux":
+        install_linux_service()
+        print("\n🎉 Installation completed!")
+        print("• Daemon status: python3 wifictl.py status")
+        print(f"• Logs: journalctl --user -u {SYSTEMD_UNIT}")
+        print(f"💡 To stop the auto-service: systemctl --user disable --now {SYSTEMD_UNIT} {LINK_HOOK_UNIT}")
+        return
+    
     if platform.system() != "Darwin":
-        print("❌ This auto-installation is designed for macOS")
+        print("❌ This auto-installation supports macOS and Linux")
         return
     
     # Create all the necessary files
+    # wifi_monitor_service.py ships with the repo; the LaunchAgent runs the daemon itself
     print("📁 Creating automation files...")
-    create_network_monitor()
     create_startup_script()
     
     # Ask user which method they prefer
@@ -229,6 +305,7 @@ def main():
     
     print("\n🎉 Installation completed!")
     print("\n📋 Available commands:")
+    print(f"• Daemon status: python3 wifictl.py status")
     print(f"• Manual run: python3 one_time_wifi_login.py")
     print(f"• Smart monitor: python3 smart_wifi_monitor.py")
     print(f"• Startup script: ./start_wifi_auto.sh")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Link Watcher - Wakes the monitors on Linux link/address changes
+Subscribes to rtnetlink link and IPv4 address events instead of polling
+"""
+
+import select
+import socket
+import struct
+import time
+import logging
+from collections import namedtuple
+
+# rtnetlink constants (linux/rtnetlink.h, linux/if_link.h, linux/if_addr.h)
+NETLINK_ROUTE = 0
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+
+NLMSG_NOOP = 1
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+
+IFLA_IFNAME = 3
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+IFA_LABEL = 3
+
+IFF_UP = 0x1
+IFF_RUNNING = 0x40
+
+NLMSGHDR = struct.Struct('=LHHLL')
+IFINFOMSG = struct.Struct('=BxHiII')
+IFADDRMSG = struct.Struct('=BBBBI')
+RTATTR = struct.Struct('=HH')
+
+LinkEvent = namedtuple('LinkEvent', ['kind', 'ifindex', 'ifname', 'is_up', 'address'])
+
+
+def _align(length):
+    return (length + 3) & ~3
+
+
+def _parse_attributes(data):
+    """Parse a run of rtattr TLVs into a {type: payload} dict"""
+    attrs = {}
+    offset = 0
+    while offset + RTATTR.size <= len(data):
+        length, attr_type = RTATTR.unpack_from(data, offset)
+        if length < RTATTR.size:
+            break
+        attrs[attr_type] = data[offset + RTATTR.size:offset + length]
+        offset += _align(length)
+    return attrs
+
+
+def _cstring(payload):
+    return payload.split(b'\0', 1)[0].decode(errors='replace') if payload else None
+
+
+def parse_messages(data):
+    """Turn a netlink datagram into a list of LinkEvent tuples"""
+    events = []
+    offset = 0
+    while offset + NLMSGHDR.size <= len(data):
+        length, msg_type, _flags, _seq, _pid = NLMSGHDR.unpack_from(data, offset)
+        if length < NLMSGHDR.size:
+            break
+        body = data[offset + NLMSGHDR.size:offset + length]
+        offset += _align(length)
+
+        if msg_type in (RTM_NEWLINK, RTM_DELLINK) and len(body) >= IFINFOMSG.size:
+            _family, _type, index, flags, _change = IFINFOMSG.unpack_from(body)
+            attrs = _parse_attributes(body[IFINFOMSG.size:])
+            is_up = bool(flags & IFF_UP) and bool(flags & IFF_RUNNING)
+            if msg_type == RTM_DELLINK:
+                kind = 'link_removed'
+            else:
+                kind = 'link_up' if is_up else 'link_down'
+            events.append(LinkEvent(kind, index, _cstring(attrs.get(IFLA_IFNAME)), is_up, None))
+
+        elif msg_type in (RTM_NEWADDR, RTM_DELADDR) and len(body) >= IFADDRMSG.size:
+            family, _prefix, _flags, _scope, index = IFADDRMSG.unpack_from(body)
+            attrs = _parse_attributes(body[IFADDRMSG.size:])
+            raw = attrs.get(IFA_LOCAL) or attrs.get(IFA_ADDRESS)
+            address = socket.inet_ntop(family, raw) if raw and family == socket.AF_INET else None
+            kind = 'addr_added' if msg_type == RTM_NEWADDR else 'addr_removed'
+            events.append(LinkEvent(kind, index, _cstring(attrs.get(IFA_LABEL)), None, address))
+
+        elif msg_type == NLMSG_DONE:
+            break
+    return events
+
+
+class LinkWatcher:
+    def __init__(self, sock=None, ignore_interfaces=('lo',)):
+        """Open a netlink socket, or use a caller-supplied one (e.g. a fake for testing)"""
+        self.sock = sock
+        self.ignore_interfaces = set(ignore_interfaces)
+        self.listeners = []
+        self.events_seen = 0
+        self.events_suppressed = 0
+
+        # Last known state per ifindex, so repeated RTM_NEWLINKs (Wi-Fi scans,
+        # IFLA_WIRELESS notifications) that change nothing don't wake anyone
+        self.link_up = {}
+        self.addresses = {}
+
+        if self.sock is None and hasattr(socket, 'AF_NETLINK'):
+            try:
+                self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+                self.sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR))
+                logging.info("Link watcher subscribed to rtnetlink link/address events")
+            except OSError as e:
+                logging.warning(f"Netlink unavailable, falling back to polling: {e}")
+                self.sock = None
+
+        if self.sock is not None:
+            self.sock.setblocking(False)
+
+    @property
+    def available(self):
+        """True when link events are delivered by the kernel"""
+        return self.sock is not None
+
+    def add_listener(self, callback):
+        """Register a callable invoked with each LinkEvent"""
+        self.listeners.append(callback)
+
+    def _read_events(self):
+        events = []
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                # ENOBUFS: the kernel dropped events we never saw, so nothing we know can be trusted
+                logging.warning(f"Netlink receive failed ({e}), resyncing link state")
+                self.link_up.clear()
+                self.addresses.clear()
+                events.append(LinkEvent('changed', 0, None, None, None))
+                break
+            if not data:
+                break
+            events.extend(e for e in parse_messages(data)
+                          if e.ifname not in self.ignore_interfaces and self._changes_state(e))
+        return events
+
+    def _changes_state(self, event):
+        """Record the event; False when it repeats what we already know"""
+        index = event.ifindex
+        if event.kind == 'link_removed':
+            self.link_up.pop(index, None)
+            self.addresses.pop(index, None)
+            return True
+        if event.kind in ('link_up', 'link_down'):
+            changed = self.link_up.get(index) != event.is_up
+            self.link_up[index] = event.is_up
+        else:
+            known = self.addresses.setdefault(index, set())
+            if event.kind == 'addr_added':
+                changed = event.address not in known
+                known.add(event.address)
+            else:
+                # Always a change: the address may predate the watcher, so it need not be known
+                known.discard(event.address)
+                changed = True
+        if not changed:
+            self.events_suppressed += 1
+        return changed
+
+    def wait_for_change(self, timeout):
+        """Block until a link/address change or timeout; return the events seen
+
+        Without netlink this degrades to a plain sleep so callers keep their
+        old polling cadence.
+        """
+        if not self.available:
+            time.sleep(timeout)
+            return []
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            try:
+                readable, _, _ = select.select([self.sock], [], [], remaining)
+            except InterruptedError:
+                continue
+            if not readable:
+                return []
+            events = self.dispatch()
+            if events:
+                return events
+
+    def fileno(self):
+        """The netlink socket's descriptor, for select() or an event loop's add_reader()"""
+        return self.sock.fileno()
+
+    def dispatch(self):
+        """Read whatever is pending, notify listeners, and return the events (never blocks)"""
+        events = self._read_events()
+        self.notify(events)
+        return events
+
+    def notify(self, events):
+        """Hand events to the listeners (also used for events reported by dispatcher hooks)"""
+        self.events_seen += len(events)
+        for event in events:
+            logging.info(f"Link event: {event.kind} on {event.ifname or event.ifindex}")
+            for callback in self.listeners:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logging.error(f"Link listener error: {e}")
+
+    def close(self):
+        """Close the netlink socket"""
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
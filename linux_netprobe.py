@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Linux Network Probe - Subprocess-free association check from /proc and /sys
+Fingerprints the network by its default gateway and only shells out to
+iwgetid/iw when the SSID for a new fingerprint is needed
+"""
+
+import os
+import socket
+import struct
+import subprocess
+import logging
+from collections import namedtuple
+
+RTF_UP = 0x1
+RTF_GATEWAY = 0x2
+ATF_COM = 0x2  # ARP entry complete
+
+NetState = namedtuple('NetState', ['associated', 'interface', 'gateway_ip', 'gateway_mac', 'fingerprint'])
+
+
+class LinuxNetProbe:
+    def __init__(self, root='/', ssid_timeout=5):
+        """root lets the probe read a fake /proc and /sys tree"""
+        self.root = root
+        self.ssid_timeout = ssid_timeout
+        self.fingerprint = None
+        self.ssid = None
+
+    def _read(self, *parts):
+        try:
+            with open(os.path.join(self.root, *parts)) as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def wireless_interfaces(self):
+        """Interfaces the kernel reports as wireless"""
+        interfaces = set()
+        content = self._read('proc', 'net', 'wireless')
+        if content:
+            for line in content.splitlines()[2:]:
+                if ':' in line:
+                    interfaces.add(line.split(':', 1)[0].strip())
+
+        # cfg80211-only drivers may not show up in /proc/net/wireless
+        net_dir = os.path.join(self.root, 'sys', 'class', 'net')
+        try:
+            for name in os.listdir(net_dir):
+                if (os.path.exists(os.path.join(net_dir, name, 'wireless')) or
+                        os.path.exists(os.path.join(net_dir, name, 'phy80211'))):
+                    interfaces.add(name)
+        except OSError:
+            pass
+        return interfaces
+
+    def operstate(self, interface):
+        """Operational state of an interface ('up', 'down', 'dormant', ...)"""
+        content = self._read('sys', 'class', 'net', interface, 'operstate')
+        return content.strip() if content else None
+
+    def default_route(self):
+        """(interface, gateway_ip) of the IPv4 default route, or (None, None)"""
+        content = self._read('proc', 'net', 'route')
+        if not content:
+            return None, None
+        for line in content.splitlines()[1:]:
+            fields = line.split()
+            if len(fields) < 4 or fields[1] != '00000000':
+                continue
+            flags = int(fields[3], 16)
+            if flags & RTF_UP and flags & RTF_GATEWAY:
+                gateway = socket.inet_ntoa(struct.pack('<L', int(fields[2], 16)))
+                return fields[0], gateway
+        return None, None
+
+    def gateway_mac(self, gateway_ip, interface):
+        """MAC address of the gateway from the ARP table"""
+        content = self._read('proc', 'net', 'arp')
+        if not content:
+            return None
+        for line in content.splitlines()[1:]:
+            fields = line.split()
+            if len(fields) < 6:
+                continue
+            if fields[0] == gateway_ip and fields[5] == interface and int(fields[2], 16) & ATF_COM:
+                return fields[3].lower()
+        return None
+
+    def snapshot(self):
+        """Current association state, read straight from the kernel"""
+        interface, gateway_ip = self.default_route()
+        wireless = self.wireless_interfaces()
+        if interface in wireless and self.operstate(interface) in ('up', 'unknown'):
+            gateway_mac = self.gateway_mac(gateway_ip, interface)
+            fingerprint = f"{interface}/{gateway_ip}/{gateway_mac or '?'}"
+            return NetState(True, interface, gateway_ip, gateway_mac, fingerprint)
+
+        # No default route through Wi-Fi (wired default route, or none yet): an interface
+        # that is up is still associated, it just has no gateway to fingerprint by
+        for name in sorted(wireless):
+            if self.operstate(name) == 'up':
+                return NetState(True, name, None, None, f"{name}/-/-")
+        return NetState(False, interface, gateway_ip, None, None)
+
+    def query_ssid(self, interface):
+        """Ask iwgetid (or iw) for the SSID; this is the only subprocess we run"""
+        try:
+            result = subprocess.run(["iwgetid", "-r", interface],
+                                    capture_output=True, text=True, timeout=self.ssid_timeout)
+            if result.returncode == 0 and result.stdout.strip():
+                return result.stdout.strip()
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+        try:
+            result = subprocess.run(["iw", "dev", interface, "link"],
+                                    capture_output=True, text=True, timeout=self.ssid_timeout)
+            for line in result.stdout.split('\n'):
+                if line.strip().startswith('SSID:'):
+                    return line.split('SSID:', 1)[1].strip()
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        return None
+
+    def get_ssid(self):
+        """SSID of the current wireless network, or None when not associated
+
+        The SSID is looked up once per gateway fingerprint (a None answer
+        included); while the fingerprint is unchanged only /proc and /sys are read.
+        """
+        state = self.snapshot()
+        if not state.associated:
+            self.fingerprint = None
+            self.ssid = None
+            return None
+
+        if state.fingerprint != self.fingerprint:
+            self.ssid = self.query_ssid(state.interface)
+            self.fingerprint = state.fingerprint
+            logging.info(f"Network fingerprint {state.fingerprint} -> SSID {self.ssid}")
+        return self.ssid
+
+
+_default_probe = None
+
+
+def get_linux_probe():
+    """Shared probe instance so the SSID memo survives across callers"""
+    global _default_probe
+    if _default_probe is None:
+        _default_probe = LinuxNetProbe()
+    return _default_probe
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Login API - Run one login attempt inside the calling process
+The monitors call this instead of spawning a fresh Python interpreter (and
+paying for imports, config/dotenv parsing and log setup) on every attempt.
+A recorded login request is replayed first, then the browser engine runs;
+with isolated=True both happen in the long-lived browser worker
+"""
+
+import time
+import logging
+import importlib
+from collections import namedtuple
+from config import LOGIN_CONFIG
+from connectivity_oracle import get_shared_oracle
+from login_recorder import replay_recorded_login
+from browser_worker import request_login
+
+LoginResult = namedtuple('LoginResult', ['online', 'method', 'elapsed', 'error'])
+
+# Browser engines by name: (module, class); imported only when a browser login runs
+ENGINES = {
+    'form-filler': ('simple_form_filler', 'SimpleFormFiller'),
+    'one-time': ('one_time_wifi_login', 'OneTimeWiFiLogin')
+}
+
+
+def already_online():
+    """True when the connectivity oracle says no login is needed"""
+    try:
+        return get_shared_oracle().is_online()
+    except Exception:
+        return False
+
+
+def run_engine(engine):
+    """Fill and submit the portal form with a browser engine in this process"""
+    module_name, class_name = ENGINES[engine]
+    automation = getattr(importlib.import_module(module_name), class_name)()
+    try:
+        return automation.fill_login_form()
+    finally:
+        automation.cleanup()
+
+
+def login(engine=None, isolated=None):
+    """One login attempt without a new interpreter; returns a LoginResult"""
+    engine = engine or LOGIN_CONFIG['browser_engine']
+    isolated = LOGIN_CONFIG['isolated'] if isolated is None else isolated
+    oracle = get_shared_oracle()
+    started = time.time()
+    try:
+        if isolated:
+            # The worker replays a recorded login request itself before it touches the browser
+            result = request_login()
+            if result is not None:
+                # A job that timed out may still be submitting: never run a second login next to it
+                method = 'replay' if result.get('replayed') else 'worker'
+                return LoginResult(result.get('online', False), method, time.time() - started,
+                                   result.get('error'))
+            logging.warning("Browser worker unreachable; logging in in-process")
+
+        # A recorded login request needs no browser
+        if replay_recorded_login():
+            return LoginResult(True, 'replay', time.time() - started, None)
+
+        run_engine(engine)
+        oracle.invalidate()
+        return LoginResult(oracle.is_online(), engine, time.time() - started, None)
+    except Exception as e:
+        logging.error(f"Login with {engine} failed: {e}")
+        return LoginResult(False, engine, time.time() - started, str(e))
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Login Recorder - Capture the browser's login request once, replay it over HTTP
+After a successful browser login the Chrome performance log (CDP network
+events) is searched for the request that carried the credentials. Its URL,
+method, headers and body are stored as a recipe with placeholders for the
+credentials, and later logins replay the recipe through the shared HTTP
+client without starting Chrome. A recipe that stops working is dropped,
+so the browser path runs again only when the portal changes
+"""
+
+import os
+import re
+import json
+import time
+import threading
+import logging
+from urllib.parse import quote, quote_plus, unquote_plus, urlsplit, urlunsplit
+from config import WIFI_CONFIG, CREDENTIALS, BROWSER_CONFIG, CACHE_CONFIG
+from state_file import write_json
+from http_client import get_shared_session
+from connectivity_oracle import get_shared_oracle
+
+USERNAME_TOKEN = '__WIFI_USERNAME__'
+PASSWORD_TOKEN = '__WIFI_PASSWORD__'
+TIMESTAMP_TOKEN = '__TIMESTAMP_MS__'
+
+# Headers worth replaying; cookies, lengths and hop-by-hop headers are the client's business
+REPLAY_HEADERS = ('content-type', 'accept', 'origin', 'referer', 'x-requested-with')
+
+# Millisecond timestamps (cache busters like Sophos' a=...) must be fresh on replay
+TIMESTAMP_PATTERN = re.compile(r'(?<!\d)1\d{12}(?!\d)')
+
+
+def _encodings(value):
+    """Ways a credential can appear in a URL or form body, longest first"""
+    return sorted({value, quote(value, safe=''), quote_plus(value)}, key=len, reverse=True)
+
+
+def _template_value(value, username, password):
+    """Placeholder for one field value, or None if it is neither a credential nor a recent ms timestamp"""
+    if value == password:
+        return PASSWORD_TOKEN
+    if value == username:
+        return USERNAME_TOKEN
+    if TIMESTAMP_PATTERN.fullmatch(value) and abs(int(value) - time.time() * 1000) < 86400000:
+        return TIMESTAMP_TOKEN
+    return None
+
+
+def templatize_query(query, username, password):
+    """Swap matching field values of a urlencoded string for placeholders; other fields stay byte for byte"""
+    if not query:
+        return query
+    fields = []
+    for field in query.split('&'):
+        name, sep, value = field.partition('=')
+        token = _template_value(unquote_plus(value), username, password) if sep else None
+        fields.append(f"{name}={token}" if token else field)
+    return '&'.join(fields)
+
+
+def templatize_url(url, username, password):
+    """Placeholders in the URL's query values only; the path and host are left alone"""
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(query=templatize_query(parts.query, username, password)))
+
+
+def templatize_body(body, username, password, form_encoded):
+    """Placeholders in form-field values, or in the string values of a JSON body"""
+    if not body or form_encoded:
+        return templatize_query(body, username, password)
+    try:
+        document = json.loads(body)
+    except ValueError:
+        return body
+
+    def walk(node):
+        if isinstance(node, dict):
+            return {key: walk(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [walk(value) for value in node]
+        if isinstance(node, str):
+            return _template_value(node, username, password) or node
+        return node
+    return json.dumps(walk(document))
+
+
+def render(template, username, password, form_encoded=True):
+    """Fill a recorded template with credentials and a fresh timestamp"""
+    if not template:
+        return template
+    # Inside a JSON string, quotes and backslashes in a credential must be escaped
+    encode = quote_plus if form_encoded else (lambda v: json.dumps(v)[1:-1])
+    return (template.replace(PASSWORD_TOKEN, encode(password))
+                    .replace(USERNAME_TOKEN, encode(username))
+                    .replace(TIMESTAMP_TOKEN, str(int(time.time() * 1000))))
+
+
+def clear_network_log(driver):
+    """Drop buffered performance-log entries so a capture only sees this login"""
+    try:
+        driver.get_log('performance')
+    except Exception:
+        pass
+
+
+def _network_events(driver):
+    """CDP Network.* events from Chrome's performance log (clears the log)"""
+    events = []
+    for entry in driver.get_log('performance'):
+        try:
+            message = json.loads(entry['message'])['message']
+        except (KeyError, ValueError):
+            continue
+        if message.get('method', '').startswith('Network.'):
+            events.append(message)
+    return events
+
+
+def capture_login_request(driver, username, password):
+    """Find the request that carried the password and turn it into a recipe (or None)"""
+    events = _network_events(driver)
+    statuses = {e['params']['requestId']: e['params']['response']['status']
+                for e in events if e['method'] == 'Network.responseReceived'}
+
+    candidates = []
+    for event in events:
+        if event['method'] != 'Network.requestWillBeSent':
+            continue
+        request_id = event['params']['requestId']
+        request = event['params']['request']
+        body = request.get('postData')
+        if body is None and request.get('hasPostData'):
+            try:
+                body = driver.execute_cdp_cmd('Network.getRequestPostData', {'requestId': request_id})['postData']
+            except Exception:
+                body = None
+        carried = (body or '') + request['url']
+        if any(encoded in carried for encoded in _encodings(password)):
+            candidates.append((request, body, statuses.get(request_id)))
+
+    if not candidates:
+        logging.info("No login request found in the browser's network log")
+        return None
+
+    # The last credential-carrying request is the one that completed the login
+    request, body, status = candidates[-1]
+    headers = {k: v for k, v in request.get('headers', {}).items() if k.lower() in REPLAY_HEADERS}
+    form_encoded = 'urlencoded' in headers.get('Content-Type', headers.get('content-type', ''))
+    url = templatize_url(request['url'], username, password)
+    body = templatize_body(body, username, password, form_encoded)
+    if PASSWORD_TOKEN not in (body or '') + url:
+        # The password isn't a plain field value (multipart, scrambled...): nothing to replay with
+        logging.info("Login request carries the password outside a field value; not recording it")
+        return None
+    recipe = {
+        'url': url,
+        'method': request['method'],
+        'headers': headers,
+        'body': body,
+        'form_encoded': form_encoded,
+        'expected_status': status,
+        'recorded_at': time.time()
+    }
+    logging.info(f"Recorded login request: {recipe['method']} {recipe['url']} (status {status})")
+    return recipe
+
+
+def replay_recipe(session, recipe, username, password, timeout=15):
+    """Send a recorded login request; True when the portal answers like it did when recorded"""
+    form_encoded = recipe.get('form_encoded', True)
+    response = session.request(
+        recipe['method'],
+        render(recipe['url'], username, password),
+        data=render(recipe['body'], username, password, form_encoded),
+        headers=recipe['headers'],
+        timeout=timeout
+    )
+    logging.info(f"Replayed login request: {response.status_code}")
+    expected = recipe.get('expected_status')
+    return response.status_code == expected if expected else response.ok
+
+
+class RecipeStore:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_CONFIG['cache_dir'], 'login_recipes.json')
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.recipes = {}
+        self._refresh()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh(self):
+        """Re-read the file when another process (the daemon, the browser worker) has rewritten it"""
+        mtime = self._mtime()
+        if mtime == self.mtime:
+            return
+        try:
+            with open(self.path) as f:
+                self.recipes = json.load(f)
+        except (OSError, ValueError):
+            self.recipes = {}
+        self.mtime = mtime
+
+    def _save(self):
+        try:
+            write_json(self.path, self.recipes)
+            self.mtime = self._mtime()
+        except OSError as e:
+            logging.warning(f"Could not save login recipes: {e}")
+
+    def get(self, portal):
+        with self.lock:
+            self._refresh()
+            return self.recipes.get(portal)
+
+    def put(self, portal, recipe):
+        with self.lock:
+            self._refresh()
+            self.recipes[portal] = recipe
+            self._save()
+
+    def discard(self, portal):
+        with self.lock:
+            self._refresh()
+            if self.recipes.pop(portal, None) is not None:
+                self._save()
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_recipe_store():
+    """The process-wide recipe store"""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = RecipeStore()
+        return _shared_store
+
+
+def record_browser_login(driver, portal=None):
+    """Save the login request of a browser login that just succeeded; True if one was recorded"""
+    if not BROWSER_CONFIG['record_login']:
+        return False
+    try:
+        recipe = capture_login_request(driver, CREDENTIALS['username'], CREDENTIALS['password'])
+    except Exception as e:
+        logging.warning(f"Could not read the browser's network log: {e}")
+        return False
+    if recipe is None:
+        return False
+    get_recipe_store().put(portal or WIFI_CONFIG['login_url'], recipe)
+    return True
+
+
+def replay_recorded_login(portal=None):
+    """Log in by replaying the portal's recipe over HTTP; drops a recipe that no longer works"""
+    portal = portal or WIFI_CONFIG['login_url']
+    store = get_recipe_store()
+    recipe = store.get(portal)
+    if not recipe:
+        return False
+    try:
+        accepted = replay_recipe(get_shared_session(), recipe, CREDENTIALS['username'], CREDENTIALS['password'])
+    except Exception as e:
+        logging.warning(f"Replaying recorded login failed: {e}")
+        return False
+    oracle = get_shared_oracle()
+    oracle.invalidate()
+    if accepted and oracle.is_online():
+        logging.info("Logged in by replaying the recorded request (no browser)")
+        return True
+    logging.info("Recorded login no longer works; the browser will record a new one")
+    store.discard(portal)
+    return False
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Monitor Core - The monitoring loop as independent asyncio tasks
+Link watching, connectivity probing, login, heartbeats and status
+reporting each run as their own task; blocking work (subprocesses, HTTP,
+Selenium) runs on worker threads under a deadline, so a slow portal never
+delays noticing a link change or answering a status query
+"""
+
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import NETWORK_CONFIG
+from captive_probe import ONLINE
+from connectivity_oracle import get_shared_oracle
+from retry_scheduler import RetryScheduler, TIMEOUT, classify_state
+
+
+class MonitorCore:
+    def __init__(self, get_ssid, login, link_watcher=None, oracle=None, heartbeat=None,
+                 target_ssid=None, check_interval=None, failure_kind=None, retry=None):
+        self.get_ssid = get_ssid
+        self.login = login
+        # Optional callable naming why the last login failed (see retry_scheduler)
+        self.failure_kind = failure_kind
+        self.retry = retry or RetryScheduler()
+        self.link_watcher = link_watcher
+        self.oracle = oracle or get_shared_oracle()
+        self.heartbeat = heartbeat
+        self.target_ssid = target_ssid
+        self.check_interval = check_interval or NETWORK_CONFIG['check_interval']
+
+        # Logins run one at a time on their own thread, so an abandoned attempt can never
+        # overlap the next one. Heartbeats get a thread of their own: a keep-alive must not
+        # queue behind a long browser login, or the session lapses while we log in
+        self.login_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='login')
+        self.heartbeat_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='heartbeat')
+
+        self.status = {
+            'ssid': None,
+            'state': None,
+            'last_check': None,
+            'login_in_progress': False,
+            'last_login': None,
+            'last_login_ok': None,
+            'logins': 0,
+            'login_failures': 0,
+            'link_events': 0,
+            'deadline_misses': 0,
+            'paused': False
+        }
+        self.started = None
+        self.abandoned = None
+        self.forced = False  # a login was requested through the control API
+
+        # Created inside the running loop
+        self.changed = None
+        self.link_changed = None
+        self.login_needed = None
+        self.heartbeat_wake = None
+
+    @property
+    def link_events_available(self):
+        return self.link_watcher is not None and self.link_watcher.available
+
+    def snapshot(self):
+        """Status and metrics as a plain dict (cheap; never waits on the network)"""
+        status = dict(self.status)
+        status['uptime'] = time.time() - self.started if self.started else 0
+        status['connectivity'] = self.oracle.stats()
+        status['retry'] = self.retry.stats()
+        if self.heartbeat:
+            status['heartbeat'] = self.heartbeat.stats()
+        return status
+
+    def force_login(self):
+        """Log in now, skipping any backoff or pause; returns what happened to the request"""
+        if self.login_needed is None:
+            return 'not_running'
+        if self.status['login_in_progress']:
+            return 'in_progress'
+        self.forced = True
+        self.retry.reset()
+        self.login_needed.set()
+        # Cut a backoff wait short
+        self.link_changed.set()
+        return 'started'
+
+    def pause(self):
+        """Stop starting logins (probing and heartbeats continue)"""
+        self.status['paused'] = True
+
+    def resume(self):
+        """Start logging in again, after a fresh check"""
+        self.status['paused'] = False
+        if self.changed is not None:
+            self.changed.set()
+
+    def report_link_event(self, event):
+        """A link change reported from outside (NetworkManager dispatcher, ip monitor hook)"""
+        if self.link_watcher is not None:
+            self.link_watcher.notify([event])
+        else:
+            self.oracle.on_link_event(event)
+        if self.changed is not None:
+            self._on_link_events([event])
+
+    def _on_link_readable(self):
+        self._on_link_events(self.link_watcher.dispatch())
+
+    def _on_link_events(self, events):
+        if not events:
+            return
+        self.status['link_events'] += len(events)
+        self.retry.reset()
+        self.changed.set()
+        self.link_changed.set()
+        if self.heartbeat_wake:
+            self.heartbeat_wake.set()
+
+    async def _blocking(self, func, deadline, executor=None):
+        """Run a blocking call on a worker thread; None if it misses its deadline"""
+        future = asyncio.get_running_loop().run_in_executor(executor, func)
+        try:
+            return await asyncio.wait_for(future, deadline)
+        except asyncio.TimeoutError:
+            self.status['deadline_misses'] += 1
+            logging.warning(f"{getattr(func, '__name__', func)} missed its {deadline}s deadline")
+            return None
+
+    def _update(self, key, value):
+        changed = self.status[key] != value
+        self.status[key] = value
+        return changed
+
+    async def probe_task(self):
+        """Check SSID and connectivity; wake the login task when we're stuck behind the portal"""
+        while True:
+            self.changed.clear()
+            settled = True
+
+            ssid = await self._blocking(self.get_ssid, NETWORK_CONFIG['ssid_deadline'])
+            if self._update('ssid', ssid):
+                if ssid:
+                    logging.info(f"Connected to WiFi: {ssid}")
+                    print(f"📶 Connected to WiFi: {ssid}")
+                else:
+                    logging.info("Not connected to WiFi")
+                    print("📶 Not connected to WiFi")
+
+            state = None
+            if ssid and (not self.target_ssid or ssid == self.target_ssid):
+                state = await self._blocking(self.oracle.get_state, NETWORK_CONFIG['connectivity_deadline'])
+                if state != ONLINE:
+                    settled = False
+                    if not self.status['paused']:
+                        self.login_needed.set()
+            self.status['last_check'] = time.time()
+            if state == ONLINE:
+                self.retry.reset()
+            if self._update('state', state) and ssid:
+                if state == ONLINE:
+                    logging.info("Internet is accessible, no login needed")
+                    print("✅ Online")
+                else:
+                    logging.info(f"Internet not accessible ({state or 'no answer'}), login needed")
+                    print("🌐 Internet not accessible - login needed")
+
+            # Wait for a link change, or re-check soon while login is pending / without netlink
+            if settled and self.link_events_available:
+                timeout = NETWORK_CONFIG['link_event_timeout']
+            else:
+                timeout = self.check_interval
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def login_task(self):
+        """Run one login at a time whenever the probe task asks for it"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.login_needed.wait()
+            if self.status['paused'] and not self.forced:
+                self.login_needed.clear()
+                continue
+            if self.abandoned is not None:
+                # An abandoned attempt is still running; its outcome may already have fixed things
+                await asyncio.wait({self.abandoned})
+                self.abandoned = None
+                if not self.forced:
+                    # Let a fresh check decide; a forced login goes ahead regardless
+                    self.login_needed.clear()
+                self.changed.set()
+                continue
+            delay = self.retry.remaining()
+            if delay > 0:
+                # Backing off; a link change cuts the wait short
+                self.link_changed.clear()
+                try:
+                    await asyncio.wait_for(self.link_changed.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                if not self.forced:
+                    self.login_needed.clear()
+                    self.changed.set()
+                continue
+            self.link_changed.clear()
+            self.forced = False
+            self.status['login_in_progress'] = True
+            print("🔐 Attempting WiFi login...")
+
+            attempt = loop.run_in_executor(self.login_executor, self.login)
+            link_change = asyncio.ensure_future(self.link_changed.wait())
+            done, _ = await asyncio.wait({attempt, link_change}, timeout=NETWORK_CONFIG['login_deadline'],
+                                         return_when=asyncio.FIRST_COMPLETED)
+            link_change.cancel()
+
+            success = None
+            if attempt in done:
+                success = False
+                try:
+                    success = bool(attempt.result())
+                except Exception as e:
+                    logging.error(f"Login error: {e}")
+            elif link_change in done:
+                # The network under the attempt changed; let the probe task decide what's next
+                logging.info("Link changed during login, abandoning this attempt")
+                self.abandoned = attempt
+            else:
+                self.status['deadline_misses'] += 1
+                logging.warning(f"Login missed its {NETWORK_CONFIG['login_deadline']}s deadline")
+                self.abandoned = attempt
+                self.retry.record_failure(TIMEOUT)
+
+            self.status['login_in_progress'] = False
+            self.status['last_login'] = time.time()
+            self.status['last_login_ok'] = success
+            if success:
+                self.status['logins'] += 1
+                logging.info("🎉 Successfully logged in!")
+                print("✅ WiFi login successful!")
+                self.retry.record_success()
+                if self.heartbeat:
+                    self.heartbeat.mark_login()
+                    self.heartbeat_wake.set()
+                # Confirm right away instead of at the next scheduled check
+                self.changed.set()
+            elif success is False:
+                self.status['login_failures'] += 1
+                logging.warning("Login attempt failed")
+                print("❌ Login attempt failed")
+                kind = self.failure_kind() if self.failure_kind else None
+                if kind is None:
+                    # Let the connectivity check say why: still captive or portal unreachable
+                    state = await self._blocking(self.oracle.get_state, NETWORK_CONFIG['connectivity_deadline'])
+                    kind = classify_state(state)
+                if kind:
+                    delay = self.retry.record_failure(kind)
+                    print(f"⏳ Next login attempt in {delay:.0f}s ({kind})")
+
+            # Anything the probe task saw while we were busy is stale now
+            self.login_needed.clear()
+
+    async def heartbeat_task(self):
+        """Keep the portal session alive on the heartbeat's schedule"""
+        while True:
+            self.heartbeat_wake.clear()
+            delay = self.heartbeat.next_delay()
+            try:
+                await asyncio.wait_for(self.heartbeat_wake.wait(), delay)
+                continue  # rescheduled (login, link change)
+            except asyncio.TimeoutError:
+                pass
+            await self._blocking(self.heartbeat.beat, NETWORK_CONFIG['login_deadline'], self.heartbeat_executor)
+
+    async def status_task(self):
+        """Log status and metrics periodically"""
+        while True:
+            await asyncio.sleep(NETWORK_CONFIG['status_interval'])
+            logging.info(f"Monitor status: {self.snapshot()}")
+
+    async def run(self):
+        """Run all tasks until cancelled (Ctrl+C)"""
+        loop = asyncio.get_running_loop()
+        self.started = time.time()
+        self.changed = asyncio.Event()
+        self.link_changed = asyncio.Event()
+        self.login_needed = asyncio.Event()
+
+        tasks = [
+            asyncio.create_task(self.probe_task(), name='probe'),
+            asyncio.create_task(self.login_task(), name='login'),
+            asyncio.create_task(self.status_task(), name='status')
+        ]
+        if self.heartbeat:
+            self.heartbeat_wake = asyncio.Event()
+            tasks.append(asyncio.create_task(self.heartbeat_task(), name='heartbeat'))
+        if self.link_events_available:
+            loop.add_reader(self.link_watcher.fileno(), self._on_link_readable)
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            if self.link_events_available:
+                loop.remove_reader(self.link_watcher.fileno())
+            for task in tasks:
+                task.cancel()
+            self.login_executor.shutdown(wait=False, cancel_futures=True)
+            self.heartbeat_executor.shutdown(wait=False, cancel_futures=True)
+            logging.info(f"Monitor stopped: {self.snapshot()}")
@@ -7,17 +7,17 @@ import time
 import subprocess
 import platform
 import logging
-import pyautogui
 import sys
 import os
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from config import WIFI_CONFIG, CREDENTIALS, NETWORK_CONFIG
+from driver_cache import start_chrome
+from browser_profile import build_chrome_options, apply_profile
+from form_fill_js import fill_login_form, describe_field, press_enter
+from browser_waits import (wait_for_form, wait_for_login_outcome, page_text, page_reacted, STATUS_FAILURE,
+                           ONLINE)
+from login_recorder import clear_network_log, record_browser_login, replay_recorded_login
+from config import WIFI_CONFIG, CREDENTIALS, BROWSER_CONFIG, NETWORK_CONFIG
+from linux_netprobe import get_linux_probe
+from connectivity_oracle import get_shared_oracle
 
 # Set up logging
 logging.basicConfig(
@@ -30,38 +30,21 @@ logging.basicConfig(
 )
 
 class OneTimeWiFiLogin:
-    def __init__(self):
+    def __init__(self, headless=False):
         self.driver = None
-        self.setup_driver()
-        
-        # Configure pyautogui
-        pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.5
+        self.headless = headless  # True when driven by the browser worker
     
     def setup_driver(self):
         """Set up Chrome WebDriver with appropriate options"""
-        chrome_options = Options()
-        
-        # Run with browser window visible for debugging
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--ignore-ssl-errors')
-        chrome_options.add_argument('--disable-web-security')
-        chrome_options.add_argument('--allow-running-insecure-content')
-        chrome_options.add_argument('--window-size=800,600')
-        chrome_options.add_argument('--window-position=100,100')
+        # Run with browser window visible for debugging, unless a worker keeps it in the background
+        chrome_options = build_chrome_options(headless=self.headless, window_size=(800, 600))
+        if not self.headless:
+            chrome_options.add_argument('--window-position=100,100')
         
         try:
-            # Try to use system ChromeDriver first
-            try:
-                self.driver = webdriver.Chrome(options=chrome_options)
-                logging.info("Using system ChromeDriver")
-            except:
-                # Fallback to webdriver-manager
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                logging.info("Using webdriver-manager ChromeDriver")
+            # Driver path comes from the on-disk cache: no version lookup on the captive network
+            self.driver = start_chrome(chrome_options)
+            apply_profile(self.driver)
             
             self.driver.set_page_load_timeout(30)
             logging.info("WebDriver setup successful")
@@ -69,6 +52,12 @@ class OneTimeWiFiLogin:
             logging.error(f"Failed to setup WebDriver: {e}")
             raise
     
+    def ensure_driver(self):
+        """Start Chrome on first use; a replayed login never needs it"""
+        if self.driver is None:
+            self.setup_driver()
+        return self.driver
+    
     def get_current_wifi_ssid(self):
         """Get the current WiFi SSID"""
         system = platform.system()
@@ -103,9 +92,8 @@ class OneTimeWiFiLogin:
                         return line.split(':')[1].strip()
             
             elif system == "Linux":
-                cmd = ["iwgetid", "-r"]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                return result.stdout.strip()
+                # Reads /proc and /sys; only shells out when the network changes
+                return get_linux_probe().get_ssid()
                 
         except Exception as e:
             logging.error(f"Error getting WiFi SSID: {e}")
@@ -115,10 +103,8 @@ class OneTimeWiFiLogin:
     def check_if_already_logged_in(self):
         """Check if we're already logged in by testing internet connectivity"""
         try:
-            import requests
-            response = requests.get('http://www.google.com', timeout=5)
-            return response.status_code == 200
-        except:
+            return get_shared_oracle().is_online()
+        except Exception:
             return False
     
     def fill_login_form(self):
@@ -127,6 +113,14 @@ class OneTimeWiFiLogin:
             logging.info("Starting form filling process")
             print("🔐 Starting form filling process...")
             
+            # Selenium is imported only once the browser path is actually taken
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.webdriver.support import expected_conditions as EC
+            
+            self.ensure_driver()
+            clear_network_log(self.driver)
+            
             # Navigate to the login page
             self.driver.get(WIFI_CONFIG['login_url'])
             logging.info(f"Navigated to login page: {WIFI_CONFIG['login_url']}")
@@ -138,101 +132,47 @@ class OneTimeWiFiLogin:
             
             print("📄 Login page loaded successfully")
             
-            # Wait a moment for the page to fully load
-            time.sleep(2)
-            
-            # Try to find and fill username field
-            username_found = False
-            username_selectors = [
-                (By.NAME, "username"),
-                (By.ID, "username"),
-                (By.NAME, "user"),
-                (By.NAME, "login"),
-                (By.NAME, "roll"),
-                (By.NAME, "id"),
-                (By.XPATH, "//input[@type='text']")
-            ]
+            # Wait until the form is usable (no fixed delay)
+            wait_for_form(self.driver)
+            start_url = self.driver.current_url
+            baseline_text = page_text(self.driver)
             
-            for selector_type, selector in username_selectors:
-                try:
-                    username_field = self.driver.find_element(selector_type, selector)
-                    username_field.clear()
-                    username_field.send_keys(CREDENTIALS['username'])
-                    print("✅ Username field found and filled")
-                    username_found = True
-                    break
-                except:
-                    continue
+            # Find, fill and submit in one script call
+            report = fill_login_form(self.driver, CREDENTIALS['username'], CREDENTIALS['password'])
+            logging.info(f"Form fill: username {describe_field(report.username)}, "
+                         f"password {describe_field(report.password)}, submit {report.submit}")
             
-            if not username_found:
+            if not report.username:
                 print("❌ Could not find username field")
                 return False
+            print("✅ Username field found and filled")
             
-            # Try to find and fill password field
-            password_found = False
-            password_selectors = [
-                (By.NAME, "password"),
-                (By.ID, "password"),
-                (By.NAME, "pass"),
-                (By.NAME, "pwd"),
-                (By.NAME, "passwd"),
-                (By.XPATH, "//input[@type='password']")
-            ]
-            
-            for selector_type, selector in password_selectors:
-                try:
-                    password_field = self.driver.find_element(selector_type, selector)
-                    password_field.clear()
-                    password_field.send_keys(CREDENTIALS['password'])
-                    print("✅ Password field found and filled")
-                    password_found = True
-                    break
-                except:
-                    continue
-            
-            if not password_found:
+            if not report.password:
                 print("❌ Could not find password field")
                 return False
+            print("✅ Password field found and filled")
             
-            # Try to submit the form
-            print("🔄 Attempting to submit form...")
-            
-            # Method 1: Try to find and click submit button
-            submit_selectors = [
-                (By.CSS_SELECTOR, "input[type='submit']"),
-                (By.CSS_SELECTOR, "button[type='submit']"),
-                (By.XPATH, "//input[@type='submit']"),
-                (By.XPATH, "//button[@type='submit']"),
-                (By.XPATH, "//button"),
-                (By.CSS_SELECTOR, "button")
-            ]
+            # A synthetic Enter (no form, no button) may be ignored; a real key press isn't
+            submit_clicked = report.submit is not None and report.submit['method'] != 'enter_key'
+            if submit_clicked:
+                print(f"✅ Form submitted ({report.submit['method']})")
+            elif report.submit is not None and page_reacted(self.driver, start_url, baseline_text):
+                print("✅ Form submitted (enter_key)")
+                submit_clicked = True
             
-            submit_clicked = False
-            for selector_type, selector in submit_selectors:
-                try:
-                    submit_button = self.driver.find_element(selector_type, selector)
-                    submit_button.click()
-                    print("✅ Submit button clicked")
-                    submit_clicked = True
-                    break
-                except:
-                    continue
+            # Fallback: a WebDriver Enter on the password box (a real key event, works headless)
+            if not submit_clicked and press_enter(self.driver, report.password):
+                print("✅ Enter key pressed")
+                submit_clicked = True
             
-            # Method 2: If no submit button found, try pressing Enter
-            if not submit_clicked:
-                print("🔄 No submit button found, trying Enter key...")
-                try:
-                    # Focus on the password field and press Enter
-                    password_field.send_keys("\n")
-                    print("✅ Enter key pressed")
-                    submit_clicked = True
-                except:
-                    pass
-            
-            # Method 3: Use pyautogui to press Enter
-            if not submit_clicked:
+            # Fallback: use pyautogui to press Enter (needs a visible window)
+            if not submit_clicked and not self.headless:
                 print("🔄 Trying pyautogui Enter key...")
                 try:
+                    # pyautogui needs a display, so it is only loaded for this fallback
+                    import pyautogui
+                    pyautogui.FAILSAFE = True
+                    pyautogui.PAUSE = 0.5
                     time.sleep(1)
                     pyautogui.press('enter')
                     print("✅ PyAutoGUI Enter key pressed")
@@ -242,7 +182,13 @@ class OneTimeWiFiLogin:
             
             if submit_clicked:
                 print("✅ Form submitted successfully")
-                time.sleep(3)  # Wait for login to process
+                # Wait for the portal's answer: URL change, status text, network idle or online
+                outcome = wait_for_login_outcome(self.driver, start_url, baseline_text,
+                                                 oracle=get_shared_oracle())
+                if outcome == STATUS_FAILURE:
+                    print("❌ Portal rejected the login")
+                    return False
+                self.remember_login(outcome)
                 return True
             else:
                 print("❌ Could not submit form")
@@ -253,6 +199,18 @@ class OneTimeWiFiLogin:
             print(f"❌ Form filling error: {e}")
             return False
     
+    def remember_login(self, outcome):
+        """Record the login request once the portal has let us through"""
+        if not BROWSER_CONFIG['record_login']:
+            return
+        oracle = get_shared_oracle()
+        if outcome != ONLINE:
+            oracle.invalidate()
+            if not oracle.is_online():
+                return
+        if record_browser_login(self.driver):
+            print("📼 Login request recorded - the next login skips the browser")
+    
     def run_once_and_exit(self):
         """Run the automation once and exit completely"""
         logging.info("Starting one-time WiFi automation")
@@ -272,6 +230,11 @@ class OneTimeWiFiLogin:
                     print("🎉 Exiting...")
                     return True
                 
+                # A recorded login request replays over HTTP without starting Chrome
+                if replay_recorded_login():
+                    print("✅ Logged in by replaying the recorded login request")
+                    return True
+                
                 # Attempt form filling
                 print("🌐 Attempting to fill login form...")
                 if self.fill_login_form():
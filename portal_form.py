@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Portal Form - Extract the real login form from the portal page
+Finds the form action, method, credential field names and hidden inputs
+with the stdlib HTML parser, and caches the schema on disk keyed by
+portal URL and page hash
+"""
+
+import os
+import json
+import hashlib
+import logging
+from collections import namedtuple
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from config import CACHE_CONFIG
+from state_file import write_json
+from retry_scheduler import classify_exception
+
+PortalForm = namedtuple('PortalForm', ['action', 'method', 'username_field', 'password_field',
+                                       'hidden_fields', 'submit_field'])
+
+# Bumped when extraction changes, so schemas cached by an older parser are re-read
+SCHEMA_VERSION = 2
+
+USERNAME_HINTS = ('user', 'login', 'roll', 'id', 'name', 'email')
+TEXT_TYPES = ('text', 'email', 'tel', '')
+
+
+class LoginFormParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.forms = []
+        self.current = None
+        # Inputs outside any <form> (JS-driven portals) are collected here
+        self.loose = {'action': None, 'method': None, 'inputs': []}
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'form':
+            self.current = {'action': attrs.get('action'), 'method': attrs.get('method'), 'inputs': []}
+            self.forms.append(self.current)
+        elif tag in ('input', 'button'):
+            default_type = 'submit' if tag == 'button' else 'text'
+            field = {
+                # Browsers only submit inputs by name; an id-only input never reaches the portal
+                'name': attrs.get('name'),
+                'type': (attrs.get('type') or default_type).lower(),
+                'value': attrs.get('value') or ''
+            }
+            (self.current or self.loose)['inputs'].append(field)
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self.current = None
+
+
+def _pick_username(inputs, password_index):
+    candidates = [f for f in inputs[:password_index] if f['type'] in TEXT_TYPES and f['name']]
+    for field in candidates:
+        if any(hint in field['name'].lower() for hint in USERNAME_HINTS):
+            return field['name']
+    # Otherwise the text field closest to the password box
+    return candidates[-1]['name'] if candidates else None
+
+
+def extract_login_form(html, base_url):
+    """Return a PortalForm for the page's login form, or None if there isn't one"""
+    parser = LoginFormParser()
+    try:
+        parser.feed(html)
+    except Exception as e:
+        logging.warning(f"Could not parse portal page: {e}")
+        return None
+
+    for form in parser.forms + [parser.loose]:
+        inputs = form['inputs']
+        password_index = next((i for i, f in enumerate(inputs) if f['type'] == 'password' and f['name']), None)
+        if password_index is None:
+            continue
+        username_field = _pick_username(inputs, password_index)
+        if not username_field:
+            continue
+
+        hidden = {f['name']: f['value'] for f in inputs if f['type'] == 'hidden' and f['name']}
+        submit = next((f['name'] for f in inputs if f['type'] == 'submit' and f['name']), None)
+        return PortalForm(
+            action=urljoin(base_url, form['action'] or base_url),
+            # A form without a method would GET, but portals that omit it post from JS
+            method=(form['method'] or 'post').upper(),
+            username_field=username_field,
+            password_field=inputs[password_index]['name'],
+            hidden_fields=hidden,
+            submit_field=submit
+        )
+    return None
+
+
+def build_payload(form, username, password):
+    """Request body for a PortalForm: hidden inputs plus credentials"""
+    payload = dict(form.hidden_fields)
+    payload[form.username_field] = username
+    payload[form.password_field] = password
+    if form.submit_field:
+        payload.setdefault(form.submit_field, '')
+    return payload
+
+
+def submit_form(session, form, username, password, timeout=15):
+    """Send the login request described by a PortalForm"""
+    payload = build_payload(form, username, password)
+    if form.method == 'GET':
+        return session.get(form.action, params=payload, timeout=timeout)
+    return session.post(form.action, data=payload, timeout=timeout)
+
+
+def login_with_form(session, form_cache, oracle, url, html, username, password):
+    """Log in with the form schema read from the portal page (one request, one check)
+
+    Returns (online, failure kind or None); None as the kind means the portal
+    answered, or the page has no login form to use.
+    """
+    form = form_cache.lookup_or_extract(url, html)
+    if not form:
+        return False, None
+    try:
+        response = submit_form(session, form, username, password)
+        logging.info(f"Portal form response status: {response.status_code}")
+        if response.ok:
+            oracle.invalidate()
+        return oracle.is_online(), None
+    except Exception as e:
+        logging.error(f"Error submitting portal form: {e}")
+        return False, classify_exception(e)
+
+
+class FormSchemaCache:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_CONFIG['cache_dir'], 'form_cache.json')
+        self.entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        try:
+            write_json(self.path, self.entries)
+        except OSError as e:
+            logging.warning(f"Could not save form cache: {e}")
+
+    @staticmethod
+    def page_hash(html):
+        return hashlib.sha256(html.encode('utf-8', errors='replace')).hexdigest()
+
+    def get(self, url, html):
+        """Cached schema for this exact page, or None"""
+        entry = self.entries.get(url)
+        if entry and entry.get('version') == SCHEMA_VERSION and entry.get('page_hash') == self.page_hash(html):
+            return PortalForm(**entry['form'])
+        return None
+
+    def put(self, url, html, form):
+        """Remember the schema for this page (replaces any older page for the URL)"""
+        self.entries[url] = {'version': SCHEMA_VERSION, 'page_hash': self.page_hash(html), 'form': form._asdict()}
+        self._save()
+
+    def lookup_or_extract(self, url, html):
+        """Cached schema, or parse the page once and cache the result"""
+        form = self.get(url, html)
+        if form:
+            logging.info("Using cached portal form schema")
+            return form
+        form = extract_login_form(html, url)
+        if form:
+            logging.info(f"Extracted portal form: {form.method} {form.action} "
+                         f"({form.username_field}/{form.password_field})")
+            self.put(url, html, form)
+        return form
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Probe Cache - TTL cache for SSID/interface probe results
+Link-change events invalidate entries so a fresh probe runs right away
+"""
+
+import time
+import threading
+
+
+class ProbeCache:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.entries = {}  # key -> (value, expires_at)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key, probe):
+        """Return the cached value for key, calling probe() on a miss or expiry"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = probe()
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one entry, or everything when key is None"""
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+            self.invalidations += 1
+
+    def on_link_event(self, event):
+        """LinkWatcher listener: any link/address change invalidates all probes"""
+        self.invalidate()
+
+    def stats(self):
+        """Hit/miss counters for logging"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / total if total else 0.0
+            }
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Reachability - Tiered connectivity check, cheapest stages first
+TCP connect to the portal, a DNS hijack check and a TCP connect to external
+anchors (all started together) and, on the portal network, a verified TLS
+handshake with the anchors usually decide the state; HTTP probing only runs
+when they can't
+"""
+
+import ssl
+import time
+import errno
+import random
+import select
+import socket
+import ipaddress
+import logging
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from config import WIFI_CONFIG, NETWORK_CONFIG
+from captive_probe import MultiEndpointProbe, ONLINE, PORTAL_INTERCEPT, OFFLINE
+
+DNS_CLEAN = 'clean'
+DNS_HIJACKED = 'hijacked'
+DNS_FAILED = 'failed'
+
+TLS_OK = 'ok'
+TLS_UNTRUSTED = 'untrusted'  # something answered with a certificate that isn't the anchor's
+TLS_FAILED = 'failed'
+
+
+def tcp_connect_any(addresses, timeout):
+    """Non-blocking connect to every (ip, port) at once; True if any completes"""
+    pending = {}
+    try:
+        for host, port in addresses:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            err = sock.connect_ex((host, port))
+            if err == 0:
+                sock.close()
+                return True
+            if err in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+                pending[sock.fileno()] = sock
+            else:
+                sock.close()
+
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            _, writable, errored = select.select([], list(pending.values()), list(pending.values()), remaining)
+            for sock in set(writable) | set(errored):
+                if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                    return True
+                pending.pop(sock.fileno()).close()
+        return False
+    finally:
+        for sock in pending.values():
+            sock.close()
+
+
+def tls_handshake_any(addresses, timeout, context=None):
+    """Verified TLS handshake with each (ip, port) in turn: TLS_OK, TLS_UNTRUSTED or TLS_FAILED
+
+    Certificates are checked against the anchor's IP address, which a captive
+    portal answering outbound 443 on the anchor's behalf can't present.
+    """
+    context = context or ssl.create_default_context()
+    deadline = time.monotonic() + timeout
+    status = TLS_FAILED
+    for host, port in addresses:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            with socket.create_connection((host, port), timeout=remaining) as sock:
+                with context.wrap_socket(sock, server_hostname=host):
+                    return TLS_OK
+        except ssl.SSLCertVerificationError:
+            status = TLS_UNTRUSTED
+        except (OSError, ValueError):
+            pass
+    return status
+
+
+def _is_suspicious(address):
+    ip = ipaddress.ip_address(address)
+    return ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved or ip.is_unspecified
+
+
+class TieredReachabilityChecker:
+    def __init__(self, http_probe=None, portal_url=None, anchors=None, dns_host=None,
+                 tcp_timeout=None, dns_timeout=None, tls_timeout=None):
+        portal = urlparse(portal_url or WIFI_CONFIG['login_url'])
+        self.portal_address = (portal.hostname, portal.port or (443 if portal.scheme == 'https' else 80))
+        self.anchors = [tuple(a) for a in (anchors or NETWORK_CONFIG['anchor_hosts'])]
+        self.dns_host = dns_host or NETWORK_CONFIG['dns_check_host']
+        self.tcp_timeout = tcp_timeout or NETWORK_CONFIG['tcp_timeout']
+        self.dns_timeout = dns_timeout or NETWORK_CONFIG['dns_timeout']
+        self.tls_timeout = tls_timeout or NETWORK_CONFIG['tls_timeout']
+        self.http_probe = http_probe or MultiEndpointProbe()
+        self.resolver = ThreadPoolExecutor(max_workers=2, thread_name_prefix='dns')
+        # One worker each for the portal connect, the DNS check and the anchor connect
+        self.launcher = ThreadPoolExecutor(max_workers=3, thread_name_prefix='reach')
+
+        # Ordered stages: each returns a final state or None (inconclusive); the first
+        # three run concurrently from the start of the check and the stages collect them
+        self.stages = [
+            ('portal_tcp', self.stage_portal_tcp),
+            ('dns', self.stage_dns),
+            ('anchor_tcp', self.stage_anchor_tcp),
+            ('anchor_tls', self.stage_anchor_tls),
+            ('http', self.stage_http)
+        ]
+        self.last_timings = {}
+        self.last_stage = None
+        self.last_state = None
+        self.stage_decisions = {name: 0 for name, _ in self.stages}
+
+    def _resolve(self, name):
+        """Start getaddrinfo on the resolver threads; pass the future to _addresses"""
+        return self.resolver.submit(socket.getaddrinfo, name, 80, socket.AF_INET, socket.SOCK_STREAM)
+
+    def _addresses(self, future, deadline):
+        """IPv4 strings the lookup returned by the deadline, or None on failure"""
+        try:
+            infos = future.result(timeout=max(0, deadline - time.monotonic()))
+            return sorted({info[4][0] for info in infos})
+        except (OSError, FutureTimeout):
+            return None
+
+    def dns_status(self):
+        """DNS_CLEAN, DNS_HIJACKED (portal answering for the world) or DNS_FAILED"""
+        # A name that can't exist (RFC 6761 .invalid) must not resolve; both lookups share one deadline
+        bogus = self._resolve(f"wifi-check-{random.getrandbits(32):08x}.invalid")
+        real = self._resolve(self.dns_host)
+        deadline = time.monotonic() + self.dns_timeout
+        if self._addresses(bogus, deadline):
+            return DNS_HIJACKED
+
+        addresses = self._addresses(real, deadline)
+        if not addresses:
+            return DNS_FAILED
+        if any(_is_suspicious(a) or a == self.portal_address[0] for a in addresses):
+            return DNS_HIJACKED
+        return DNS_CLEAN
+
+    def _launch(self, context, started):
+        """Start the portal connect, the DNS check and the anchor connect at once
+
+        Each records when it finished, relative to the start of the check.
+        """
+        context['finished'] = {}
+
+        def timed(name, fn, *args):
+            def run():
+                try:
+                    return fn(*args)
+                finally:
+                    context['finished'][name] = time.monotonic() - started
+            return self.launcher.submit(run)
+
+        context['pending'] = {
+            'portal_tcp': timed('portal_tcp', tcp_connect_any, [self.portal_address], self.tcp_timeout),
+            'dns': timed('dns', self.dns_status),
+            'anchor_tcp': timed('anchor_tcp', tcp_connect_any, self.anchors, self.tcp_timeout)
+        }
+
+    def stage_portal_tcp(self, context):
+        context['portal_reachable'] = context['pending']['portal_tcp'].result()
+        return None
+
+    def stage_dns(self, context):
+        context['dns'] = context['pending']['dns'].result()
+        if context['dns'] == DNS_HIJACKED:
+            return PORTAL_INTERCEPT
+        return None
+
+    def stage_anchor_tcp(self, context):
+        anchor_ok = context['pending']['anchor_tcp'].result()
+        context['anchor_reachable'] = anchor_ok
+        # Captive portals (Sophos included) often answer outbound 80/443 themselves before
+        # login, so a completed connect only proves we're online off the portal network
+        if anchor_ok and context.get('dns') == DNS_CLEAN and not context.get('portal_reachable'):
+            return ONLINE
+        if not anchor_ok and not context.get('portal_reachable') and context.get('dns') == DNS_FAILED:
+            return OFFLINE
+        return None
+
+    def anchor_tls_status(self):
+        return tls_handshake_any([a for a in self.anchors if a[1] == 443], self.tls_timeout)
+
+    def stage_anchor_tls(self, context):
+        # On the portal network a bare connect proves nothing, but the portal can't
+        # complete a handshake with the anchor's own certificate
+        if not (context.get('portal_reachable') and context.get('anchor_reachable')
+                and context.get('dns') == DNS_CLEAN):
+            return None
+        context['anchor_tls'] = self.anchor_tls_status()
+        if context['anchor_tls'] == TLS_OK:
+            return ONLINE
+        if context['anchor_tls'] == TLS_UNTRUSTED:
+            return PORTAL_INTERCEPT
+        return None
+
+    def stage_http(self, context):
+        return self.http_probe.check()
+
+    def check(self):
+        """Run the stages in order until one decides
+
+        Timings are seconds from the start of the check until each stage finished.
+        """
+        context = {}
+        timings = {}
+        state = OFFLINE
+        decided_by = None
+        started = time.monotonic()
+        self._launch(context, started)
+        for name, stage in self.stages:
+            try:
+                result = stage(context)
+            except Exception as e:
+                logging.error(f"Reachability stage {name} failed: {e}")
+                result = None
+            timings[name] = context['finished'].get(name, time.monotonic() - started)
+            if result is not None:
+                state = result
+                decided_by = name
+                break
+
+        self.last_timings = timings
+        self.last_stage = decided_by
+        self.last_state = state
+        if decided_by:
+            self.stage_decisions[decided_by] += 1
+        logging.debug(f"Reachability: {state} decided by {decided_by} "
+                      f"({', '.join(f'{k}={v * 1000:.1f}ms' for k, v in timings.items())})")
+        return state
+
+    def is_online(self):
+        """Convenience wrapper for the old check_internet_connectivity contract"""
+        return self.check() == ONLINE
+
+    def stats(self):
+        """Stage timings of the last check and how often each stage decided"""
+        return {'last_stage': self.last_stage,
+                'timings': dict(self.last_timings),
+                'decisions': dict(self.stage_decisions),
+                'http_endpoints': self.http_probe.stats() if hasattr(self.http_probe, 'stats') else None}
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Retry Scheduler - Exponential backoff with jitter for login attempts
+How long to wait depends on why the last attempt failed: a portal that
+times out is backed off, a portal that answered but left us captive is
+retried quickly, and a link change starts over immediately
+"""
+
+import time
+import random
+import threading
+import logging
+from config import RETRY_CONFIG
+from captive_probe import ONLINE, needs_login
+
+TIMEOUT = 'timeout'  # portal unreachable or too slow to answer
+STILL_CAPTIVE = 'still_captive'  # portal answered, but we're still behind it
+REJECTED = 'rejected'  # portal refused the credentials (wrong password, quota, ...)
+ERROR = 'error'  # anything else
+
+
+def classify_exception(error):
+    """Failure kind for an exception raised during a login attempt"""
+    # requests' exceptions (timeouts, refused connections) are all OSErrors
+    if isinstance(error, OSError):
+        return TIMEOUT
+    return ERROR
+
+
+def classify_state(state):
+    """Failure kind for the connectivity state seen after a failed attempt"""
+    if state == ONLINE:
+        return None
+    if needs_login(state):
+        return STILL_CAPTIVE
+    return TIMEOUT
+
+
+class RetryScheduler:
+    def __init__(self, policies=None, jitter=None, success_holdoff=None):
+        self.policies = policies or RETRY_CONFIG['policies']
+        self.jitter = jitter if jitter is not None else RETRY_CONFIG['jitter']
+        self.success_holdoff = success_holdoff if success_holdoff is not None else RETRY_CONFIG['success_holdoff']
+        self.lock = threading.Lock()
+        self.failures = {}
+        self.next_attempt = 0
+        self.last_kind = None
+
+        # Counters
+        self.resets = 0
+        self.delays = []
+
+    def delay_for(self, kind, count):
+        """Backoff for the count-th consecutive failure of a kind: base * 2^(n-1), capped, jittered"""
+        base, cap = self.policies.get(kind, self.policies[ERROR])
+        delay = min(cap, base * 2 ** (count - 1))
+        # Spread retries so clients behind the same portal don't move in lockstep
+        return random.uniform(delay * (1 - self.jitter), delay)
+
+    def record_failure(self, kind):
+        """Schedule the next attempt after a failure; returns the delay in seconds"""
+        kind = kind or ERROR
+        with self.lock:
+            count = self.failures.get(kind, 0) + 1
+            self.failures[kind] = count
+            delay = self.delay_for(kind, count)
+            self.next_attempt = time.monotonic() + delay
+            self.last_kind = kind
+            self.delays = (self.delays + [delay])[-20:]
+        logging.info(f"Login failed ({kind}, {count} in a row), next attempt in {delay:.1f}s")
+        return delay
+
+    def record_success(self):
+        """A login went through: forget failures, but don't log in again straight away"""
+        with self.lock:
+            self.failures.clear()
+            self.last_kind = None
+            self.next_attempt = time.monotonic() + self.success_holdoff
+
+    def reset(self):
+        """Start over (link change, confirmed online): the next attempt may run immediately"""
+        with self.lock:
+            if self.failures or self.next_attempt:
+                self.resets += 1
+            self.failures.clear()
+            self.last_kind = None
+            self.next_attempt = 0
+
+    def on_link_event(self, event):
+        """LinkWatcher listener: a new network deserves a fresh attempt"""
+        self.reset()
+
+    def remaining(self):
+        """Seconds until the next attempt is allowed (0 when it may run now)"""
+        with self.lock:
+            return max(0.0, self.next_attempt - time.monotonic())
+
+    def ready(self):
+        return self.remaining() == 0
+
+    def stats(self):
+        """Failure counts per kind and recent delays"""
+        with self.lock:
+            return {'failures': dict(self.failures), 'last_kind': self.last_kind,
+                    'resets': self.resets, 'recent_delays': [round(d, 1) for d in self.delays]}
@@ -4,12 +4,24 @@ Simple WiFi Automation using requests
 This version avoids ChromeDriver issues by using direct HTTP requests
 """
 
-import time
-import requests
+import asyncio
 import subprocess
 import platform
 import logging
+from functools import partial
 from config import WIFI_CONFIG, CREDENTIALS, NETWORK_CONFIG
+from linux_netprobe import get_linux_probe
+from link_watcher import LinkWatcher
+from probe_cache import ProbeCache
+from connectivity_oracle import get_shared_oracle
+from http_client import get_shared_session
+from portal_form import FormSchemaCache, login_with_form
+from strategy_store import StrategyStore
+from sophos_portal import SophosPortalClient
+from heartbeat import portal_heartbeat
+from monitor_core import MonitorCore
+from wifictl import defer_to_daemon
+from retry_scheduler import classify_exception
 
 # Set up logging
 logging.basicConfig(
@@ -23,22 +35,34 @@ logging.basicConfig(
 
 class SimpleWiFiAutomation:
     def __init__(self):
-        self.session = requests.Session()
-        # Configure session to ignore SSL errors for captive portals
-        self.session.verify = False
-        import urllib3
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        # Shared pooled session (keep-alive, retries, SSL checks off for the portal)
+        self.session = get_shared_session()
+        self.oracle = get_shared_oracle()
+        self.form_cache = FormSchemaCache()
+        self.strategy_store = StrategyStore()
+        self.portal_client = SophosPortalClient(self.session)
+        self.login_page = None
+        self.last_failure = None  # why the last login failed (see retry_scheduler)
+        
+        # Reuse SSID probe results until they expire or the link changes
+        self.link_watcher = LinkWatcher()
+        self.probe_cache = ProbeCache(NETWORK_CONFIG['probe_cache_ttl'])
+        self.link_watcher.add_listener(self.probe_cache.on_link_event)
+        self.link_watcher.add_listener(self.oracle.on_link_event)
+        
+        # Keep the portal session alive (and refresh it before expiry) once logged in
+        self.heartbeat = portal_heartbeat(self.portal_client, lambda: self.try_portal_login()[0], self.link_watcher)
     
     def check_internet_connectivity(self):
         """Check if internet is accessible"""
-        try:
-            response = self.session.get('http://www.google.com', timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+        return self.oracle.is_online()
     
     def get_current_wifi_ssid(self):
-        """Get the current WiFi SSID"""
+        """Get the current WiFi SSID (cached)"""
+        return self.probe_cache.get('ssid', self.probe_wifi_ssid)
+    
+    def probe_wifi_ssid(self):
+        """Probe the OS for the current WiFi SSID"""
         system = platform.system()
         
         try:
@@ -57,150 +81,117 @@ class SimpleWiFiAutomation:
                         return line.split(':')[1].strip()
             
             elif system == "Linux":
-                cmd = ["iwgetid", "-r"]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                return result.stdout.strip()
+                # Reads /proc and /sys; only shells out when the network changes
+                return get_linux_probe().get_ssid()
                 
         except Exception as e:
             logging.error(f"Error getting WiFi SSID: {e}")
         
         return None
     
+    def get_login_page(self):
+        """Fetch the login page once per attempt (cookies + form schema)"""
+        if self.login_page is None:
+            self.login_page = self.session.get(WIFI_CONFIG['login_url'], timeout=10)
+            logging.info(f"Login page response status: {self.login_page.status_code}")
+        return self.login_page
+    
+    def try_portal_login(self):
+        """Log in through the portal's native login.xml endpoint; the reply is the verdict
+
+        Returns (online, failure kind or None) like every login strategy.
+        """
+        return self.portal_client.login_strategy(CREDENTIALS['username'], CREDENTIALS['password'], self.oracle)
+    
+    def try_extracted_form(self):
+        """Log in with the form schema read from the portal page (one POST, one check)"""
+        page = self.get_login_page()
+        return login_with_form(self.session, self.form_cache, self.oracle, WIFI_CONFIG['login_url'],
+                               page.text, CREDENTIALS['username'], CREDENTIALS['password'])
+    
+    def try_post(self, url, user_field, pass_field):
+        """POST the credentials under the given field names and check connectivity"""
+        self.get_login_page()
+        try:
+            login_data = {user_field: CREDENTIALS['username'], pass_field: CREDENTIALS['password']}
+            response = self.session.post(url, data=login_data, timeout=10)
+            logging.info(f"Login POST to {url} ({user_field}/{pass_field}) response: {response.status_code}")
+            if not response.ok:
+                return False, None
+            self.oracle.invalidate()
+            return self.check_internet_connectivity(), None
+        except Exception as e:
+            logging.error(f"Error during login POST to {url}: {e}")
+            return False, classify_exception(e)
+    
     def login_to_wifi(self):
         """Attempt to login using direct HTTP request"""
         try:
             logging.info("Attempting WiFi login via HTTP request")
+            self.last_failure = None
             
-            # First, try to access the login page to get any necessary cookies
-            try:
-                response = self.session.get(WIFI_CONFIG['login_url'], timeout=10)
-                logging.info(f"Login page response status: {response.status_code}")
-            except Exception as e:
-                logging.error(f"Error accessing login page: {e}")
-                return False
+            # The login page (cookies, form schema) is fetched lazily by strategies that need it
+            self.login_page = None
             
-            # Prepare login data
-            login_data = {
-                WIFI_CONFIG['username_field']: CREDENTIALS['username'],
-                WIFI_CONFIG['password_field']: CREDENTIALS['password']
-            }
+            login_url = WIFI_CONFIG['login_url']
+            default_fields = (WIFI_CONFIG['username_field'], WIFI_CONFIG['password_field'])
             
-            # Try to submit the login form
-            try:
-                # Try POST to the same URL
-                response = self.session.post(WIFI_CONFIG['login_url'], data=login_data, timeout=10)
-                logging.info(f"Login POST response status: {response.status_code}")
-                
-                # Check if login was successful
-                if response.status_code == 200:
-                    # Try to access a test URL to see if we're authenticated
-                    test_response = self.session.get('http://www.google.com', timeout=5)
-                    if test_response.status_code == 200:
-                        logging.info("Login appears successful!")
-                        return True
-                
-            except Exception as e:
-                logging.error(f"Error during login POST: {e}")
-            
-            # If direct POST didn't work, try alternative approaches
-            logging.info("Trying alternative login methods...")
+            # The portal's own protocol, the form it actually serves, then a direct POST to the same URL
+            strategies = []
+            if WIFI_CONFIG['portal_type'] == 'sophos':
+                strategies.append(('sophos:login.xml', self.try_portal_login))
+            strategies += [
+                ('http:form', self.try_extracted_form),
+                (f"http:post:{login_url}", partial(self.try_post, login_url, *default_fields))
+            ]
             
-            # Method 1: Try with different form action
-            try:
-                # Some captive portals use different endpoints
-                alternative_urls = [
-                    WIFI_CONFIG['login_url'].replace('/httpclient.html', '/login.html'),
-                    WIFI_CONFIG['login_url'].replace('/httpclient.html', '/'),
-                    WIFI_CONFIG['login_url'].replace('/httpclient.html', '/login')
-                ]
-                
-                for alt_url in alternative_urls:
-                    try:
-                        response = self.session.post(alt_url, data=login_data, timeout=10)
-                        logging.info(f"Alternative URL {alt_url} response: {response.status_code}")
-                        
-                        # Test connectivity
-                        if self.check_internet_connectivity():
-                            logging.info(f"Login successful via {alt_url}")
-                            return True
-                    except:
-                        continue
-                        
-            except Exception as e:
-                logging.error(f"Error with alternative URLs: {e}")
+            # Some captive portals use different endpoints
+            alternative_urls = [
+                login_url.replace('/httpclient.html', '/login.html'),
+                login_url.replace('/httpclient.html', '/'),
+                login_url.replace('/httpclient.html', '/login')
+            ]
+            for alt_url in alternative_urls:
+                strategies.append((f"http:post:{alt_url}", partial(self.try_post, alt_url, *default_fields)))
             
-            # Method 2: Try with different field names
+            # Different field names
             alternative_field_names = [
                 {'username': 'user', 'password': 'pass'},
                 {'username': 'login', 'password': 'password'},
                 {'username': 'roll', 'password': 'pwd'},
                 {'username': 'id', 'password': 'passwd'}
             ]
-            
             for field_mapping in alternative_field_names:
-                try:
-                    alt_login_data = {
-                        field_mapping['username']: CREDENTIALS['username'],
-                        field_mapping['password']: CREDENTIALS['password']
-                    }
-                    
-                    response = self.session.post(WIFI_CONFIG['login_url'], data=alt_login_data, timeout=10)
-                    logging.info(f"Alternative field names response: {response.status_code}")
-                    
-                    if self.check_internet_connectivity():
-                        logging.info("Login successful with alternative field names")
-                        return True
-                        
-                except Exception as e:
-                    logging.error(f"Error with alternative field names: {e}")
-                    continue
+                strategies.append((f"http:post:{field_mapping['username']}/{field_mapping['password']}",
+                                   partial(self.try_post, login_url,
+                                           field_mapping['username'], field_mapping['password'])))
             
-            logging.warning("All login methods failed")
-            return False
+            # Known-good strategy for this portal goes first; each one returns (online, failure kind)
+            success, self.last_failure = self.strategy_store.run(login_url, strategies)
+            return success
                 
         except Exception as e:
             logging.error(f"Error during WiFi login: {e}")
+            self.last_failure = classify_exception(e)
             return False
     
     def run_automation(self):
         """Main automation loop"""
         logging.info("Starting Simple WiFi automation service")
         
-        while True:
-            try:
-                current_ssid = self.get_current_wifi_ssid()
-                
-                # Check if we're connected to the target network
-                if current_ssid and (not NETWORK_CONFIG['target_ssid'] or current_ssid == NETWORK_CONFIG['target_ssid']):
-                    logging.info(f"Connected to WiFi: {current_ssid}")
-                    
-                    # Check if internet is accessible
-                    if not self.check_internet_connectivity():
-                        logging.info("Internet not accessible, captive portal may be active")
-                        
-                        # Try to login
-                        if self.login_to_wifi():
-                            logging.info("Successfully logged in to WiFi")
-                        else:
-                            logging.warning("Failed to login to WiFi")
-                    else:
-                        logging.info("Internet is accessible, no login needed")
-                else:
-                    logging.info(f"Not connected to target WiFi network. Current: {current_ssid}")
-                
-                # Wait before next check
-                time.sleep(NETWORK_CONFIG['check_interval'])
-                
-            except KeyboardInterrupt:
-                logging.info("Automation stopped by user")
-                break
-            except Exception as e:
-                logging.error(f"Error in automation loop: {e}")
-                time.sleep(NETWORK_CONFIG['check_interval'])
+        core = MonitorCore(self.get_current_wifi_ssid, self.login_to_wifi,
+                           link_watcher=self.link_watcher, oracle=self.oracle,
+                           heartbeat=self.heartbeat, target_ssid=NETWORK_CONFIG['target_ssid'],
+                           failure_kind=lambda: self.last_failure)
+        try:
+            asyncio.run(core.run())
+        except KeyboardInterrupt:
+            logging.info(f"Automation stopped by user (probe cache: {self.probe_cache.stats()})")
 
 if __name__ == "__main__":
-    automation = SimpleWiFiAutomation()
-    try:
-        automation.run_automation()
-    except KeyboardInterrupt:
-        logging.info("Automation stopped by user") 
\ No newline at end of file
+    if not defer_to_daemon():
+        automation = SimpleWiFiAutomation()
+        try:
+            automation.run_automation()
+        except KeyboardInterrupt:
+            logging.info("Automation stopped by user") 
\ No newline at end of file
@@ -3,12 +3,15 @@
 Smart WiFi Monitor - Only runs automation when needed
 """
 
-import time
+import asyncio
 import subprocess
 import platform
 import logging
-import os
-import sys
+import login_api
+from link_watcher import LinkWatcher
+from connectivity_oracle import get_shared_oracle
+from monitor_core import MonitorCore
+from wifictl import defer_to_daemon
 
 # Set up logging
 logging.basicConfig(
@@ -32,38 +35,22 @@ def check_gvph_wifi():
 def check_internet_connectivity():
     """Check if internet is accessible (already logged in)"""
     try:
-        import requests
-        response = requests.get('http://www.google.com', timeout=5)
-        return response.status_code == 200
-    except:
+        return get_shared_oracle().is_online()
+    except Exception:
         return False
 
 def run_automation():
-    """Run the WiFi automation"""
-    try:
-        current_dir = os.getcwd()
-        script_path = os.path.join(current_dir, "simple_form_filler.py")
-        python_path = sys.executable
-        
-        result = subprocess.run([python_path, script_path], 
-                             cwd=current_dir, 
-                             timeout=60,
-                             capture_output=True,
-                             text=True)
-        
-        if result.returncode == 0:
-            print("✅ Automation completed successfully")
-            return True
-        else:
-            print(f"❌ Automation failed: {result.stderr}")
-            return False
-            
-    except subprocess.TimeoutExpired:
-        print("⏰ Automation timed out")
-        return False
-    except Exception as e:
-        print(f"❌ Automation error: {e}")
-        return False
+    """Run the WiFi automation in this process (no interpreter per attempt)"""
+    result = login_api.login()
+    if result.online:
+        print(f"✅ Automation completed successfully ({result.method}, {result.elapsed:.1f}s)")
+        return True
+    print(f"❌ Automation failed: {result.error or 'still not online'}")
+    return False
+
+def gvph_ssid():
+    """SSID probe for the monitor core: 'GVPH' when connected to it, else None"""
+    return "GVPH" if check_gvph_wifi() else None
 
 def main():
     """Main monitoring function"""
@@ -72,47 +59,25 @@ def main():
     print("💡 Only runs automation when login is needed")
     print("⏹️  Press Ctrl+C to stop\n")
     
-    last_run_time = 0
-    cooldown_period = 300  # 5 minutes between runs
+    if defer_to_daemon():
+        return
+    
+    poll_interval = 30  # seconds between checks without link events
+    link_watcher = LinkWatcher()
+    link_watcher.add_listener(get_shared_oracle().on_link_event)
     
-    while True:
-        try:
-            current_time = time.time()
-            
-            # Check if connected to GVPH WiFi
-            if check_gvph_wifi():
-                print("📶 GVPH WiFi detected")
-                
-                # Check if already logged in
-                if check_internet_connectivity():
-                    print("✅ Already logged in - no action needed")
-                else:
-                    print("🌐 Internet not accessible - login needed")
-                    
-                    # Check cooldown to prevent spam
-                    if current_time - last_run_time > cooldown_period:
-                        print("🔄 Starting WiFi automation...")
-                        if run_automation():
-                            last_run_time = current_time
-                            print("✅ Automation completed successfully")
-                        else:
-                            print("❌ Automation failed")
-                    else:
-                        remaining = int(cooldown_period - (current_time - last_run_time))
-                        print(f"⏳ Cooldown active - {remaining} seconds remaining")
-            else:
-                print("📶 Not connected to GVPH WiFi")
-            
-            # Wait before next check
-            time.sleep(30)  # Check every 30 seconds
-            
-        except KeyboardInterrupt:
-            print("\n🛑 Smart WiFi Monitor stopped")
-            break
-        except Exception as e:
-            logging.error(f"Error in monitor: {e}")
-            print(f"❌ Monitor error: {e}")
-            time.sleep(30)
+    def login():
+        """Run the automation; retries are paced by the core's backoff scheduler"""
+        print("🔄 Starting WiFi automation...")
+        return run_automation()
+    
+    # Only logs in while the connectivity check says we're not online; failures back off
+    # exponentially (fast while still captive, slow when the portal times out)
+    core = MonitorCore(gvph_ssid, login, link_watcher=link_watcher, check_interval=poll_interval)
+    try:
+        asyncio.run(core.run())
+    except KeyboardInterrupt:
+        print("\n🛑 Smart WiFi Monitor stopped")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
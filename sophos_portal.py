@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Sophos Portal - Native driver for the Sophos/Cyberoam captive portal
+httpclient.html posts to login.xml and gets a short XML status back, so
+a login is one small HTTP exchange and the reply says whether it worked
+"""
+
+import time
+import logging
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from urllib.parse import urlparse
+from config import WIFI_CONFIG
+from http_client import get_shared_session
+from retry_scheduler import TIMEOUT
+
+MODE_LOGIN = '191'
+MODE_KEEPALIVE = '192'
+MODE_LOGOUT = '193'
+
+LOGIN_SUCCESS = 'success'
+WRONG_CREDENTIALS = 'wrong_credentials'
+MAX_LOGIN_LIMIT = 'max_login_limit'
+DATA_LIMIT = 'data_limit'
+UNKNOWN = 'unknown'
+NO_RESPONSE = 'no_response'  # the request itself failed (timeout, refused, ...)
+
+# Outcomes no amount of retrying with other field names will fix
+FATAL_OUTCOMES = (WRONG_CREDENTIALS, MAX_LOGIN_LIMIT, DATA_LIMIT)
+
+LoginResult = namedtuple('LoginResult', ['outcome', 'message'])
+
+
+class PortalRejected(Exception):
+    def __init__(self, result):
+        super().__init__(result.message)
+        self.result = result
+
+
+def _timestamp():
+    return str(int(time.time() * 1000))
+
+
+def classify_message(status, message):
+    """Map the portal's status/message pair to an outcome"""
+    text = (message or '').lower()
+    if (status or '').upper() == 'LIVE' or 'signed in' in text or 'logged in' in text:
+        return LOGIN_SUCCESS
+    if 'maximum login limit' in text or 'max login' in text:
+        return MAX_LOGIN_LIMIT
+    if 'data transfer' in text or 'data limit' in text or 'exceeded' in text:
+        return DATA_LIMIT
+    if 'invalid user name' in text or 'invalid username' in text or 'login failed' in text:
+        return WRONG_CREDENTIALS
+    return UNKNOWN
+
+
+def parse_login_response(text):
+    """Parse a login.xml <requestresponse> document into a LoginResult"""
+    try:
+        root = ET.fromstring(text.strip())
+    except ET.ParseError:
+        return LoginResult(UNKNOWN, 'unparseable portal response')
+    status = (root.findtext('status') or '').strip()
+    message = (root.findtext('message') or '').strip()
+    return LoginResult(classify_message(status, message), message or status)
+
+
+class SophosPortalClient:
+    def __init__(self, session=None, login_url=None, timeout=10):
+        parsed = urlparse(login_url or WIFI_CONFIG['login_url'])
+        self.base_url = f"{parsed.scheme}://{parsed.netloc}"
+        self.session = session or get_shared_session()
+        self.timeout = timeout
+
+    def login(self, username, password):
+        """Log in via login.xml and report the portal's verdict"""
+        data = {
+            'mode': MODE_LOGIN,
+            'username': username,
+            'password': password,
+            'a': _timestamp(),
+            'producttype': '0'
+        }
+        try:
+            response = self.session.post(f"{self.base_url}/login.xml", data=data, timeout=self.timeout)
+        except Exception as e:
+            logging.error(f"Portal login request failed: {e}")
+            return LoginResult(NO_RESPONSE, str(e))
+        if not response.ok:
+            return LoginResult(UNKNOWN, f"HTTP {response.status_code}")
+        return parse_login_response(response.text)
+
+    def login_strategy(self, username, password, oracle):
+        """login() as a login strategy: (online, failure kind or None), PortalRejected when retrying won't help"""
+        result = self.login(username, password)
+        logging.info(f"Portal login.xml: {result.outcome} ({result.message})")
+        if result.outcome == LOGIN_SUCCESS:
+            oracle.invalidate()
+            return True, None
+        if result.outcome in FATAL_OUTCOMES:
+            raise PortalRejected(result)
+        return False, TIMEOUT if result.outcome == NO_RESPONSE else None
+
+    def keepalive(self, username):
+        """Ping the portal's live endpoint; True while the session is still valid"""
+        params = {'mode': MODE_KEEPALIVE, 'username': username, 'a': _timestamp(), 'producttype': '0'}
+        response = self.session.get(f"{self.base_url}/live", params=params, timeout=self.timeout)
+        if not response.ok:
+            return False
+        try:
+            root = ET.fromstring(response.text.strip())
+        except ET.ParseError:
+            return False
+        # <live><ack>ack</ack></live>; anything else (e.g. login_again) means expired
+        ack = root.text if root.tag == 'ack' else root.findtext('ack')
+        return (ack or '').strip().lower() == 'ack'
+
+    def logout(self, username):
+        """End the portal session"""
+        data = {'mode': MODE_LOGOUT, 'username': username, 'a': _timestamp(), 'producttype': '0'}
+        try:
+            response = self.session.post(f"{self.base_url}/logout.xml", data=data, timeout=self.timeout)
+            return parse_login_response(response.text)
+        except Exception as e:
+            logging.error(f"Portal logout request failed: {e}")
+            return LoginResult(NO_RESPONSE, str(e))
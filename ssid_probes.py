@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+SSID Probes - Run SSID probe backends concurrently, first answer wins
+Slow backends are started later (hedged) based on their recorded latency
+"""
+
+import os
+import time
+import queue
+import signal
+import platform
+import threading
+import subprocess
+import logging
+
+DEFAULT_SSID = 'GVPH'
+
+
+class CommandProbe:
+    def __init__(self, name, cmd, parse, timeout=5, authoritative=True):
+        """A probe backend: run cmd, turn its stdout into an SSID (or None) with parse"""
+        self.name = name
+        self.cmd = cmd
+        self.parse = parse
+        self.timeout = timeout
+        self.authoritative = authoritative
+
+    def spawn(self):
+        """Start the probe process (in its own process group so it can be killed whole)"""
+        return subprocess.Popen(self.cmd, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True,
+                                start_new_session=(os.name == 'posix'))
+
+
+def _kill(proc):
+    """Kill a probe process and anything it spawned"""
+    try:
+        if os.name == 'posix':
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass
+
+
+class ProbeFanout:
+    def __init__(self, backends, hedge_delay=0.1, alpha=0.3):
+        self.backends = list(backends)
+        self.hedge_delay = hedge_delay
+        self.alpha = alpha
+        self.latency = {}  # backend name -> EWMA seconds
+        self.wins = {}
+        self.lock = threading.Lock()
+
+    def record_latency(self, name, elapsed):
+        """Fold one observation into the backend's moving average"""
+        with self.lock:
+            previous = self.latency.get(name)
+            if previous is None:
+                self.latency[name] = elapsed
+            else:
+                self.latency[name] = self.alpha * elapsed + (1 - self.alpha) * previous
+
+    def ordered_backends(self):
+        """Fastest known backends first; an unmeasured one ranks as if it took its full timeout"""
+        with self.lock:
+            return sorted(self.backends, key=lambda b: self.latency.get(b.name, b.timeout))
+
+    def _run_backend(self, index, backend, done, procs, results):
+        # Hedge: later backends only start if nobody has answered yet
+        if index and done.wait(index * self.hedge_delay):
+            results.put((backend, None))
+            return
+
+        start = time.monotonic()
+        try:
+            with self.lock:
+                if done.is_set():
+                    results.put((backend, None))
+                    return
+                proc = backend.spawn()
+                procs.append(proc)
+        except OSError as e:
+            logging.debug(f"Probe {backend.name} unavailable: {e}")
+            self.record_latency(backend.name, backend.timeout)
+            results.put((backend, None))
+            return
+
+        value = None
+        try:
+            output, _ = proc.communicate(timeout=backend.timeout)
+            if done.is_set() and proc.returncode is not None and proc.returncode < 0:
+                # Killed because another backend won: we only know it was slower than
+                # the winner, so charge the elapsed time plus one hedge step
+                self.record_latency(backend.name, time.monotonic() - start + self.hedge_delay)
+                results.put((backend, None))
+                return
+            if proc.returncode == 0:
+                value = backend.parse(output)
+            # Rank by time to an answer: a clean exit is one even when it says "not connected",
+            # but a backend that fails fast is as useless as a slow one
+            self.record_latency(backend.name, time.monotonic() - start if proc.returncode == 0 else backend.timeout)
+        except subprocess.TimeoutExpired:
+            _kill(proc)
+            proc.communicate()
+            self.record_latency(backend.name, backend.timeout)
+        except Exception as e:
+            logging.debug(f"Probe {backend.name} failed: {e}")
+            self.record_latency(backend.name, backend.timeout)
+        results.put((backend, value))
+
+    def run(self):
+        """Run all backends, return the first authoritative answer
+
+        Non-authoritative answers are only used when no authoritative backend
+        produced one. Remaining probe processes are killed once we have a winner.
+        """
+        ordered = self.ordered_backends()
+        if not ordered:
+            return None
+
+        done = threading.Event()
+        procs = []
+        results = queue.Queue()
+        for index, backend in enumerate(ordered):
+            threading.Thread(target=self._run_backend,
+                             args=(index, backend, done, procs, results),
+                             daemon=True).start()
+
+        deadline = time.monotonic() + max(b.timeout for b in ordered) + len(ordered) * self.hedge_delay
+        winner = None
+        fallback = None
+        pending = len(ordered)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                backend, value = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending -= 1
+            if value is None:
+                continue
+            if backend.authoritative:
+                winner = (backend, value)
+                break
+            if fallback is None:
+                fallback = (backend, value)
+
+        with self.lock:
+            done.set()
+            for proc in procs:
+                if proc.poll() is None:
+                    _kill(proc)
+
+        chosen = winner or fallback
+        if chosen is None:
+            return None
+        backend, value = chosen
+        with self.lock:
+            self.wins[backend.name] = self.wins.get(backend.name, 0) + 1
+        logging.debug(f"SSID probe answered by {backend.name}")
+        return value
+
+    def stats(self):
+        """Per-backend latency (EWMA seconds) and win counts"""
+        with self.lock:
+            return {b.name: {'latency': self.latency.get(b.name), 'wins': self.wins.get(b.name, 0)}
+                    for b in self.backends}
+
+
+def _parse_system_profiler(output):
+    return DEFAULT_SSID if f"{DEFAULT_SSID}:" in output else None
+
+
+def _parse_networksetup(output):
+    return DEFAULT_SSID if DEFAULT_SSID in output else None
+
+
+def _parse_ifconfig(output):
+    # An address on en0 means we are probably on the hostel WiFi
+    return DEFAULT_SSID if "inet " in output else None
+
+
+def _parse_netsh(output):
+    for line in output.split('\n'):
+        if 'SSID' in line and 'BSSID' not in line:
+            return line.split(':')[1].strip()
+    return None
+
+
+def _parse_iwgetid(output):
+    return output.strip() or None
+
+
+def default_ssid_backends(system=None):
+    """Probe backends for this platform"""
+    system = system or platform.system()
+    if system == "Darwin":  # macOS
+        return [
+            CommandProbe('system_profiler', ["system_profiler", "SPAirPortDataType"],
+                         _parse_system_profiler, timeout=10),
+            CommandProbe('networksetup', ["networksetup", "-getairportnetwork", "en0"],
+                         _parse_networksetup, timeout=5),
+            CommandProbe('ifconfig', ["ifconfig", "en0"],
+                         _parse_ifconfig, timeout=5, authoritative=False)
+        ]
+    elif system == "Windows":
+        return [CommandProbe('netsh', ["netsh", "wlan", "show", "interfaces"], _parse_netsh, timeout=10)]
+    elif system == "Linux":
+        return [CommandProbe('iwgetid', ["iwgetid", "-r"], _parse_iwgetid, timeout=5)]
+    return []
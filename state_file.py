@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+State File - Atomic JSON writes for the files under the cache directory
+The daemon, the browser worker and one-off CLI runs can all save the same
+file at once, so each write goes to its own temporary file and is renamed
+into place
+"""
+
+import os
+import json
+import tempfile
+
+
+def write_json(path, data):
+    """Replace path with data as JSON in one rename; raises OSError on failure"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Strategy Store - Remember which login strategy works for each portal
+Successful strategies are tried first next time; ones that keep failing
+are moved to the back of the queue
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from config import CACHE_CONFIG
+from state_file import write_json
+from sophos_portal import PortalRejected
+from retry_scheduler import STILL_CAPTIVE, REJECTED, TIMEOUT
+
+
+class StrategyStore:
+    def __init__(self, path=None, demote_after=3):
+        self.path = path or os.path.join(CACHE_CONFIG['cache_dir'], 'strategies.json')
+        self.demote_after = demote_after
+        self.lock = threading.Lock()
+        self.portals = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        try:
+            write_json(self.path, self.portals)
+        except OSError as e:
+            logging.warning(f"Could not save strategy store: {e}")
+
+    def _rank(self, portal, strategy_id):
+        stats = self.portals.get(portal, {}).get(strategy_id)
+        if not stats:
+            return (0, 0, 0, 0.0)
+        demoted = 1 if stats['consecutive_failures'] >= self.demote_after else 0
+        return (demoted, -stats['last_success'], -stats['successes'], stats['avg_latency'])
+
+    def order(self, portal, strategies):
+        """Sort (strategy_id, attempt) pairs: recent winners first, repeat losers last
+
+        Strategies without history keep their original relative order.
+        """
+        with self.lock:
+            return sorted(strategies, key=lambda s: self._rank(portal, s[0]))
+
+    def record(self, portal, strategy_id, success, latency):
+        """Store the outcome of one attempt"""
+        with self.lock:
+            stats = self.portals.setdefault(portal, {}).setdefault(strategy_id, {
+                'successes': 0, 'failures': 0, 'consecutive_failures': 0,
+                'avg_latency': 0.0, 'last_success': 0
+            })
+            if success:
+                stats['successes'] += 1
+                stats['consecutive_failures'] = 0
+                stats['last_success'] = time.time()
+                # Running mean of successful attempts only
+                stats['avg_latency'] += (latency - stats['avg_latency']) / stats['successes']
+            else:
+                stats['failures'] += 1
+                stats['consecutive_failures'] += 1
+            self._save()
+
+    def run(self, portal, strategies):
+        """Try (strategy_id, attempt) pairs in order() until one gets online
+
+        Each attempt returns (online, failure kind or None) and may raise
+        PortalRejected. Returns (online, failure kind or None); with no network
+        failure the portal answered every time, so the kind is STILL_CAPTIVE.
+        """
+        failure = None
+        for i, (strategy_id, attempt) in enumerate(self.order(portal, strategies)):
+            logging.info(f"Trying login strategy {i+1}: {strategy_id}")
+            started = time.time()
+            try:
+                success, kind = attempt()
+            except PortalRejected as e:
+                # Wrong password, data limit, ... - the protocol worked, but other
+                # strategies won't help, so don't count it against this one
+                logging.warning(f"Portal rejected login: {e.result.message}")
+                return False, REJECTED
+            # A timeout or refused connection says nothing about the strategy itself
+            if success or kind != TIMEOUT:
+                self.record(portal, strategy_id, success, time.time() - started)
+            if success:
+                logging.info(f"✅ Login successful with {strategy_id}")
+                return True, None
+            failure = failure or kind
+            logging.info(f"❌ Login failed with {strategy_id}")
+        logging.warning("All login strategies failed")
+        return False, failure or STILL_CAPTIVE
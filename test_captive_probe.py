@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Offline check for the captive portal probe.
+Starts a local http.server stand-in that answers like a generate_204
+endpoint, a redirecting portal and an intercepting portal, and checks how
+CaptivePortalProbe classifies each, plus a port nobody listens on. An
+endpoint that hangs checks that MultiEndpointProbe doesn't let it hold up
+the next check.
+
+Usage: python3 test_captive_probe.py
+"""
+
+import sys
+import time
+import socket
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from captive_probe import (CaptivePortalProbe, MultiEndpointProbe, needs_login, ONLINE, PORTAL_REDIRECT,
+                           PORTAL_INTERCEPT, OFFLINE)
+
+PORTAL_LOCATION = 'http://172.16.0.1:8090/httpclient.html'
+HANG_SECONDS = 2
+
+
+class ProbeStandIn(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/hang':
+            time.sleep(HANG_SECONDS)
+        if self.path in ('/generate_204', '/hang'):
+            self.send_response(204)
+            self.end_headers()
+        elif self.path == '/redirect':
+            self.send_response(302)
+            self.send_header('Location', PORTAL_LOCATION)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            body = b'<html><body>Please log in to continue</body></html>'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ProbeStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    session = requests.Session()
+    probe = lambda path, method='GET', base=base: CaptivePortalProbe(session, base + path, expected_status=204,
+                                                                     method=method, timeout=2)
+
+    print("=== Captive Portal Probe Check ===\n")
+    classifier = probe('/generate_204')
+    redirect = probe('/redirect')
+    checks = [
+        ("classify 204", classifier.classify(204, {}), ONLINE),
+        ("classify 302 + Location", classifier.classify(302, {'Location': PORTAL_LOCATION}), PORTAL_REDIRECT),
+        ("classify keeps Location", classifier.last_location, PORTAL_LOCATION),
+        ("classify 200", classifier.classify(200, {}), PORTAL_INTERCEPT),
+        ("check 204", probe('/generate_204').check(), ONLINE),
+        ("check 204 via HEAD", probe('/generate_204', 'HEAD').check(), ONLINE),
+        ("check 302 + Location", redirect.check(), PORTAL_REDIRECT),
+        ("check keeps Location", redirect.last_location, PORTAL_LOCATION),
+        ("check 200 login page", probe('/login').check(), PORTAL_INTERCEPT),
+        ("check connection refused", probe('/generate_204', base=f"http://127.0.0.1:{free_port()}").check(),
+         OFFLINE),
+        ("needs_login", [needs_login(s) for s in (ONLINE, PORTAL_REDIRECT, PORTAL_INTERCEPT, OFFLINE)],
+         [False, True, True, False])
+    ]
+
+    # The hung endpoint is listed first, so a queued second probe of it would take the free worker
+    multi = MultiEndpointProbe(session, [base + '/hang', base + '/generate_204'], policy='first_success', deadline=1)
+    multi.check()
+    start = time.monotonic()
+    state = multi.check()
+    checks.append(("hung endpoint doesn't block", (state, time.monotonic() - start < HANG_SECONDS / 2),
+                   (ONLINE, True)))
+
+    failures = 0
+    for name, got, expected in checks:
+        ok = got == expected
+        failures += not ok
+        print(f"{name:28} {'✅' if ok else f'❌ got {got!r}, expected {expected!r}'}")
+
+    server.shutdown()
+    print(f"\n{len(checks) - failures}/{len(checks)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Offline check for the portal session heartbeat.
+Drives SessionHeartbeat with a fake clock and a fake portal whose sessions
+last a fixed time, and checks how it learns the lifetime, refreshes the
+session before it ends, and (when enabled) probes past its estimate.
+
+Usage: python3 test_heartbeat.py
+"""
+
+import os
+import sys
+import tempfile
+import heartbeat
+from heartbeat import SessionHeartbeat
+
+SESSION = 600  # the fake portal's real session lifetime in seconds
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class FakePortal:
+    """Acks keep-alives until the session is SESSION seconds old; records how long each expiry went unnoticed"""
+    base_url = 'http://portal.test'
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.session_start = clock.now
+        self.outages = []
+
+    def keepalive(self, username):
+        age = self.clock.now - self.session_start
+        if age < SESSION:
+            return True
+        self.outages.append(age - SESSION)
+        return False
+
+    def login(self):
+        self.session_start = self.clock.now
+        return True
+
+
+def make_heartbeat(clock, probe_after=0):
+    portal = FakePortal(clock)
+    hb = SessionHeartbeat(portal, portal.login, username='student', interval=90, margin=60,
+                          path=os.path.join(tempfile.mkdtemp(), 'heartbeat.json'))
+    hb.probe_after = probe_after
+    hb.probe_interval = 5
+    hb.mark_login()
+    return hb, portal
+
+
+def run(hb, clock, seconds):
+    until = clock.now + seconds
+    while clock.now < until:
+        clock.now += hb.next_delay()
+        hb.beat()
+
+
+def main():
+    clock = FakeClock()
+    heartbeat.time = clock
+
+    print("=== Session Heartbeat Check ===\n")
+    hb, portal = make_heartbeat(clock)
+    run(hb, clock, SESSION + 100)
+    checks = [
+        ("learns lifetime from expiry", (hb.expiries, hb.reauths, hb.lifetime), (1, 1, 540)),
+    ]
+
+    run(hb, clock, 10 * SESSION)
+    checks.append(("refreshes before expiry", (hb.expiries, hb.reauths > 10, hb.lifetime), (1, True, 540)))
+
+    hb, portal = make_heartbeat(clock, probe_after=2)
+    hb.lifetime = 300
+    run(hb, clock, 60 * SESSION)
+    stats = hb.stats()
+    checks.extend([
+        ("probing grows the estimate", SESSION - 5 <= stats['lifetime'] <= SESSION, True),
+        ("expiries caught within seconds", all(gap <= 5 for gap in portal.outages), True),
+        ("probes keep running", stats['expiries'] > 1, True)
+    ])
+
+    hb, portal = make_heartbeat(clock)
+    hb.lifetime = 300
+    run(hb, clock, 60 * SESSION)
+    checks.append(("no probing by default", (hb.expiries, portal.outages, hb.lifetime), (0, [], 300)))
+
+    failures = 0
+    for name, got, expected in checks:
+        ok = got == expected
+        failures += not ok
+        print(f"{name:32} {'✅' if ok else f'❌ got {got!r}, expected {expected!r}'}")
+
+    print(f"\n{len(checks) - failures}/{len(checks)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Import budget check for the monitors' cold start.
+Imports each entry-point module in a fresh interpreter with `python -X importtime`
+and fails if the browser stack (selenium, webdriver_manager, pyautogui) or
+requests ends up in sys.modules. The browser engines must only load those once
+the browser path is actually taken, and HTTP code only once a request is made.
+The import time is reported too, but only fails far above what a clean
+import costs, so a slow CI machine doesn't make the check flaky.
+
+Usage: python3 test_import_budget.py [budget_ms]
+"""
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+# Entry points whose "already online" path must stay cheap
+MODULES = [
+    'wifi_daemon',
+    'wifictl',
+    'smart_wifi_monitor',
+    'wifi_monitor_service',
+    'login_api',
+    'wifi_monitor',
+    'simple_wifi_automation',
+    'one_time_wifi_login',
+    'simple_form_filler',
+    'browser_wifi_automation',
+    'wifi_automation',
+    'browser_worker'
+]
+
+FORBIDDEN = ('selenium', 'webdriver_manager', 'pyautogui', 'requests')
+
+DEFAULT_BUDGET_MS = 1000
+
+
+def import_profile(module):
+    """(forbidden packages left in sys.modules, cumulative ms for the module, error output or None)"""
+    repo = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=repo)
+    # Engines log to wifi_automation.log in the working directory; keep that out of the repo
+    code = (f"import sys, json, {module}; "
+            f"print(json.dumps([p for p in {FORBIDDEN!r} if p in sys.modules]))")
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                                capture_output=True, text=True, cwd=workdir, env=env)
+
+    cumulative_ms = 0.0
+    errors = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            errors.append(line)
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # header line
+        if fields[2].strip() == module:
+            cumulative_ms = int(fields[1]) / 1000
+    if result.returncode:
+        return [], cumulative_ms, '\n'.join(errors)
+    return json.loads(result.stdout.splitlines()[-1]), cumulative_ms, None
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    print("=== Import Budget Check ===")
+    print(f"Forbidden at import: {', '.join(FORBIDDEN)} | budget {budget_ms:.0f} ms per module\n")
+
+    failures = 0
+    for module in MODULES:
+        heavy, cumulative_ms, error = import_profile(module)
+        if error:
+            status = f"❌ import failed:\n{error}"
+        elif heavy:
+            status = f"❌ pulls in {', '.join(heavy)}"
+        elif cumulative_ms > budget_ms:
+            status = "❌ over budget"
+        else:
+            status = "✅"
+        failures += not status.startswith("✅")
+        print(f"{module:24} {cumulative_ms:7.1f} ms  {status}")
+
+    print(f"\n{len(MODULES) - failures}/{len(MODULES)} modules within budget")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Offline check for the Linux service installer.
+Renders the systemd units, NetworkManager dispatcher script and ip monitor
+hook into a temporary directory with render_linux_service, and checks the
+files, their modes and the commands they run. Nothing is installed.
+
+Usage: python3 test_install_service.py
+"""
+
+import os
+import sys
+import stat
+import tempfile
+from install_auto_service import (render_linux_service, SYSTEMD_UNIT, LINK_HOOK_UNIT, NM_DISPATCHER_SCRIPT,
+                                  LINK_HOOK_SCRIPT)
+
+REPO = '/opt/wifi-connector'
+PYTHON = '/usr/bin/python3'
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def main():
+    target = tempfile.mkdtemp()
+    paths = render_linux_service(target, repo_dir=REPO, python_path=PYTHON, user='student',
+                                 cache_dir='/home/student/.wifi_connector')
+    unit, dispatcher, hook, hook_unit = (os.path.join(target, name) for name in
+                                         (SYSTEMD_UNIT, NM_DISPATCHER_SCRIPT, LINK_HOOK_SCRIPT, LINK_HOOK_UNIT))
+    wifictl = f'"{PYTHON}" "{os.path.join(REPO, "wifictl.py")}" link-up "$INTERFACE"'
+
+    print("=== Linux Service Render Check ===\n")
+    checks = [
+        ("four files written", sorted(paths), sorted([unit, dispatcher, hook, hook_unit])),
+        ("all exist", all(os.path.isfile(p) for p in paths), True),
+        ("unit modes 0644", [oct(mode(p)) for p in (unit, hook_unit)], [oct(0o644)] * 2),
+        ("script modes 0755", [oct(mode(p)) for p in (dispatcher, hook)], [oct(0o755)] * 2),
+        ("ExecStart runs wifi_daemon.py",
+         f'ExecStart="{PYTHON}" "{os.path.join(REPO, "wifi_daemon.py")}"' in read(unit).splitlines(), True),
+        ("unit sets the cache dir", 'Environment="WIFI_CACHE_DIR=/home/student/.wifi_connector"' in read(unit), True),
+        ("dispatcher calls link-up", wifictl in read(dispatcher), True),
+        ("dispatcher runs as the user", 'runuser -u student --' in read(dispatcher), True),
+        ("hook calls link-up", wifictl in read(hook), True),
+        ("hook unit runs the hook", f'ExecStart="{hook}"' in read(hook_unit), True)
+    ]
+
+    failures = 0
+    for name, got, expected in checks:
+        ok = got == expected
+        failures += not ok
+        print(f"{name:32} {'✅' if ok else f'❌ got {got!r}, expected {expected!r}'}")
+
+    print(f"\n{len(checks) - failures}/{len(checks)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Offline check for the rtnetlink link watcher.
+Feeds crafted RTM_NEWLINK/RTM_NEWADDR datagrams through a socketpair in place
+of the netlink socket, and checks which events LinkWatcher reports, that
+repeats are suppressed, and that a receive overrun resyncs with a synthetic
+"changed" event.
+
+Usage: python3 test_link_watcher.py
+"""
+
+import sys
+import errno
+import socket
+from link_watcher import (LinkWatcher, NLMSGHDR, IFINFOMSG, IFADDRMSG, RTATTR, RTM_NEWLINK, RTM_DELLINK,
+                          RTM_NEWADDR, IFLA_IFNAME, IFA_LOCAL, IFA_LABEL, IFF_UP, IFF_RUNNING, _align)
+
+
+def attribute(attr_type, payload):
+    raw = RTATTR.pack(RTATTR.size + len(payload), attr_type) + payload
+    return raw + b'\0' * (_align(len(raw)) - len(raw))
+
+
+def message(msg_type, body):
+    return NLMSGHDR.pack(NLMSGHDR.size + len(body), msg_type, 0, 0, 0) + body
+
+
+def link(index, name, up, msg_type=RTM_NEWLINK):
+    flags = IFF_UP | IFF_RUNNING if up else IFF_UP
+    return message(msg_type, IFINFOMSG.pack(socket.AF_UNSPEC, 1, index, flags, 0) +
+                   attribute(IFLA_IFNAME, name.encode() + b'\0'))
+
+
+def address(index, name, ip):
+    return message(RTM_NEWADDR, IFADDRMSG.pack(socket.AF_INET, 24, 0, 0, index) +
+                   attribute(IFA_LOCAL, socket.inet_aton(ip)) + attribute(IFA_LABEL, name.encode() + b'\0'))
+
+
+class OverrunSocket:
+    """Stand-in for a netlink socket whose receive buffer overflowed"""
+    def setblocking(self, flag):
+        pass
+
+    def recv(self, size):
+        raise OSError(errno.ENOBUFS, 'No buffer space available')
+
+
+def main():
+    kernel, sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    watcher = LinkWatcher(sock=sock)
+    heard = []
+    watcher.add_listener(heard.append)
+
+    def feed(*datagrams):
+        for datagram in datagrams:
+            kernel.send(datagram)
+        return [(e.kind, e.ifname, e.address) for e in watcher.dispatch()]
+
+    print("=== Link Watcher Check ===\n")
+    checks = [
+        ("link up", feed(link(3, 'wlan0', True)), [('link_up', 'wlan0', None)]),
+        ("repeated link up suppressed", feed(link(3, 'wlan0', True)), []),
+        ("address added", feed(address(3, 'wlan0', '172.16.5.20')), [('addr_added', 'wlan0', '172.16.5.20')]),
+        ("one datagram, two messages", feed(link(3, 'wlan0', False) + address(3, 'wlan0', '172.16.5.21')),
+         [('link_down', 'wlan0', None), ('addr_added', 'wlan0', '172.16.5.21')]),
+        ("loopback ignored", feed(link(1, 'lo', True)), []),
+        ("link removed", feed(link(3, 'wlan0', False, RTM_DELLINK)), [('link_removed', 'wlan0', None)]),
+        ("nothing pending", feed(), []),
+        ("wait_for_change wakes", (kernel.send(link(4, 'wlp2s0', True)),
+                                   [e.kind for e in watcher.wait_for_change(1)])[1], ['link_up']),
+        ("wait_for_change times out", watcher.wait_for_change(0.1), []),
+        ("listeners notified", len(heard), 6),
+        ("suppressed counter", watcher.events_suppressed, 1)
+    ]
+
+    overrun = LinkWatcher(sock=OverrunSocket())
+    overrun.link_up[3] = True
+    events = overrun.dispatch()
+    checks += [
+        ("overrun emits changed", [e.kind for e in events], ['changed']),
+        ("overrun forgets state", overrun.link_up, {})
+    ]
+
+    failures = 0
+    for name, got, expected in checks:
+        ok = got == expected
+        failures += not ok
+        print(f"{name:30} {'✅' if ok else f'❌ got {got!r}, expected {expected!r}'}")
+
+    print(f"\n{len(checks) - failures}/{len(checks)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
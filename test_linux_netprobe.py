@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Offline check for the subprocess-free Linux network probe.
+Builds a fake /proc and /sys tree in a temporary directory, points
+LinuxNetProbe at it with root=, and checks the association state, the
+gateway fingerprint and how often the SSID command would run.
+
+Usage: python3 test_linux_netprobe.py
+"""
+
+import os
+import sys
+import tempfile
+from linux_netprobe import LinuxNetProbe
+
+ROUTE_HEADER = "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT\n"
+ARP_HEADER = "IP address       HW type     Flags       HW address            Mask     Device\n"
+
+
+class CountingProbe(LinuxNetProbe):
+    """Answers the SSID query from a variable instead of iwgetid, counting the calls"""
+    def __init__(self, root):
+        super().__init__(root=root)
+        self.answer = 'GVPH'
+        self.queries = 0
+
+    def query_ssid(self, interface):
+        self.queries += 1
+        return self.answer
+
+
+def write(root, path, content):
+    full = os.path.join(root, path)
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, 'w') as f:
+        f.write(content)
+
+
+def set_route(root, interface, gateway_hex='0110A8C0'):
+    """Default route via `interface` (gateway 192.168.16.1 by default); None for no default route"""
+    lines = ROUTE_HEADER
+    if interface:
+        lines += f"{interface}\t00000000\t{gateway_hex}\t0003\t0\t0\t600\t00000000\t0\t0\t0\n"
+    write(root, 'proc/net/route', lines)
+
+
+def main():
+    root = tempfile.mkdtemp()
+    write(root, 'proc/net/wireless', "Inter-| sta-|   Quality\n face | status | link level noise\n"
+                                     " wlan0: 0000   60.  -50.  -256\n")
+    write(root, 'sys/class/net/wlan0/operstate', "up\n")
+    write(root, 'sys/class/net/eth0/operstate', "up\n")
+    write(root, 'proc/net/arp',
+          ARP_HEADER + "192.168.16.1     0x1         0x2         aa:bb:cc:dd:ee:ff     *        wlan0\n")
+    probe = CountingProbe(root)
+
+    print("=== Linux Net Probe Check ===\n")
+    set_route(root, 'wlan0')
+    state = probe.snapshot()
+    checks = [
+        ("wireless interfaces", probe.wireless_interfaces(), {'wlan0'}),
+        ("associated via Wi-Fi route", (state.associated, state.interface, state.gateway_ip),
+         (True, 'wlan0', '192.168.16.1')),
+        ("fingerprint uses gateway MAC", state.fingerprint, 'wlan0/192.168.16.1/aa:bb:cc:dd:ee:ff'),
+        ("SSID looked up once", ([probe.get_ssid() for _ in range(3)], probe.queries), (['GVPH'] * 3, 1))
+    ]
+
+    set_route(root, 'wlan0', '0210A8C0')
+    checks.append(("new gateway, new lookup", (probe.get_ssid(), probe.queries), ('GVPH', 2)))
+
+    probe.answer = None
+    set_route(root, 'wlan0', '0310A8C0')
+    checks.append(("None cached per fingerprint", ([probe.get_ssid() for _ in range(3)], probe.queries),
+                   ([None] * 3, 3)))
+
+    probe.answer = 'GVPH'
+    set_route(root, 'eth0')
+    state = probe.snapshot()
+    checks.append(("wired default route, Wi-Fi up", (state.associated, state.interface, state.fingerprint),
+                   (True, 'wlan0', 'wlan0/-/-')))
+    set_route(root, None)
+    checks.append(("no default route, Wi-Fi up", (probe.snapshot().associated, probe.get_ssid()), (True, 'GVPH')))
+
+    write(root, 'sys/class/net/wlan0/operstate', "dormant\n")
+    checks.append(("Wi-Fi dormant", (probe.snapshot().associated, probe.get_ssid()), (False, None)))
+
+    failures = 0
+    for name, got, expected in checks:
+        ok = got == expected
+        failures += not ok
+        print(f"{name:32} {'✅' if ok else f'❌ got {got!r}, expected {expected!r}'}")
+
+    print(f"\n{len(checks) - failures}/{len(checks)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,9 @@ Test script to analyze the WiFi login page and identify form fields.
 This helps configure the automation correctly.
 """
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_cache import start_chrome
 import time
 
 def analyze_login_page():
@@ -25,8 +23,7 @@ def analyze_login_page():
     chrome_options.add_argument('--allow-running-insecure-content')
     
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver = start_chrome(chrome_options)
         
         # Navigate to login page
         login_url = "https://172.16.16.16:8090/httpclient.html"
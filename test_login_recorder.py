@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Offline check for recording and replaying the login request.
+Turns form, JSON and URL-query login requests into templates with
+login_recorder's templatize functions, renders them back with credentials
+full of special characters, and checks the portal would receive the
+original fields.
+
+Usage: python3 test_login_recorder.py
+"""
+
+import sys
+import json
+import time
+from urllib.parse import urlencode, parse_qs, urlsplit
+from login_recorder import (templatize_body, templatize_url, render, USERNAME_TOKEN, PASSWORD_TOKEN,
+                            TIMESTAMP_TOKEN)
+
+USERNAME = 'ünï user@campus'
+PASSWORD = 'pa"ss\\x &=+%/é'
+
+
+def main():
+    stamp = str(int(time.time() * 1000) - 5000)
+
+    print("=== Login Recorder Check ===\n")
+    form = {'mode': '191', 'username': USERNAME, 'password': PASSWORD, 'a': stamp, 'producttype': '0'}
+    form_template = templatize_body(urlencode(form), USERNAME, PASSWORD, form_encoded=True)
+    replayed = {k: v[0] for k, v in parse_qs(render(form_template, USERNAME, PASSWORD)).items()}
+
+    document = {'user': {'name': USERNAME, 'secret': PASSWORD}, 'remember': True, 'tags': ['wifi', stamp]}
+    json_template = templatize_body(json.dumps(document), USERNAME, PASSWORD, form_encoded=False)
+    rendered = render(json_template, USERNAME, PASSWORD, form_encoded=False)
+    try:
+        replayed_json = json.loads(rendered)
+    except ValueError as e:
+        replayed_json = f"invalid JSON: {e}"
+
+    url = 'http://172.16.16.16:8090/login.xml?' + urlencode({'user': USERNAME, 'pass': PASSWORD})
+    url_template = templatize_url(url, USERNAME, PASSWORD)
+
+    checks = [
+        ("form fields templated", all(token in form_template for token in
+                                      (USERNAME_TOKEN, PASSWORD_TOKEN, TIMESTAMP_TOKEN)), True),
+        ("form round trip", {k: v for k, v in replayed.items() if k != 'a'},
+         {k: v for k, v in form.items() if k != 'a'}),
+        ("form timestamp refreshed", int(replayed['a']) > int(stamp), True),
+        ("JSON fields templated", (USERNAME_TOKEN in json_template, PASSWORD_TOKEN in json_template), (True, True)),
+        ("JSON round trip", replayed_json if isinstance(replayed_json, str) else
+         {**replayed_json, 'tags': replayed_json['tags'][:1]}, {**document, 'tags': ['wifi']}),
+        ("JSON timestamp refreshed", isinstance(replayed_json, dict) and int(replayed_json['tags'][1]) > int(stamp),
+         True),
+        ("URL host and path kept", urlsplit(url_template)[:3], urlsplit(url)[:3]),
+        ("URL round trip", parse_qs(urlsplit(render(url_template, USERNAME, PASSWORD)).query),
+         {'user': [USERNAME], 'pass': [PASSWORD]})
+    ]
+
+    failures = 0
+    for name, got, expected in checks:
+        ok = got == expected
+        failures += not ok
+        print(f"{name:32} {'✅' if ok else f'❌ got {got!r}, expected {expected!r}'}")
+
+    print(f"\n{len(checks) - failures}/{len(checks)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
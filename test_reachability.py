@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Offline check for the tiered reachability checker.
+Points the portal and the anchors at local listeners, stands in for the DNS
+and TLS answers a steady-state, captive and off-portal network would give,
+and checks which stage decides each case and whether HTTP had to run. With
+every cheap stage slowed down, the check still takes about one stage's time.
+
+Usage: python3 test_reachability.py
+"""
+
+import sys
+import time
+import socket
+import threading
+import reachability
+from reachability import (TieredReachabilityChecker, tls_handshake_any, DNS_CLEAN, DNS_HIJACKED, DNS_FAILED,
+                          TLS_OK, TLS_UNTRUSTED, TLS_FAILED)
+from captive_probe import ONLINE, PORTAL_INTERCEPT, OFFLINE
+
+
+class FakeHttpProbe:
+    def __init__(self, state=ONLINE):
+        self.state = state
+        self.calls = 0
+
+    def check(self):
+        self.calls += 1
+        return self.state
+
+
+def listener(reply=None):
+    """Local TCP server accepting forever, optionally writing `reply` and hanging up"""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(8)
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                if reply:
+                    conn.sendall(reply)
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def make_checker(portal_port, dns, tls, http_state=ONLINE):
+    http = FakeHttpProbe(http_state)
+    checker = TieredReachabilityChecker(http_probe=http, portal_url=f"http://127.0.0.1:{portal_port}/",
+                                        anchors=[('127.0.0.1', ANCHOR.getsockname()[1])],
+                                        tcp_timeout=0.5, dns_timeout=0.5, tls_timeout=0.5)
+    checker.dns_status = lambda: dns
+    checker.anchor_tls_status = lambda: tls
+    return checker, http
+
+
+def run(portal_port, dns, tls, http_state=ONLINE):
+    """(state, deciding stage, HTTP probes made) for one check"""
+    checker, http = make_checker(portal_port, dns, tls, http_state)
+    state = checker.check()
+    return state, checker.last_stage, http.calls
+
+
+def run_slow(portal_port, delay=0.3):
+    """(state, seconds taken, every cheap stage timed from the shared start) with each cheap stage taking `delay`"""
+    checker, _ = make_checker(portal_port, DNS_CLEAN, TLS_FAILED)
+    checker.dns_status = lambda: time.sleep(delay) or DNS_CLEAN
+    connect = reachability.tcp_connect_any
+    reachability.tcp_connect_any = lambda addresses, timeout: time.sleep(delay) or connect(addresses, timeout)
+    try:
+        start = time.monotonic()
+        state = checker.check()
+        elapsed = time.monotonic() - start
+    finally:
+        reachability.tcp_connect_any = connect
+    stages = ('portal_tcp', 'dns', 'anchor_tcp')
+    return state, elapsed < 2 * delay, all(delay <= checker.last_timings[s] < 2 * delay for s in stages)
+
+
+PORTAL = listener()
+ANCHOR = listener()
+
+
+def main():
+    portal_port = PORTAL.getsockname()[1]
+    no_portal = free_port()
+    garbage = listener(b'HTTP/1.1 200 OK\r\n\r\nnot tls')
+
+    print("=== Tiered Reachability Check ===\n")
+    checks = [
+        ("portal net, logged in", run(portal_port, DNS_CLEAN, TLS_OK), (ONLINE, 'anchor_tls', 0)),
+        ("portal net, TLS intercepted", run(portal_port, DNS_CLEAN, TLS_UNTRUSTED),
+         (PORTAL_INTERCEPT, 'anchor_tls', 0)),
+        ("portal net, DNS hijacked", run(portal_port, DNS_HIJACKED, TLS_OK), (PORTAL_INTERCEPT, 'dns', 0)),
+        ("portal net, TLS inconclusive", run(portal_port, DNS_CLEAN, TLS_FAILED, OFFLINE),
+         (OFFLINE, 'http', 1)),
+        ("off portal net, online", run(no_portal, DNS_CLEAN, TLS_FAILED), (ONLINE, 'anchor_tcp', 0)),
+        ("off portal net, DNS down", run(no_portal, DNS_FAILED, TLS_FAILED, OFFLINE), (OFFLINE, 'http', 1)),
+        ("cheap stages run together", run_slow(no_portal), (ONLINE, True, True)),
+        ("handshake with non-TLS server", tls_handshake_any([('127.0.0.1', garbage.getsockname()[1])], 1),
+         TLS_FAILED),
+        ("handshake refused", tls_handshake_any([('127.0.0.1', free_port())], 1), TLS_FAILED)
+    ]
+
+    failures = 0
+    for name, got, expected in checks:
+        ok = got == expected
+        failures += not ok
+        print(f"{name:32} {'✅' if ok else f'❌ got {got!r}, expected {expected!r}'}")
+
+    print(f"\n{len(checks) - failures}/{len(checks)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Offline check for the native Sophos portal client.
+Starts a local http.server stand-in for the portal's login.xml and live
+endpoints, replying the way a Sophos/Cyberoam appliance does for each
+outcome, and checks what SophosPortalClient and classify_message make of it.
+
+Usage: python3 test_sophos_portal.py
+"""
+
+import sys
+import socket
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse, parse_qs
+from sophos_portal import (SophosPortalClient, classify_message, parse_login_response, LOGIN_SUCCESS,
+                           WRONG_CREDENTIALS, MAX_LOGIN_LIMIT, DATA_LIMIT, UNKNOWN, NO_RESPONSE,
+                           FATAL_OUTCOMES, MODE_LOGIN, MODE_KEEPALIVE)
+
+# username -> (status, message) the stand-in answers login.xml with
+REPLIES = {
+    'student': ('LIVE', 'You are signed in as {username}'),
+    'wrong': ('LOGIN', 'Login failed. Invalid user name/password. Please contact the administrator.'),
+    'busy': ('LOGIN', 'You have reached the maximum login limit.'),
+    'quota': ('LOGIN', 'Your data transfer has been exceeded, Please contact the administrator.')
+}
+
+RESPONSE = ("<?xml version='1.0' ?><requestresponse><status><![CDATA[{status}]]></status>"
+            "<message><![CDATA[{message}]]></message><logoutmessage><![CDATA[You have successfully "
+            "logged off]]></logoutmessage><state><![CDATA[]]></state></requestresponse>")
+
+
+class PortalStandIn(BaseHTTPRequestHandler):
+    live_users = {'student'}
+
+    def reply(self, code, body):
+        payload = body.encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+        field = lambda name: form.get(name, [''])[0]
+        if urlparse(self.path).path != '/login.xml' or field('mode') != MODE_LOGIN:
+            return self.reply(404, 'not found')
+        if field('username') == 'broken':
+            return self.reply(200, '<html>Portal maintenance</html')
+        status, message = REPLIES.get(field('username'), REPLIES['wrong'])
+        self.reply(200, RESPONSE.format(status=status, message=message.format(username=field('username'))))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path != '/live' or query.get('mode') != [MODE_KEEPALIVE]:
+            return self.reply(404, 'not found')
+        ack = 'ack' if query.get('username', [''])[0] in self.live_users else 'login_again'
+        self.reply(200, f"<?xml version='1.0' ?><live><ack><![CDATA[{ack}]]></ack></live>")
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    server = HTTPServer(('127.0.0.1', 0), PortalStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = SophosPortalClient(requests.Session(), f"http://127.0.0.1:{server.server_port}/httpclient.html",
+                                timeout=2)
+    dead = SophosPortalClient(requests.Session(), f"http://127.0.0.1:{free_port()}/httpclient.html", timeout=2)
+
+    print("=== Sophos Portal Client Check ===\n")
+    checks = [
+        ("classify LIVE status", classify_message('LIVE', ''), LOGIN_SUCCESS),
+        ("classify signed-in message", classify_message('', 'You are signed in as x'), LOGIN_SUCCESS),
+        ("classify invalid user name", classify_message('LOGIN', REPLIES['wrong'][1]), WRONG_CREDENTIALS),
+        ("classify maximum login limit", classify_message('LOGIN', REPLIES['busy'][1]), MAX_LOGIN_LIMIT),
+        ("classify data transfer exceeded", classify_message('LOGIN', REPLIES['quota'][1]), DATA_LIMIT),
+        ("classify anything else", classify_message('LOGIN', 'Please wait'), UNKNOWN),
+        ("parse garbage", parse_login_response('not xml').outcome, UNKNOWN),
+        ("login success", client.login('student', 'pw').outcome, LOGIN_SUCCESS),
+        ("login wrong credentials", client.login('wrong', 'pw').outcome, WRONG_CREDENTIALS),
+        ("login max login limit", client.login('busy', 'pw').outcome, MAX_LOGIN_LIMIT),
+        ("login data limit", client.login('quota', 'pw').outcome, DATA_LIMIT),
+        ("login unparseable reply", client.login('broken', 'pw').outcome, UNKNOWN),
+        ("login portal down", dead.login('student', 'pw').outcome, NO_RESPONSE),
+        ("success message kept", client.login('student', 'pw').message, 'You are signed in as student'),
+        ("fatal outcomes", [o in FATAL_OUTCOMES for o in (WRONG_CREDENTIALS, MAX_LOGIN_LIMIT, DATA_LIMIT,
+                                                           LOGIN_SUCCESS, UNKNOWN, NO_RESPONSE)],
+         [True, True, True, False, False, False]),
+        ("keepalive ack", client.keepalive('student'), True),
+        ("keepalive login_again", client.keepalive('wrong'), False)
+    ]
+
+    failures = 0
+    for name, got, expected in checks:
+        ok = got == expected
+        failures += not ok
+        print(f"{name:32} {'✅' if ok else f'❌ got {got!r}, expected {expected!r}'}")
+
+    server.shutdown()
+    print(f"\n{len(checks) - failures}/{len(checks)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Offline check and benchmark for the SSID probe fan-out.
+Replaces the platform commands with stub Python commands that sleep and
+print (or fail), then checks which backend wins, how latencies are charged
+and how the backends are reordered, and prints the time each run took.
+
+Usage: python3 test_ssid_probes.py
+"""
+
+import sys
+import time
+from ssid_probes import CommandProbe, ProbeFanout
+
+
+def stub(name, delay, output='GVPH', exit_code=0, timeout=2, authoritative=True):
+    """A backend that answers `output` after `delay` seconds and exits with `exit_code`"""
+    code = f"import time, sys; time.sleep({delay}); print({output!r}); sys.exit({exit_code})"
+    return CommandProbe(name, [sys.executable, '-c', code], lambda out: out.strip() or None,
+                        timeout=timeout, authoritative=authoritative)
+
+
+def timed(fanout):
+    start = time.monotonic()
+    value = fanout.run()
+    return value, time.monotonic() - start
+
+
+def main():
+    print("=== SSID Probe Fan-out Check ===\n")
+
+    race = ProbeFanout([stub('slow', 1.5, 'SLOW'), stub('fast', 0.05, 'FAST')], hedge_delay=0.05)
+    first, first_elapsed = timed(race)
+    second, second_elapsed = timed(race)
+
+    unmeasured = ProbeFanout([stub('never_run', 0, timeout=5), stub('measured', 0, timeout=5)])
+    unmeasured.record_latency('measured', 0.2)
+
+    not_connected = ProbeFanout([stub('iwgetid', 0.05, '', timeout=3)])
+    not_connected.run()
+
+    failing = ProbeFanout([stub('broken', 0, exit_code=1, timeout=3)])
+    failing.run()
+
+    fallback = ProbeFanout([stub('ifconfig', 0.05, 'GUESS', authoritative=False), stub('none', 0.05, '')],
+                           hedge_delay=0)
+
+    checks = [
+        ("fastest answer wins", first, 'FAST'),
+        ("loser killed, not waited for", first_elapsed < 1.0, True),
+        ("measured fast backend first", [b.name for b in race.ordered_backends()], ['fast', 'slow']),
+        ("second run still fast", (second, second_elapsed < 1.0), ('FAST', True)),
+        ("unmeasured ranks after measured", [b.name for b in unmeasured.ordered_backends()],
+         ['measured', 'never_run']),
+        ("clean 'not connected' charged elapsed", not_connected.latency['iwgetid'] < 1.0, True),
+        ("failed command charged timeout", failing.latency['broken'], 3),
+        ("non-authoritative fallback", fallback.run(), 'GUESS'),
+        ("win counted", race.stats()['fast']['wins'], 2)
+    ]
+
+    failures = 0
+    for name, got, expected in checks:
+        ok = got == expected
+        failures += not ok
+        print(f"{name:38} {'✅' if ok else f'❌ got {got!r}, expected {expected!r}'}")
+
+    print(f"\nFan-out runs: {first_elapsed * 1000:.0f} ms, then {second_elapsed * 1000:.0f} ms "
+          f"(slow stub alone takes 1500 ms)")
+    print(f"{len(checks) - failures}/{len(checks)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
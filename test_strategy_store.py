@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Offline check for the shared login strategy loop.
+Runs StrategyStore.run over stand-in strategies that time out, leave us
+captive, get rejected or succeed, and checks the result, what was recorded
+and the order the next attempt tries them in.
+
+Usage: python3 test_strategy_store.py
+"""
+
+import os
+import sys
+import logging
+import tempfile
+from strategy_store import StrategyStore
+from sophos_portal import PortalRejected, LoginResult, WRONG_CREDENTIALS
+from retry_scheduler import STILL_CAPTIVE, REJECTED, TIMEOUT
+
+PORTAL = 'http://portal.test/httpclient.html'
+
+
+class Strategies:
+    """(strategy_id, attempt) pairs with fixed outcomes, remembering which ran"""
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.ran = []
+
+    def pairs(self):
+        return [(strategy_id, lambda s=strategy_id: self.attempt(s)) for strategy_id in self.outcomes]
+
+    def attempt(self, strategy_id):
+        self.ran.append(strategy_id)
+        outcome = self.outcomes[strategy_id]
+        if outcome == REJECTED:
+            raise PortalRejected(LoginResult(WRONG_CREDENTIALS, 'Invalid user name/password'))
+        return outcome
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    store = StrategyStore(path=os.path.join(tempfile.mkdtemp(), 'strategies.json'))
+
+    print("=== Strategy Store Check ===\n")
+    strategies = Strategies({'slow': (False, TIMEOUT), 'captive': (False, None), 'form': (True, None)})
+    checks = [
+        ("success after failures", store.run(PORTAL, strategies.pairs()), (True, None)),
+        ("all tried in order", strategies.ran, ['slow', 'captive', 'form']),
+        ("timeout not recorded", sorted(store.portals[PORTAL]), ['captive', 'form'])
+    ]
+
+    strategies.ran = []
+    checks.append(("winner goes first", (store.run(PORTAL, strategies.pairs()), strategies.ran),
+                   ((True, None), ['form'])))
+
+    strategies = Strategies({'slow': (False, TIMEOUT), 'captive': (False, None)})
+    checks.append(("network failure wins", store.run(PORTAL, strategies.pairs()), (False, TIMEOUT)))
+    strategies = Strategies({'captive': (False, None)})
+    checks.append(("portal answered, still captive", store.run(PORTAL, strategies.pairs()), (False, STILL_CAPTIVE)))
+
+    strategies = Strategies({'rejected': REJECTED, 'form': (True, None)})
+    checks.append(("rejection stops the loop", (store.run('http://other.test/', strategies.pairs()), strategies.ran),
+                   ((False, REJECTED), ['rejected'])))
+    checks.append(("rejection not recorded", store.portals.get('http://other.test/'), None))
+
+    failures = 0
+    for name, got, expected in checks:
+        ok = got == expected
+        failures += not ok
+        print(f"{name:32} {'✅' if ok else f'❌ got {got!r}, expected {expected!r}'}")
+
+    print(f"\n{len(checks) - failures}/{len(checks)} checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
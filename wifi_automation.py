@@ -1,15 +1,16 @@
-import time
-import requests
+import asyncio
 import subprocess
 import platform
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_cache import start_chrome
+from browser_profile import build_chrome_options, apply_profile
+from browser_waits import wait_for_login_outcome, page_text, STATUS_FAILURE
 from config import WIFI_CONFIG, CREDENTIALS, BROWSER_CONFIG, NETWORK_CONFIG
+from linux_netprobe import get_linux_probe
+from captive_probe import ONLINE
+from connectivity_oracle import get_shared_oracle
+from link_watcher import LinkWatcher
+from monitor_core import MonitorCore
+from wifictl import defer_to_daemon
 import logging
 
 # Set up logging
@@ -25,47 +26,38 @@ logging.basicConfig(
 class WiFiAutomation:
     def __init__(self):
         self.driver = None
-        self.setup_driver()
+        self.oracle = get_shared_oracle()
+        self.link_watcher = LinkWatcher()
+        self.link_watcher.add_listener(self.oracle.on_link_event)
     
     def setup_driver(self):
         """Set up Chrome WebDriver with appropriate options"""
-        chrome_options = Options()
-        
-        if BROWSER_CONFIG['headless']:
-            chrome_options.add_argument('--headless')
-        
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--ignore-ssl-errors')
-        chrome_options.add_argument('--disable-web-security')
-        chrome_options.add_argument('--allow-running-insecure-content')
+        # BROWSER_CONFIG['profile'] decides headless mode, page-load strategy and blocked resources
+        chrome_options = build_chrome_options()
         
         try:
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            # Driver path comes from the on-disk cache: no version lookup on the captive network
+            self.driver = start_chrome(chrome_options)
+            apply_profile(self.driver)
             self.driver.set_page_load_timeout(BROWSER_CONFIG['timeout'])
             logging.info("WebDriver setup successful")
         except Exception as e:
             logging.error(f"Failed to setup WebDriver: {e}")
             raise
     
+    def ensure_driver(self):
+        """Start Chrome on the first login attempt rather than at construction"""
+        if self.driver is None:
+            self.setup_driver()
+        return self.driver
+    
     def check_internet_connectivity(self):
         """Check if internet is accessible"""
-        try:
-            response = requests.get('http://www.google.com', timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+        return self.oracle.is_online()
     
     def is_captive_portal_active(self):
-        """Check if captive portal is active by trying to access a known site"""
-        try:
-            response = requests.get('http://www.google.com', timeout=5)
-            # If we get redirected to the login page, captive portal is active
-            return '172.16.16.16' in response.url or response.status_code != 200
-        except:
-            return True
+        """Check if captive portal is active (probe redirected/intercepted, or no answer)"""
+        return self.oracle.get_state() != ONLINE
     
     def get_current_wifi_ssid(self):
         """Get the current WiFi SSID"""
@@ -87,9 +79,8 @@ class WiFiAutomation:
                         return line.split(':')[1].strip()
             
             elif system == "Linux":
-                cmd = ["iwgetid", "-r"]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                return result.stdout.strip()
+                # Reads /proc and /sys; only shells out when the network changes
+                return get_linux_probe().get_ssid()
                 
         except Exception as e:
             logging.error(f"Error getting WiFi SSID: {e}")
@@ -101,6 +92,13 @@ class WiFiAutomation:
         try:
             logging.info("Starting WiFi login automation")
             
+            # Selenium is imported only once the browser path is actually taken
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.webdriver.support import expected_conditions as EC
+            
+            self.ensure_driver()
+            
             # Navigate to the login page
             self.driver.get(WIFI_CONFIG['login_url'])
             logging.info(f"Navigated to login page: {WIFI_CONFIG['login_url']}")
@@ -110,6 +108,9 @@ class WiFiAutomation:
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
             
+            start_url = self.driver.current_url
+            baseline_text = page_text(self.driver)
+            
             # Find and fill username field
             try:
                 username_field = WebDriverWait(self.driver, 10).until(
@@ -185,8 +186,12 @@ class WiFiAutomation:
                     except:
                         continue
             
-            # Wait a moment for the login to process
-            time.sleep(3)
+            # Wait for the portal's answer (URL change, status text, idle page or online)
+            outcome = wait_for_login_outcome(self.driver, start_url, baseline_text, oracle=self.oracle)
+            if outcome == STATUS_FAILURE:
+                logging.warning("Portal rejected the login")
+                return False
+            self.oracle.invalidate()
             
             # Check if login was successful
             if self.check_internet_connectivity():
@@ -204,37 +209,14 @@ class WiFiAutomation:
         """Main automation loop"""
         logging.info("Starting WiFi automation service")
         
-        while True:
-            try:
-                current_ssid = self.get_current_wifi_ssid()
-                
-                # Check if we're connected to the target network
-                if current_ssid and (not NETWORK_CONFIG['target_ssid'] or current_ssid == NETWORK_CONFIG['target_ssid']):
-                    logging.info(f"Connected to WiFi: {current_ssid}")
-                    
-                    # Check if internet is accessible
-                    if not self.check_internet_connectivity():
-                        logging.info("Internet not accessible, captive portal may be active")
-                        
-                        # Try to login
-                        if self.login_to_wifi():
-                            logging.info("Successfully logged in to WiFi")
-                        else:
-                            logging.warning("Failed to login to WiFi")
-                    else:
-                        logging.info("Internet is accessible, no login needed")
-                else:
-                    logging.info(f"Not connected to target WiFi network. Current: {current_ssid}")
-                
-                # Wait before next check
-                time.sleep(NETWORK_CONFIG['check_interval'])
-                
-            except KeyboardInterrupt:
-                logging.info("Automation stopped by user")
-                break
-            except Exception as e:
-                logging.error(f"Error in automation loop: {e}")
-                time.sleep(NETWORK_CONFIG['check_interval'])
+        # The Selenium login runs on its own thread, so probing keeps going while it works
+        core = MonitorCore(self.get_current_wifi_ssid, self.login_to_wifi,
+                           link_watcher=self.link_watcher, oracle=self.oracle,
+                           target_ssid=NETWORK_CONFIG['target_ssid'])
+        try:
+            asyncio.run(core.run())
+        except KeyboardInterrupt:
+            logging.info("Automation stopped by user")
     
     def cleanup(self):
         """Clean up resources"""
@@ -243,8 +225,9 @@ class WiFiAutomation:
             logging.info("WebDriver closed")
 
 if __name__ == "__main__":
-    automation = WiFiAutomation()
-    try:
-        automation.run_automation()
-    finally:
-        automation.cleanup() 
\ No newline at end of file
+    if not defer_to_daemon():
+        automation = WiFiAutomation()
+        try:
+            automation.run_automation()
+        finally:
+            automation.cleanup() 
\ No newline at end of file
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+WiFi Daemon - The one long-running process that owns monitoring and login
+Runs the monitor core (probing, login, heartbeats) with the HTTP engine,
+falling back to the browser engine, and answers status and control
+requests on a Unix socket (see wifictl.py) from its cached state. A lock
+file keeps it to one instance per user
+"""
+
+import os
+import json
+import time
+import fcntl
+import asyncio
+import logging
+import login_api
+from config import DAEMON_CONFIG, CACHE_CONFIG
+from wifictl import daemon_address
+from wifi_monitor import WiFiMonitor
+from monitor_core import MonitorCore
+from link_watcher import LinkEvent
+from retry_scheduler import REJECTED
+
+STATUS_KEYS = ('ssid', 'state', 'last_check', 'paused', 'login_in_progress', 'last_login', 'last_login_ok')
+
+
+def acquire_instance_lock():
+    """Hold the single-instance lock for the life of the process; None if another daemon has it"""
+    os.makedirs(CACHE_CONFIG['cache_dir'], exist_ok=True)
+    fd = os.open(os.path.join(CACHE_CONFIG['cache_dir'], 'wifi_daemon.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    return fd
+
+
+class WiFiDaemon:
+    def __init__(self):
+        self.monitor = WiFiMonitor()
+        self.core = MonitorCore(self.monitor.get_current_wifi_ssid, self.login,
+                                link_watcher=self.monitor.link_watcher, oracle=self.monitor.oracle,
+                                heartbeat=self.monitor.heartbeat,
+                                failure_kind=lambda: self.monitor.last_failure)
+        self.requests = 0
+        self.browser_logins = 0
+
+    def login(self):
+        """HTTP strategies first; the browser engine only when the portal needs a real browser"""
+        if self.monitor.attempt_login():
+            return True
+        if not DAEMON_CONFIG['browser_fallback'] or self.monitor.last_failure == REJECTED:
+            return False
+        self.browser_logins += 1
+        result = login_api.login(isolated=True)
+        logging.info(f"Browser fallback login: {result}")
+        if result.online:
+            self.monitor.last_failure = None
+        return result.online
+
+    def status(self):
+        """The few fields a status query needs, straight from the core's cached state"""
+        status = {key: self.core.status[key] for key in STATUS_KEYS}
+        status['retry_remaining'] = self.core.retry.remaining()
+        status['uptime'] = time.time() - self.core.started if self.core.started else 0
+        status['now'] = time.time()
+        return status
+
+    def metrics(self):
+        metrics = self.core.snapshot()
+        metrics['probe_cache'] = self.monitor.probe_cache.stats()
+        metrics['probe_backends'] = self.monitor.ssid_fanout.stats()
+        metrics['daemon'] = {'pid': os.getpid(), 'api_requests': self.requests,
+                             'browser_logins': self.browser_logins}
+        return metrics
+
+    def handle(self, request):
+        """Answer one control request"""
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': 'bad request'}
+        command = request.get('command')
+        if command == 'ping':
+            return {'ok': True, 'pid': os.getpid()}
+        if command == 'status':
+            return {'ok': True, 'status': self.status()}
+        if command == 'metrics':
+            return {'ok': True, 'metrics': self.metrics()}
+        if command == 'login':
+            return {'ok': True, 'login': self.core.force_login()}
+        if command == 'pause':
+            self.core.pause()
+            return {'ok': True}
+        if command == 'resume':
+            self.core.resume()
+            return {'ok': True}
+        if command == 'link-up':
+            # Poked by the NetworkManager dispatcher / ip monitor hook: re-check right away
+            self.core.report_link_event(LinkEvent('link_up', 0, request.get('interface'), True, None))
+            return {'ok': True}
+        return {'ok': False, 'error': f"unknown command: {command}"}
+
+    async def handle_client(self, reader, writer):
+        try:
+            line = await asyncio.wait_for(reader.readline(), DAEMON_CONFIG['request_timeout'])
+            try:
+                request = json.loads(line)
+            except ValueError:
+                reply = {'ok': False, 'error': 'bad request'}
+            else:
+                self.requests += 1
+                reply = self.handle(request)
+            writer.write(json.dumps(reply, default=str).encode() + b'\n')
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def run(self):
+        """Serve the control socket alongside the monitor core until cancelled"""
+        address = daemon_address()
+        os.makedirs(os.path.dirname(address), exist_ok=True)
+        if os.path.exists(address):
+            os.unlink(address)  # left over from a daemon that died; we hold the lock now
+        old_umask = os.umask(0o077)
+        try:
+            server = await asyncio.start_unix_server(self.handle_client, path=address)
+        finally:
+            os.umask(old_umask)
+
+        print(f"🧭 WiFi daemon listening on {address}")
+        try:
+            async with server:
+                await self.core.run()
+        finally:
+            if os.path.exists(address):
+                os.unlink(address)
+
+
+def main():
+    if acquire_instance_lock() is None:
+        print("🧭 wifi_daemon.py is already running - use wifictl.py to query or control it")
+        return
+    daemon = WiFiDaemon()
+    try:
+        asyncio.run(daemon.run())
+    except KeyboardInterrupt:
+        logging.info(f"Daemon stopped: {daemon.metrics()}")
+        print("\n🛑 WiFi daemon stopped")
+
+
+if __name__ == "__main__":
+    main()
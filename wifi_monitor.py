@@ -3,12 +3,24 @@
 WiFi Monitor - Automatically login when connected to hostel WiFi
 """
 
-import time
-import requests
-import subprocess
+import asyncio
 import platform
 import logging
+from functools import partial
 from config import WIFI_CONFIG, CREDENTIALS, NETWORK_CONFIG
+from link_watcher import LinkWatcher
+from probe_cache import ProbeCache
+from ssid_probes import ProbeFanout, default_ssid_backends
+from linux_netprobe import get_linux_probe
+from connectivity_oracle import get_shared_oracle
+from http_client import get_shared_session
+from portal_form import FormSchemaCache, login_with_form
+from strategy_store import StrategyStore
+from sophos_portal import SophosPortalClient
+from heartbeat import portal_heartbeat
+from monitor_core import MonitorCore
+from wifictl import defer_to_daemon
+from retry_scheduler import REJECTED, classify_exception
 
 # Set up logging
 logging.basicConfig(
@@ -22,140 +34,132 @@ logging.basicConfig(
 
 class WiFiMonitor:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.verify = False
-        import urllib3
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        # Shared pooled session (keep-alive, retries, SSL checks off for the portal)
+        self.session = get_shared_session()
+        self.oracle = get_shared_oracle()
+        self.form_cache = FormSchemaCache()
+        self.strategy_store = StrategyStore()
+        self.portal_client = SophosPortalClient(self.session)
+        self.login_page = None
         
-        # Track login attempts to avoid spam
-        self.last_login_attempt = 0
-        self.login_cooldown = 30  # seconds between login attempts (reduced from 60)
+        # Why the last login failed; the monitor core backs off accordingly
+        self.last_failure = None
+        
+        # Wake on link/address changes instead of polling (Linux only)
+        self.link_watcher = LinkWatcher()
+        
+        # Reuse SSID probe results until they expire or the link changes
+        self.probe_cache = ProbeCache(NETWORK_CONFIG['probe_cache_ttl'])
+        self.link_watcher.add_listener(self.probe_cache.on_link_event)
+        self.link_watcher.add_listener(self.oracle.on_link_event)
+        
+        # Keep the portal session alive (and refresh it before expiry) once logged in
+        self.heartbeat = portal_heartbeat(self.portal_client, lambda: self.try_portal_login()[0], self.link_watcher)
+        self.ssid_fanout = ProbeFanout(default_ssid_backends(),
+                                       hedge_delay=NETWORK_CONFIG['probe_hedge_delay'])
     
     def check_internet_connectivity(self):
         """Check if internet is accessible"""
-        try:
-            response = self.session.get('http://www.google.com', timeout=5)
-            return response.status_code == 200
-        except:
-            return False
+        return self.oracle.is_online()
     
     def get_current_wifi_ssid(self):
-        """Get the current WiFi SSID"""
-        system = platform.system()
-        
+        """Get the current WiFi SSID (cached)"""
+        return self.probe_cache.get('ssid', self.probe_wifi_ssid)
+    
+    def probe_wifi_ssid(self):
+        """Probe the OS for the current WiFi SSID (backends run concurrently, first answer wins)"""
         try:
-            if system == "Darwin":  # macOS
-                # Try system_profiler method first
-                try:
-                    result = subprocess.run(["system_profiler", "SPAirPortDataType"], 
-                                         capture_output=True, text=True, timeout=10)
-                    if result.returncode == 0:
-                        output = result.stdout
-                        if "GVPH:" in output:
-                            return "GVPH"
-                except:
-                    pass
-                
-                # Try networksetup method
-                try:
-                    result = subprocess.run(["networksetup", "-getairportnetwork", "en0"], 
-                                         capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0 and "GVPH" in result.stdout:
-                        return "GVPH"
-                except:
-                    pass
-                
-                # Check if we have an IP address (indicates WiFi connection)
-                try:
-                    result = subprocess.run(["ifconfig", "en0"], 
-                                         capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0 and "inet " in result.stdout:
-                        # We have an IP, likely connected to GVPH
-                        return "GVPH"
-                except:
-                    pass
-                    
-            elif system == "Windows":
-                cmd = ["netsh", "wlan", "show", "interfaces"]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                for line in result.stdout.split('\n'):
-                    if 'SSID' in line and 'BSSID' not in line:
-                        return line.split(':')[1].strip()
-            
-            elif system == "Linux":
-                cmd = ["iwgetid", "-r"]
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                return result.stdout.strip()
-                
+            if platform.system() == "Linux":
+                # Reads /proc and /sys; only shells out when the network changes
+                return get_linux_probe().get_ssid()
+            return self.ssid_fanout.run()
         except Exception as e:
             logging.error(f"Error getting WiFi SSID: {e}")
         
         return None
     
+    def get_login_page(self):
+        """Fetch the login page once per attempt (cookies + form schema)"""
+        if self.login_page is None:
+            self.login_page = self.session.get(WIFI_CONFIG['login_url'], timeout=10)
+            logging.info(f"Login page response: {self.login_page.status_code}")
+        return self.login_page
+    
+    def try_portal_login(self):
+        """Log in through the portal's native login.xml endpoint; the reply is the verdict
+
+        Returns (online, failure kind or None) like every login strategy.
+        """
+        return self.portal_client.login_strategy(CREDENTIALS['username'], CREDENTIALS['password'], self.oracle)
+    
+    def try_extracted_form(self):
+        """Log in with the form schema read from the portal page (one POST, one check)"""
+        page = self.get_login_page()
+        return login_with_form(self.session, self.form_cache, self.oracle, WIFI_CONFIG['login_url'],
+                               page.text, CREDENTIALS['username'], CREDENTIALS['password'])
+    
+    def try_field_post(self, user_field, pass_field):
+        """POST the credentials under the given field names and check connectivity"""
+        self.get_login_page()
+        try:
+            login_data = {user_field: CREDENTIALS['username'], pass_field: CREDENTIALS['password']}
+            response = self.session.post(WIFI_CONFIG['login_url'], data=login_data, timeout=15)
+            logging.info(f"POST response status: {response.status_code}")
+            
+            # Only an accepted POST can change our state; otherwise reuse the cached answer
+            if response.ok:
+                self.oracle.invalidate()
+            
+            # Test if login worked
+            return self.check_internet_connectivity(), None
+        except Exception as e:
+            logging.error(f"Error posting {user_field}/{pass_field}: {e}")
+            return False, classify_exception(e)
+    
     def attempt_login(self):
-        """Attempt to login to the WiFi portal"""
-        current_time = time.time()
-        
-        # Check cooldown
-        if current_time - self.last_login_attempt < self.login_cooldown:
-            logging.info("Skipping login attempt due to cooldown")
-            return False
-        
-        self.last_login_attempt = current_time
+        """Attempt to login to the WiFi portal (retry pacing is up to the caller)"""
+        self.last_failure = None
         
         try:
             logging.info("Attempting WiFi login...")
             print("🔐 Attempting WiFi login...")
             
-            # Try to access the login page first
-            try:
-                response = self.session.get(WIFI_CONFIG['login_url'], timeout=10)
-                logging.info(f"Login page response: {response.status_code}")
-            except Exception as e:
-                logging.error(f"Error accessing login page: {e}")
-                return False
+            # The login page is fetched lazily, only by strategies that need it
+            self.login_page = None
             
             # Try multiple field name combinations
             field_combinations = [
-                {WIFI_CONFIG['username_field']: CREDENTIALS['username'], 
-                 WIFI_CONFIG['password_field']: CREDENTIALS['password']},
-                {'username': CREDENTIALS['username'], 'password': CREDENTIALS['password']},
-                {'user': CREDENTIALS['username'], 'pass': CREDENTIALS['password']},
-                {'login': CREDENTIALS['username'], 'password': CREDENTIALS['password']},
-                {'roll': CREDENTIALS['username'], 'pwd': CREDENTIALS['password']},
-                {'id': CREDENTIALS['username'], 'passwd': CREDENTIALS['password']}
+                (WIFI_CONFIG['username_field'], WIFI_CONFIG['password_field']),
+                ('username', 'password'),
+                ('user', 'pass'),
+                ('login', 'password'),
+                ('roll', 'pwd'),
+                ('id', 'passwd')
             ]
             
-            for i, login_data in enumerate(field_combinations):
-                try:
-                    logging.info(f"Trying field combination {i+1}: {list(login_data.keys())}")
-                    print(f"🔄 Trying login method {i+1}...")
-                    
-                    response = self.session.post(WIFI_CONFIG['login_url'], 
-                                              data=login_data, timeout=15)
-                    logging.info(f"POST response status: {response.status_code}")
-                    
-                    # Test if login worked
-                    if self.check_internet_connectivity():
-                        logging.info(f"✅ Login successful with combination {i+1}!")
-                        print(f"✅ Login successful with method {i+1}!")
-                        return True
-                    else:
-                        logging.info(f"❌ Login failed with combination {i+1}")
-                        print(f"❌ Login method {i+1} failed")
-                        
-                except Exception as e:
-                    logging.error(f"Error with combination {i+1}: {e}")
-                    print(f"❌ Error with login method {i+1}")
-                    continue
+            # The portal's own protocol, then the form it actually serves, then guessing
+            strategies = []
+            if WIFI_CONFIG['portal_type'] == 'sophos':
+                strategies.append(('sophos:login.xml', self.try_portal_login))
+            strategies.append(('http:form', self.try_extracted_form))
+            for user_field, pass_field in dict.fromkeys(field_combinations):
+                strategies.append((f"http:post:{user_field}/{pass_field}",
+                                   partial(self.try_field_post, user_field, pass_field)))
             
-            logging.warning("All login attempts failed")
-            print("❌ All login attempts failed")
-            return False
+            # Known-good strategy for this portal goes first; each one returns (online, failure kind)
+            success, self.last_failure = self.strategy_store.run(WIFI_CONFIG['login_url'], strategies)
+            if success:
+                print("✅ Login successful!")
+            elif self.last_failure == REJECTED:
+                print("❌ Portal rejected login")
+            else:
+                print("❌ All login attempts failed")
+            return success
             
         except Exception as e:
             logging.error(f"Error during login attempt: {e}")
             print(f"❌ Login error: {e}")
+            self.last_failure = classify_exception(e)
             return False
     
     def run_monitor(self):
@@ -167,38 +171,19 @@ class WiFiMonitor:
         print("📡 Monitoring for WiFi connection and login opportunities")
         print("⏹️  Press Ctrl+C to stop\n")
         
-        while True:
-            try:
-                # Check current WiFi
-                current_ssid = self.get_current_wifi_ssid()
-                
-                if current_ssid:
-                    logging.info(f"Connected to WiFi: {current_ssid}")
-                    print(f"📶 Connected to WiFi: {current_ssid}")
-                    
-                    # Always attempt login when connected to GVPH (regardless of internet check)
-                    print("🌐 Attempting login to WiFi portal...")
-                    if self.attempt_login():
-                        logging.info("🎉 Successfully logged in!")
-                        print("✅ WiFi login successful!")
-                    else:
-                        logging.warning("Login attempt failed")
-                        print("❌ Login attempt failed")
-                else:
-                    logging.info("Not connected to WiFi")
-                    print("📶 Not connected to WiFi")
-                
-                # Wait before next check
-                time.sleep(NETWORK_CONFIG['check_interval'])
-                
-            except KeyboardInterrupt:
-                logging.info("Monitor stopped by user")
-                print("\n🛑 WiFi Monitor stopped")
-                break
-            except Exception as e:
-                logging.error(f"Error in monitor loop: {e}")
-                time.sleep(NETWORK_CONFIG['check_interval'])
+        # Probing, login and heartbeats run as separate tasks, so a slow portal
+        # never holds up noticing a link change
+        core = MonitorCore(self.get_current_wifi_ssid, self.attempt_login,
+                           link_watcher=self.link_watcher, oracle=self.oracle,
+                           heartbeat=self.heartbeat, failure_kind=lambda: self.last_failure)
+        try:
+            asyncio.run(core.run())
+        except KeyboardInterrupt:
+            logging.info(f"Monitor stopped by user (probe cache: {self.probe_cache.stats()}, "
+                         f"probe backends: {self.ssid_fanout.stats()})")
+            print("\n🛑 WiFi Monitor stopped")
 
 if __name__ == "__main__":
-    monitor = WiFiMonitor()
-    monitor.run_monitor() 
\ No newline at end of file
+    if not defer_to_daemon():
+        monitor = WiFiMonitor()
+        monitor.run_monitor() 
\ No newline at end of file
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
-import time
+import asyncio
 import subprocess
-import os
-import sys
+from link_watcher import LinkWatcher
+from connectivity_oracle import get_shared_oracle
+from monitor_core import MonitorCore
+from login_api import login
+from wifictl import defer_to_daemon
 
 def check_gvph_wifi():
     try:
@@ -12,28 +15,35 @@ def check_gvph_wifi():
     except:
         return False
 
+def gvph_ssid():
+    """SSID probe for the monitor core: 'GVPH' when connected to it, else None"""
+    return "GVPH" if check_gvph_wifi() else None
+
+def run_login():
+    """Log in in this process; the browser part runs in the warm browser worker if reachable"""
+    result = login(engine='one-time', isolated=True)
+    if result.online:
+        print(f"✅ Automation completed in {result.elapsed:.1f}s ({result.method})")
+    else:
+        print(f"❌ Automation failed: {result.error or 'still not online'}")
+    return result.online
+
 def main():
     print("🔍 WiFi Network Monitor Started")
     print("📡 Monitoring for GVPH WiFi connection...")
+    if defer_to_daemon():
+        return
+    link_watcher = LinkWatcher()
+    link_watcher.add_listener(get_shared_oracle().on_link_event)
     
-    while True:
-        if check_gvph_wifi():
-            print("📶 GVPH WiFi detected! Starting automation...")
-            
-            # Run the automation
-            try:
-                subprocess.run(["/Library/Frameworks/Python.framework/Versions/3.12/bin/python3", "/Users/kameshkadimisetty/Desktop/Wifi Connector/one_time_wifi_login.py"], 
-                             cwd="/Users/kameshkadimisetty/Desktop/Wifi Connector", 
-                             timeout=60)
-                print("✅ Automation completed")
-            except subprocess.TimeoutExpired:
-                print("⏰ Automation timed out")
-            except Exception as e:
-                print(f"❌ Automation error: {e}")
-        else:
-            print("📶 Not connected to GVPH WiFi")
-        
-        time.sleep(10)  # Check every 10 seconds
+    # Re-check every 10 seconds while on GVPH and offline, otherwise wait for a link change
+    # (up to link_event_timeout). Logins only run while offline, and failures back off through
+    # the retry scheduler instead of repeating every check
+    core = MonitorCore(gvph_ssid, run_login, link_watcher=link_watcher, check_interval=10)
+    try:
+        asyncio.run(core.run())
+    except KeyboardInterrupt:
+        print("\n🛑 WiFi Network Monitor stopped")
 
 if __name__ == "__main__":
     main()
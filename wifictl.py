@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+wifictl - Query and control the running WiFi daemon (wifi_daemon.py)
+Talks JSON over the daemon's Unix socket: one request line, one reply line.
+Answers come from the daemon's cached state, so nothing is probed twice
+
+Usage: python3 wifictl.py status|metrics|login|pause|resume
+       python3 wifictl.py link-up [interface]   (for network hooks)
+"""
+
+import os
+import sys
+import json
+import socket
+from config import CACHE_CONFIG
+
+COMMANDS = ('status', 'metrics', 'login', 'pause', 'resume', 'link-up')
+
+
+def daemon_address():
+    """Unix socket the daemon listens on"""
+    return os.path.join(CACHE_CONFIG['cache_dir'], 'wifi_daemon.sock')
+
+
+def send_command(command, timeout=5, **fields):
+    """Send one command to the daemon; its reply as a dict, or None if no daemon is running"""
+    request = dict(fields, command=command)
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(daemon_address())
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            reply = sock.makefile('rb').readline()
+    except (OSError, AttributeError):
+        # AttributeError: no AF_UNIX on this platform
+        return None
+    return json.loads(reply) if reply else None
+
+
+def daemon_running():
+    return send_command('ping', timeout=1) is not None
+
+
+def defer_to_daemon():
+    """True (after telling the user) when the daemon already owns monitoring and login"""
+    if not daemon_running():
+        return False
+    print("🧭 wifi_daemon.py is already running and handles monitoring and login")
+    print("💡 Use: python3 wifictl.py status|metrics|login|pause|resume")
+    return True
+
+
+def print_status(status):
+    ago = lambda t: f"{status['now'] - t:.0f}s ago" if t else 'never'
+    print(f"📶 SSID: {status['ssid'] or 'not connected'}")
+    print(f"🌐 State: {status['state'] or 'unknown'} (checked {ago(status['last_check'])})")
+    if status['paused']:
+        print("⏸️  Logins paused")
+    if status['login_in_progress']:
+        print("🔐 Login in progress")
+    outcome = {True: 'ok', False: 'failed', None: 'abandoned'}[status['last_login_ok']]
+    print(f"🔑 Last login: {ago(status['last_login'])}" + (f" ({outcome})" if status['last_login'] else ''))
+    print(f"⏳ Next login allowed in {status['retry_remaining']:.0f}s")
+    print(f"⏱️  Uptime: {status['uptime']:.0f}s")
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS or (len(sys.argv) > 2 and sys.argv[1] != 'link-up'):
+        print(f"Usage: {os.path.basename(sys.argv[0])} {'|'.join(COMMANDS)}")
+        sys.exit(2)
+
+    fields = {'interface': sys.argv[2]} if len(sys.argv) > 2 else {}
+    reply = send_command(sys.argv[1], **fields)
+    if reply is None:
+        print("❌ wifi_daemon.py is not running")
+        sys.exit(1)
+    if not reply.get('ok'):
+        print(f"❌ {reply.get('error')}")
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == 'status':
+        print_status(reply['status'])
+    elif command == 'metrics':
+        print(json.dumps(reply['metrics'], indent=2, default=str))
+    elif command == 'login':
+        print({'started': "🔐 Login started",
+               'in_progress': "🔐 A login is already in progress"}.get(reply['login'], reply['login']))
+    elif command == 'link-up':
+        print("✅ Daemon re-checking the connection")
+    else:
+        print(f"✅ Logins {'paused' if command == 'pause' else 'resumed'}")
+
+
+if __name__ == "__main__":
+    main()